@@ -0,0 +1,134 @@
+"""
+circuit breaker for the SPARQL endpoint.
+
+closed    : calls go through; outcomes of the last `window` calls are kept
+open      : tripped by the error rate or the share of slow calls in that
+            window; calls fail fast with CircuitOpenError so /chat goes
+            straight to the movie index instead of waiting on timeouts
+half-open : after `cooldown` seconds a single probe is let through; success
+            closes the breaker, failure re-opens it for another cooldown
+
+only outages count as failures (transport errors, timeouts, 5xx); a
+malformed query is the caller's bug and leaves the breaker alone.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import httpx
+import requests
+
+logger = logging.getLogger("api")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_outage(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, httpx.TransportError,
+                        requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, (httpx.HTTPStatusError, requests.HTTPError)):
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+        return status is None or status >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, name: str = "sparql", window: int = 20, min_calls: int = 5, error_rate: float = 0.5,
+                 slow_ms: float = 2000.0, slow_rate: float = 0.8, cooldown: float = 10.0, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_s = slow_ms / 1000.0
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._window = deque(maxlen=max(self.min_calls, window))  # (failed, slow)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+        self.probes = 0
+
+    def allow(self) -> bool:
+        """True when a call may go out; in half-open state only one probe at a time."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self.probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+
+    def record(self, elapsed: float, error: BaseException = None) -> None:
+        if not self.enabled:
+            return
+        failed = error is not None and is_outage(error)
+        if error is not None and not failed:
+            # not an outage: release a half-open probe without judging the endpoint
+            with self._lock:
+                self._probing = False
+            return
+        slow = elapsed >= self.slow_s
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed or slow:
+                    self._trip(f"probe {'failed' if failed else 'slow'}")
+                else:
+                    self.state = CLOSED
+                    self._window.clear()
+                    logger.info(f"{self.name} circuit closed after a successful probe")
+                return
+            if self.state != CLOSED:
+                return
+            self._window.append((failed, slow))
+            n = len(self._window)
+            if n < self.min_calls:
+                return
+            errors = sum(f for f, _ in self._window) / n
+            slows = sum(s for _, s in self._window) / n
+            if errors >= self.error_rate or slows >= self.slow_rate:
+                self._trip(f"error rate {errors:.0%}, slow calls {slows:.0%} over the last {n}")
+
+    def _trip(self, reason: str) -> None:
+        # caller holds the lock
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.trips += 1
+        logger.warning(f"{self.name} circuit opened ({reason}); retrying in {self.cooldown:g}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = len(self._window)
+            return {
+                "enabled": self.enabled,
+                "state": self.state,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "probes": self.probes,
+                "window_calls": n,
+                "window_error_rate": round(sum(f for f, _ in self._window) / n, 3) if n else 0.0,
+                "window_slow_rate": round(sum(s for _, s in self._window) / n, 3) if n else 0.0,
+                "retry_in_s": round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1)
+                if self.state == OPEN else 0.0,
+            }
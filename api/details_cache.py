@@ -0,0 +1,98 @@
+"""
+cache for TMDb movie details.
+
+- in-process LRU with TTL (TMDB_CACHE_SIZE, TMDB_CACHE_TTL)
+- negative entries for titles TMDb can't match, kept for a shorter
+  TMDB_NEGATIVE_TTL so they are retried eventually but not on every request
+- SQLite tier (TMDB_CACHE_PATH, WAL) shared by every uvicorn worker on the
+  node and surviving restarts; TMDB_CACHE_PATH="" keeps it memory-only
+"""
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+from ttl_cache import SqliteStore, TTLCache
+
+DEFAULT_CACHE_PATH = "data/cache/tmdb_details.sqlite"
+
+# returned by get() when nothing (not even a negative entry) is cached
+MISS = object()
+_NEGATIVE = {"__not_found__": True}
+
+logger = logging.getLogger("api")
+
+
+def details_key(title: str, year: Optional[str] = None) -> str:
+    return f"{re.sub(r'[^a-z0-9]+', ' ', str(title).lower()).strip()}|{str(year or '').strip()}"
+
+
+class DetailsCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 7 * 24 * 3600.0, negative_ttl: float = 6 * 3600.0,
+                 path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self.disk = SqliteStore(path, table="tmdb_details")
+                self.disk.purge_expired()
+            except Exception as e:
+                logger.warning(f"TMDb details cache at {path} unavailable ({e}); using memory only")
+                self.disk = None
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.disk_errors = 0
+
+    def get(self, key: str):
+        """-> details dict, None for a cached "not found", or MISS."""
+        hit = self.memory.get(key, MISS)
+        if hit is MISS and self.disk is not None:
+            try:
+                row = self.disk.get_with_expiry(key)
+            except Exception:
+                self.disk_errors += 1
+                row = None
+            if row is not None:
+                hit, expires = row
+                self.disk_hits += 1
+                # keep the disk expiry so every worker ages the entry the same way
+                self.memory.set(key, hit, ttl=None if expires is None else max(0.0, expires - time.time()))
+        if hit is MISS:
+            return MISS
+        if hit == _NEGATIVE:
+            self.negative_hits += 1
+            return None
+        return hit
+
+    def set(self, key: str, details: Optional[Dict[str, Any]]) -> None:
+        """store details, or a negative entry when details is None."""
+        value = _NEGATIVE if details is None else details
+        ttl = self.negative_ttl if details is None else self.memory.ttl
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, ttl=ttl)
+            except Exception:
+                self.disk_errors += 1
+
+    def stats(self) -> dict:
+        s = self.memory.stats()
+        s["negative_ttl_s"] = self.negative_ttl
+        s["negative_hits"] = self.negative_hits
+        s["persistent"] = self.disk is not None
+        s["disk_hits"] = self.disk_hits
+        s["disk_errors"] = self.disk_errors
+        return s
+
+
+def details_cache_from_env() -> DetailsCache:
+    path = os.getenv("TMDB_CACHE_PATH")
+    return DetailsCache(
+        maxsize=int(os.getenv("TMDB_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("TMDB_CACHE_TTL", str(7 * 24 * 3600))),
+        negative_ttl=float(os.getenv("TMDB_NEGATIVE_TTL", str(6 * 3600))),
+        path=DEFAULT_CACHE_PATH if path is None else (path or None),
+    )
@@ -0,0 +1,160 @@
+"""
+embedded, in-process SPARQL store as an alternative to Fuseki.
+
+the movie KG is small enough to hold in memory, so with SPARQL_BACKEND=local
+the same SELECT/UPDATE strings /chat sends to Fuseki are answered in-process
+from the TTL files listed in SPARQL_LOCAL_FILES. engines:
+- oxigraph : pyoxigraph (default when installed), milliseconds per ranked query
+- rdflib   : pure-python fallback, much slower but dependency-light
+
+the movie exports use emo:title / emo:releaseYear (or emo:year) while the
+queries follow the schema's emo:hasTitle / emo:hasYear, so aliases for those
+predicates are materialized at load time.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from api.query_templates import ONTO_BASE
+
+DEFAULT_FILES = ["kg/movies_1000.ttl", "kg/data/genre_labels.ttl"]
+ENGINES = ("oxigraph", "rdflib")
+
+_ALIASES = f"""PREFIX emo: <{ONTO_BASE}>
+INSERT {{ ?m emo:hasTitle ?t }} WHERE {{ ?m emo:title ?t FILTER NOT EXISTS {{ ?m emo:hasTitle ?x }} }} ;
+INSERT {{ ?m emo:hasYear ?y }} WHERE {{ ?m emo:releaseYear|emo:year ?y FILTER NOT EXISTS {{ ?m emo:hasYear ?x }} }}"""
+
+logger = logging.getLogger("api")
+
+
+def local_files_from_env() -> List[str]:
+    raw = os.getenv("SPARQL_LOCAL_FILES")
+    return [p.strip() for p in raw.split(",") if p.strip()] if raw else list(DEFAULT_FILES)
+
+
+class OxigraphStore:
+    name = "oxigraph"
+
+    def __init__(self, paths: List[str]):
+        import pyoxigraph as ox
+
+        self._ox = ox
+        self.store = ox.Store()
+        for p in paths:
+            self.store.bulk_load(path=p, format=ox.RdfFormat.TURTLE)
+        self.store.update(_ALIASES)
+
+    def select(self, query: str) -> dict:
+        res = self.store.query(query)
+        return json.loads(res.serialize(format=self._ox.QueryResultsFormat.JSON))
+
+    def update(self, update_query: str) -> None:
+        self.store.update(update_query)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+
+class RdflibStore:
+    name = "rdflib"
+
+    def __init__(self, paths: List[str]):
+        import rdflib
+
+        self.graph = rdflib.Graph()
+        for p in paths:
+            self.graph.parse(p, format="turtle")
+        self.graph.update(_ALIASES)
+        # rdflib graphs are not safe for concurrent writers
+        self._lock = threading.Lock()
+
+    def select(self, query: str) -> dict:
+        with self._lock:
+            return json.loads(self.graph.query(query).serialize(format="json"))
+
+    def update(self, update_query: str) -> None:
+        with self._lock:
+            self.graph.update(update_query)
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+
+def load_local_store(engine: Optional[str] = None, paths: Optional[List[str]] = None):
+    """engine: "oxigraph" | "rdflib" | None (env SPARQL_LOCAL_ENGINE, else the first one installed)."""
+    engine = (engine or os.getenv("SPARQL_LOCAL_ENGINE") or "").strip().lower() or None
+    paths = paths or local_files_from_env()
+    candidates = [engine] if engine else list(ENGINES)
+    for name in candidates:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown local SPARQL engine '{name}', expected one of {ENGINES}")
+        cls = OxigraphStore if name == "oxigraph" else RdflibStore
+        try:
+            t0 = time.perf_counter()
+            store = cls(paths)
+        except ImportError:
+            if engine:
+                raise
+            continue
+        logger.info(f"Local SPARQL store ({name}): {len(store)} triples from {len(paths)} files "
+                    f"in {1000 * (time.perf_counter() - t0):.0f} ms")
+        return store
+    raise ImportError("SPARQL_BACKEND=local needs pyoxigraph or rdflib installed")
+
+
+if __name__ == "__main__":
+    # p50/p99 of the /chat ranked query: in-process engines vs Fuseki (when --endpoint is reachable)
+    import argparse
+    import random
+
+    from api.recommend_query import pool_size, ranked_movies_query
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--endpoint", default=None, help="Fuseki select endpoint to compare against")
+    ap.add_argument("--n", type=int, default=200)
+    ap.add_argument("--engines", default=",".join(ENGINES))
+    args = ap.parse_args()
+
+    genres = ["emo:Action", "emo:Adventure", "emo:Animation", "emo:Comedy", "emo:Crime", "emo:Drama", "emo:Family",
+              "emo:Fantasy", "emo:Horror", "emo:Mystery", "emo:Romance", "emo:SciFi", "emo:Thriller", "emo:War"]
+    rng = random.Random(0)
+    queries = []
+    for _ in range(args.n):
+        weights = {g: 1.0 for g in genres}
+        for g in rng.sample(genres, 3):
+            weights[g] += rng.choice([0.5, 0.8, 1.2])
+        for g in rng.sample(genres, 2):
+            weights[g] -= 1.0
+        queries.append(ranked_movies_query(weights, era=rng.choice([None, "classic", "modern"]), limit=pool_size(5)))
+
+    targets = []
+    for name in args.engines.split(","):
+        try:
+            targets.append((name, load_local_store(name).select))
+        except ImportError as e:
+            print(f"{name:10}: skipped ({e})")
+    if args.endpoint:
+        from api.sparql_client import SparqlClient
+
+        targets.append(("fuseki", SparqlClient(select_endpoint=args.endpoint, retries=0).select))
+
+    def pct(lat, q):
+        return 1000 * lat[min(len(lat) - 1, int(q * len(lat)))]
+
+    for name, select in targets:
+        try:
+            select(queries[0])
+        except Exception as e:
+            print(f"{name:10}: unavailable ({e})")
+            continue
+        n = args.n if name != "rdflib" else min(args.n, 20)
+        lat = []
+        for q in queries[:n]:
+            t0 = time.perf_counter()
+            select(q)
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+        print(f"{name:10}: p50 {pct(lat, 0.50):8.2f} ms   p99 {pct(lat, 0.99):8.2f} ms   ({n} ranked queries)")
@@ -2,21 +2,27 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from pydantic import ConfigDict
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 import uuid
-import re
 import logging
 import random
 import os
-import requests
+import asyncio
 
-from dl.emotion_inference import infer_emotions
+from dl.emotion_inference import infer_emotions_async, batching_stats, cache_stats
 from nlp.emotion_mapper import map_ml_to_ontology_individuals, EMOTION_TO_ONTOLOGY
-from nlp.emotion_genre_map import EMOTION_TO_GENRES
 from nlp.followup_questions import FOLLOWUP_QUESTIONS
-from api.sparql_client import run_select
-from session_state import update_emotions, aggregated_emotions, is_confident_enough, get_pending_question, set_pending_question, clear_pending_question, get_slots, set_slot_value, filled_slot_count, get_seen_titles, add_seen_titles, get_turns
-import json
+from nlp.slot_lexicon import SLOT_MATCHER
+from nlp.genre_lexicon import GENRE_LEXICON
+from nlp.genre_weighting import extract_genre_hint, genre_profile, get_genre_weighter
+from api.circuit_breaker import CircuitOpenError
+from api.sparql_client import breaker_stats, get_async_client as get_sparql_client, get_result_cache, run_select_async, warm as warm_sparql
+from api.movie_index import get_movie_index
+from api.recommend_query import PLANNER_STATS, RecommendationPlanner
+from api.details_cache import MISS, details_cache_from_env, details_key
+from api.tmdb import TMDB_API_KEY, close_tmdb_client, search_details
+from api.tmdb_snapshot import get_snapshot
+from session_state import update_emotions, dominant_emotions, get_pending_question, set_pending_question, clear_pending_question, get_slots, set_slot_value, filled_slot_count, get_seen_titles, add_seen_titles, get_turns, session_scope_async, session_stats
 
 app = FastAPI()
 
@@ -45,6 +51,8 @@ class ChatRequest(BaseModel):
     threshold: Optional[float] = None
     rating_threshold: Optional[float] = None
     top_k: Optional[int] = None
+    # include TMDb details on each movie so the client needs no follow-up /movie/details calls
+    attach_details: bool = False
     model_config = ConfigDict(extra='ignore')
 
 class ChatResponse(BaseModel):
@@ -52,56 +60,77 @@ class ChatResponse(BaseModel):
     reply: str
     dominant_emotion: str
     genres: List[str]
-    movies: List[Dict[str, str]]
+    movies: List[Dict[str, Any]]
+
+@app.on_event("startup")
+def _warm_indexes():
+    # parse the movie CSV (and load the embedded KG, if configured) up front instead of on first use
+    index = get_movie_index()
+    try:
+        warm_sparql()
+    except Exception as e:
+        logger.error(f"Local SPARQL store load failed: {e}")
+    snap = get_snapshot()
+    if index is not None and snap is not None:
+        n = index.attach_ratings(snap.ratings())
+        logger.info(f"TMDb snapshot: {n} movie ratings attached to the index")
+
+@app.on_event("shutdown")
+async def _close_clients():
+    await get_sparql_client().aclose()
+    await close_tmdb_client()
 
 @app.get("/health")
 def health():
     return {
         "status": "ok",
         "tmdb_enabled": bool(TMDB_API_KEY),
-        "rating_enforced": bool(TMDB_API_KEY)
+        "rating_enforced": _rating_enforced(),
+        "tmdb_snapshot": get_snapshot().stats() if get_snapshot() is not None else None,
+        "emotion_batching": batching_stats(),
+        "emotion_cache": cache_stats(),
+        "sparql": get_sparql_client().stats(),
+        "sparql_cache": get_result_cache().stats(),
+        "sparql_breaker": breaker_stats(),
+        "recommend_queries": PLANNER_STATS.snapshot(),
+        "genre_weights": get_genre_weighter().stats(),
+        "tmdb_cache": MOVIE_DETAILS_CACHE.stats(),
+        "sessions": session_stats(),
     }
 
+def _session_id(req: ChatRequest) -> str:
+    return req.session_id or req.user_id or "default"
+
 @app.post("/chat")
-def chat(req: ChatRequest) -> ChatResponse:
+async def chat(req: ChatRequest) -> ChatResponse:
+    # with a shared session backend the turn reads the session once and writes it back once
+    async with session_scope_async(_session_id(req)):
+        return await _chat_turn(req)
+
+async def _chat_turn(req: ChatRequest) -> ChatResponse:
     try:
         if not req.text or not req.text.strip():
             raise HTTPException(status_code=400, detail="Text must be provided")
 
-        session_id = req.session_id or req.user_id or "default"
+        session_id = _session_id(req)
         text = req.text.strip()
 
-        # quick genre hint extraction from free text
-        def extract_genre_hint(t: str) -> Optional[str]:
-            _load_genre_labels()
-            _load_genre_synonyms()
-            s_norm = _normalize_simple(t)
-            # 1) direct match against ontology labels/forms
-            for form, curie in GENRE_FORMS_CACHE.items():
-                if form and form in s_norm:
-                    return curie
-            # 2) synonym match loaded from ontology-aligned data
-            for syn, curie in GENRE_SYNONYMS_CACHE.items():
-                if syn and syn in s_norm:
-                    return curie
-            return None
-
+        # genre asked for in the free text (ranked, single pass; negated mentions like "no horror" are skipped)
         genre_hint = extract_genre_hint(text)
 
         # 1) Model inference (resilient)
         try:
-            ml_scores = infer_emotions(text)
+            # awaits the micro-batcher's future directly, so concurrent /chat texts share one forward pass
+            ml_scores = await infer_emotions_async(text)
         except Exception as e:
             logger.error(f"Emotion inference failed: {e}")
             ml_scores = {}
 
         # 2) Update session state and aggregate
         update_emotions(session_id, ml_scores)
-        agg_emotions = aggregated_emotions(session_id)
 
-        # 3) Pick dominant emotion (simple heuristic)
-        top_emotions = sorted(agg_emotions.items(), key=lambda x: x[1], reverse=True)
-        top_emotions = [e for e, _ in top_emotions][:3]
+        # 3) Pick dominant emotion (top of the session's aggregated profile)
+        top_emotions = [e for e, _ in dominant_emotions(session_id, 3)]
         dominant_emotion = top_emotions[0] if top_emotions else "neutral"
 
         # 4) Handle pending follow-up: interpret answer and proceed
@@ -187,116 +216,17 @@ def chat(req: ChatRequest) -> ChatResponse:
         if not selected_individual and individuals:
             selected_individual = individuals[0]
 
-        ranked_genres = EMOTION_TO_GENRES.get(selected_individual or "", [])
-
-        # if user gave a genre hint, prioritize it
-        if genre_hint and genre_hint not in ranked_genres:
-            ranked_genres = [genre_hint] + ranked_genres
-
-        # apply content sensitivity filtering
-        sensitivity = slots.get("content_sensitivity")
-        if sensitivity == "avoid_horror":
-            ranked_genres = [g for g in ranked_genres if "Horror" not in g]
-        elif sensitivity == "avoid_drama":
-            ranked_genres = [g for g in ranked_genres if "Drama" not in g]
-        elif sensitivity == "avoid_violence":
-            ranked_genres = [g for g in ranked_genres if ("Action" not in g and "Crime" not in g and "War" not in g)]
-
-        # 7) Query movies from KG via SPARQL (aligned predicates)
-        # filter to concrete genre classes that exist in the KG
-        _load_genre_labels()
-        allowed_genres = set(GENRE_LABELS_CACHE.keys())
-        # compute genre weights from slots to build ranked list
-        base_genres = list(allowed_genres)
-        weights = {g: 1.0 for g in base_genres}
-        # desired outcome
-        if slots.get("desired_outcome") == "get_excited":
-            for g in ["emo:Action","emo:Thriller","emo:SciFi"]: weights[g] += 0.8
-        elif slots.get("desired_outcome") == "feel_better":
-            for g in ["emo:Comedy","emo:Family","emo:Romance"]: weights[g] += 0.8
-        elif slots.get("desired_outcome") == "process_feelings":
-            for g in ["emo:Drama","emo:Documentary"]: weights[g] += 0.8
-        # intensity/comfort style
-        if slots.get("intensity_style") == "adrenaline":
-            for g in ["emo:Action","emo:Thriller","emo:Adventure"]: weights[g] += 0.7
-        elif slots.get("intensity_style") == "suspense":
-            for g in ["emo:Thriller","emo:Mystery","emo:Crime"]: weights[g] += 0.7
-        elif slots.get("intensity_style") == "dark":
-            for g in ["emo:Horror","emo:Crime","emo:FilmNoir"]: weights[g] += 0.7
-        if slots.get("comfort_style") == "uplifting":
-            for g in ["emo:Comedy","emo:Family","emo:Romance"]: weights[g] += 0.7
-        elif slots.get("comfort_style") == "heartwarming":
-            for g in ["emo:Family","emo:Romance","emo:Drama"]: weights[g] += 0.6
-        elif slots.get("comfort_style") == "calm":
-            for g in ["emo:Drama","emo:Documentary","emo:Fantasy"]: weights[g] += 0.5
-        # cognitive load
-        if slots.get("cognitive_load") == "escapist":
-            for g in ["emo:Fantasy","emo:Comedy","emo:Adventure"]: weights[g] += 0.6
-        elif slots.get("cognitive_load") == "thoughtful":
-            for g in ["emo:Drama","emo:Mystery","emo:Documentary"]: weights[g] += 0.6
-        # pace
-        if slots.get("pace_preference") == "fast":
-            for g in ["emo:Action","emo:Thriller","emo:Adventure"]: weights[g] += 0.6
-        elif slots.get("pace_preference") == "slow":
-            for g in ["emo:Drama","emo:Mystery","emo:Western"]: weights[g] += 0.6
-        # violence tolerance
-        vt = slots.get("violence_tolerance")
-        if vt == "none":
-            for g in ["emo:Action","emo:Crime","emo:War","emo:Horror"]: weights[g] -= 0.7
-        elif vt == "mild":
-            for g in ["emo:Action","emo:Crime","emo:War","emo:Horror"]: weights[g] -= 0.3
-        # content sensitivity filter
-        sensitivity = slots.get("content_sensitivity")
-        if sensitivity == "avoid_horror":
-            for g in ["emo:Horror"]: weights[g] -= 1.0
-        elif sensitivity == "avoid_drama":
-            for g in ["emo:Drama"]: weights[g] -= 0.8
-        elif sensitivity == "avoid_violence":
-            for g in ["emo:Action","emo:Crime","emo:War"]: weights[g] -= 0.9
-        # usual preference (baseline taste)
-        up = slots.get("usual_preference")
-        if up == "family_friendly":
-            for g in ["emo:Family","emo:Animation","emo:Comedy"]: weights[g] += 0.8
-        elif up == "action_packed":
-            for g in ["emo:Action","emo:Adventure","emo:Thriller"]: weights[g] += 0.8
-        elif up == "thoughtful":
-            for g in ["emo:Drama","emo:Mystery","emo:Documentary"]: weights[g] += 0.8
-        # musical score tone preference
-        mt = slots.get("music_tone")
-        if mt == "uplifting":
-            for g in ["emo:Musical","emo:Romance","emo:Family","emo:Comedy"]: weights[g] += 0.6
-        elif mt == "somber":
-            for g in ["emo:Drama","emo:FilmNoir"]: weights[g] += 0.6
-        elif mt == "intense":
-            for g in ["emo:Action","emo:Thriller"]: weights[g] += 0.6
-
-        # helper: diversify candidates by era, avoid repeats, and apply comfort blocking
-        def _diversify_candidates(candidates_list):
+        # 7) Genre weights from the slot tables (nlp.genre_weighting), seeded by the emotion and the genre hint
+        profile = genre_profile(slots, selected_individual, genre_hint)
+        weights = profile.weights
+        ranked_genres = list(profile.ranked)
+
+        # helper: diversify candidates by era and avoid repeats (blocked genres are filtered at the source)
+        def _diversify_candidates(filtered):
             seen = set(get_seen_titles(session_id))
             k = req.top_k or 5
             era_pref = slots.get("era_preference")
 
-            # block harsher genres for comfort-first scenarios
-            direction = slots.get("emotion_direction")
-            outcome = slots.get("desired_outcome")
-            cstyle = slots.get("comfort_style")
-            blocked = set()
-            if direction == "comforting" or outcome == "feel_better" or cstyle in {"calm", "heartwarming"}:
-                blocked = {"Horror", "War", "Crime"}
-
-            def _is_blocked(c):
-                if not blocked:
-                    return False
-                full = c.get("genres_full")
-                if isinstance(full, list):
-                    lf = {g.lower() for g in full}
-                    return any(b.lower() in lf for b in blocked)
-                g = c.get("genre", "")
-                return g in blocked
-
-            # filter blocked upfront
-            filtered = [c for c in candidates_list if not _is_blocked(c)]
-
             # prefer unseen titles; backfill with seen if needed
             unseen = [c for c in filtered if c.get("title") not in seen]
             seen_list = [c for c in filtered if c.get("title") in seen]
@@ -336,235 +266,82 @@ def chat(req: ChatRequest) -> ChatResponse:
             random.shuffle(selected)
             return [{"title": s.get("title", ""), "genre": s.get("genre", ""), "year": s.get("year", "")} for s in selected[:k]]
 
-        # seed with emotion-derived genres if available
-        seed = EMOTION_TO_GENRES.get(selected_individual or "", [])
-        for g in seed:
-            if g in weights:
-                weights[g] += 0.2
-
-        # finalize ranked list
-        ranked_genres = [g for g, w in sorted(weights.items(), key=lambda x: x[1], reverse=True) if w > 0]
-
-        values_block = " ".join(f"({g})" for g in ranked_genres)
-
+        # 8) Query movies from KG via SPARQL (aligned predicates)
         era = slots.get("era_preference")
-        year_filter = ""
-        if era == "classic":
-            year_filter = "FILTER(xsd:integer(?year) < 1990)"
-        elif era == "modern":
-            year_filter = "FILTER(xsd:integer(?year) >= 1990)"
-
-        query = f"""
-        PREFIX emo: <http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        SELECT ?title ?year ?genre ?genreLabel WHERE {{
-          {f"VALUES (?genre) {{ {values_block} }}" if values_block else ""}
-          ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year {"; emo:belongsToGenre ?genre ." if values_block else "."}
-          OPTIONAL {{ ?genre rdfs:label ?genreLabel }}
-          {year_filter}
-        }} LIMIT {req.top_k or 5}
-        """
-
-        movies = []
-        try:
-            sparql_res = run_select(query, timeout=15)
-            candidates_map = {}
-            for b in sparql_res.get("results", {}).get("bindings", []):
-                title = b.get("title", {}).get("value", "")
-                year = b.get("year", {}).get("value", "")
-                genre_uri = b.get("genre", {}).get("value", "")
-                genre_label = b.get("genreLabel", {}).get("value", "")
-                curie = None
-                if genre_uri and genre_uri.startswith(ONTO_BASE):
-                    local = genre_uri[len(ONTO_BASE):]
-                    curie = f"emo:{local}"
-                if curie is None:
-                    continue
-                w = weights.get(curie, 0.0)
-                entry = candidates_map.setdefault(title, {"title": title, "year": year, "genre": genre_label, "score": 0.0, "best_w": -1.0, "genres_full": set()})
-                entry["score"] += w
-                entry["genres_full"].add(genre_label)
-                if w > entry["best_w"]:
-                    entry["best_w"] = w
-                    entry["genre"] = genre_label
-            candidates = []
-            for v in candidates_map.values():
-                if isinstance(v.get("genres_full"), set):
-                    v["genres_full"] = list(v["genres_full"])
-                candidates.append(v)
-            movies = _diversify_candidates(candidates)
-        except Exception as e:
-            logger.error(f"SPARQL query failed: {e}")
-
-        if not movies:
-            query_relaxed = f"""
-            PREFIX emo: <http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#>
-            PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-            SELECT ?title ?year WHERE {{
-              ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year .
-              {year_filter}
-            }} LIMIT {req.top_k or 5}
-            """
-            try:
-                sparql_res = run_select(query_relaxed, timeout=15)
-                candidates = []
-                for b in sparql_res.get("results", {}).get("bindings", []):
-                    title = b.get("title", {}).get("value", "")
-                    year = b.get("year", {}).get("value", "")
-                    candidates.append({"title": title, "genre": "", "year": year, "score": 0.5})
-                movies = _diversify_candidates(candidates)
-            except Exception as e:
-                logger.error(f"Era-only SPARQL failed: {e}")
-
-        if not movies:
-            broad_query = f"""
-            PREFIX emo: <http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#>
-            SELECT ?title ?year WHERE {{
-              ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year .
-            }} LIMIT {req.top_k or 5}
-            """
-            try:
-                sparql_res = run_select(broad_query, timeout=15)
-                candidates = []
-                for b in sparql_res.get("results", {}).get("bindings", []):
-                    title = b.get("title", {}).get("value", "")
-                    year = b.get("year", {}).get("value", "")
-                    candidates.append({"title": title, "genre": "", "year": year, "score": 0.3})
-                movies = _diversify_candidates(candidates)
-            except Exception as e:
-                logger.error(f"Broad SPARQL query failed: {e}")
-
-        if not movies:
-            try:
-                with open("data/movie_kb_final.csv", "r", encoding="utf-8") as f:
-                    import csv
-                    rdr = csv.DictReader(f, fieldnames=["id","title","year","genres"])
-                    next(rdr, None)
-                    candidates = []
-                    for row in rdr:
-                        try:
-                            title = row.get("title", "")
-                            year = row.get("year", "")
-                            genres_norm = row.get("genres", "")
-                            if not title:
-                                continue
-                            genre_list = [g.strip() for g in genres_norm.split("|") if g.strip()]
-                            score = 0.0
-                            best_label = ""
-                            best_w = -1.0
-                            for gname in genre_list:
-                                _load_genre_labels()
-                                curie = None
-                                gl = gname.lower()
-                                for k, v in GENRE_LABELS_CACHE.items():
-                                    if v.lower() == gl:
-                                        curie = k
-                                        break
-                                if curie is None:
-                                    curie = f"emo:{re.sub('[^A-Za-z0-9]', '', gname)}"
-                                w = weights.get(curie, 0.0)
-                                score += w
-                                if w > best_w:
-                                    best_w = w
-                                    best_label = gname
-                            candidates.append({"title": title, "genre": best_label or (genre_list[0] if genre_list else ""), "year": year, "score": score, "genres_full": genre_list})
-                        except Exception:
-                            continue
-                    movies = _diversify_candidates(candidates)
-            except Exception as e:
-                logger.error(f"CSV fallback failed: {e}")
-
-        def _backfill_candidates(limit_count: int = 40):
-            try:
-                vblock = " ".join(f"({g})" for g in ranked_genres)
-                q = f"""
-                PREFIX emo: <http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#>
-                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-                SELECT ?title ?year ?genre ?genreLabel WHERE {{
-                  {f"VALUES (?genre) {{ {vblock} }}" if vblock else ""}
-                  ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year {"; emo:belongsToGenre ?genre ." if vblock else "."}
-                  OPTIONAL {{ ?genre rdfs:label ?genreLabel }}
-                  {year_filter}
-                }} LIMIT {limit_count}
-                """
-                sres = run_select(q, timeout=15)
-                cmap = {}
-                for b in sres.get("results", {}).get("bindings", []):
-                    title = b.get("title", {}).get("value", "")
-                    year = b.get("year", {}).get("value", "")
-                    genre_uri = b.get("genre", {}).get("value", "")
-                    genre_label = b.get("genreLabel", {}).get("value", "")
-                    curie = None
-                    if genre_uri and genre_uri.startswith(ONTO_BASE):
-                        local = genre_uri[len(ONTO_BASE):]
-                        curie = f"emo:{local}"
-                    w = weights.get(curie, 0.0) if curie else 0.0
-                    e = cmap.setdefault(title, {"title": title, "year": year, "genre": genre_label, "score": 0.0, "best_w": -1.0, "genres_full": set()})
-                    e["score"] += w
-                    if genre_label:
-                        e["genres_full"].add(genre_label)
-                    if w > e["best_w"]:
-                        e["best_w"] = w
-                        e["genre"] = genre_label
-                cands = []
-                for v in cmap.values():
-                    if isinstance(v.get("genres_full"), set):
-                        v["genres_full"] = list(v["genres_full"])
-                    cands.append(v)
-                return _diversify_candidates(cands)
-            except Exception:
-                return []
-
-        def _rating_pass(title: str, year: Optional[str], threshold: float) -> bool:
-            if not TMDB_API_KEY:
-                return True
-            d = _fetch_tmdb_details(title, year)
-            try:
-                r = float(d.get("rating")) if (d and d.get("rating") is not None) else 0.0
-                return r >= threshold
-            except Exception:
-                return False
-
-        def _filter_and_backfill(mv_list: List[Dict[str, str]], k: int, threshold: float) -> List[Dict[str, str]]:
-            if not mv_list:
-                mv_list = []
+        rating_threshold = (req.rating_threshold if isinstance(req.rating_threshold, (int, float)) else None) or 7.0
+        # with an offline snapshot the rating threshold is a plain array filter on the movie index;
+        # unrated movies stay in when a live lookup can still rate them
+        index_rating = dict(
+            min_rating=rating_threshold,
+            admit_unrated=bool(TMDB_API_KEY) or RATING_UNRATED_POLICY == "admit",
+        ) if get_snapshot() is not None else {}
+
+        # one planned, oversampled query; seen titles and rejected movies are excluded in the store
+        planner = RecommendationPlanner(
+            run_select_async, weights, GENRE_LEXICON.labels(),
+            era=era, top_k=req.top_k or 5, seen=get_seen_titles(session_id), blocked=profile.blocked,
+        )
+        index_pool = None
+
+        async def _next_batch() -> List[Dict[str, Any]]:
+            nonlocal index_pool
+            if index_pool is None:
+                try:
+                    pool = await planner.candidates()
+                    if pool or planner.fetched:
+                        picked = _diversify_candidates(pool)
+                        planner.offered(picked)
+                        return picked
+                except CircuitOpenError:
+                    logger.debug("SPARQL circuit open; ranking from the movie index")
+                except Exception as e:
+                    logger.error(f"SPARQL query failed: {e!r}")
+                # store down or no match: offline ranking over the in-memory movie index
+                planner.fallback = True
+                index = get_movie_index()
+                try:
+                    index_pool = index.top_candidates(weights, era=era, limit=200, blocked_genres=profile.blocked, **index_rating) if index is not None else []
+                except Exception as e:
+                    logger.error(f"Movie index fallback failed: {e}")
+                    index_pool = []
+            picked = _diversify_candidates(index_pool)
+            taken = {c["title"] for c in picked}
+            index_pool = [c for c in index_pool if c["title"] not in taken]
+            return picked
+
+        movies = await _next_batch()
+
+        async def _filter_and_backfill(mv_list: List[Dict[str, Any]], k: int, threshold: float) -> List[Dict[str, Any]]:
+            deadline = asyncio.get_running_loop().time() + RATING_BUDGET_MS / 1000.0
             used = set()
+            batch = mv_list or []
             passed = []
-            for m in mv_list:
-                t = m.get("title", "")
-                y = m.get("year")
-                if t in used:
-                    continue
-                if _rating_pass(t, y, threshold):
-                    passed.append(m)
-                    used.add(t)
-                if len(passed) >= k:
-                    return passed[:k]
             tries = 0
-            while len(passed) < k and tries < 5:
-                more = _backfill_candidates(60)
-                for m in more:
-                    t = m.get("title", "")
-                    y = m.get("year")
-                    if t in used:
-                        continue
-                    if _rating_pass(t, y, threshold):
-                        passed.append(m)
-                        used.add(t)
-                        if len(passed) >= k:
-                            break
+            while True:
+                got = await _rating_filter(batch, k - len(passed), threshold, deadline, exclude=used)
+                ok = {m.get("title", "") for m in got}
+                planner.reject(m for m in batch if m.get("title", "") not in ok)
+                used.update(m.get("title", "") for m in batch)
+                passed += got
+                if len(passed) >= k or tries >= 5 or asyncio.get_running_loop().time() >= deadline:
+                    break
+                batch = await _next_batch()
+                if not batch:
+                    break
                 tries += 1
             return passed[:k]
 
-        rating_threshold = (req.rating_threshold if isinstance(req.rating_threshold, (int, float)) else None) or 7.0
         kfinal = req.top_k or 5
-        movies = _filter_and_backfill(movies, kfinal, rating_threshold)
+        movies = await _filter_and_backfill(movies, kfinal, rating_threshold)
+        planner.finish()
+        if req.attach_details and movies:
+            # the rating filter already looked these up, so this is mostly cache/snapshot hits
+            details = await _fetch_details_many([(m.get("title", ""), m.get("year")) for m in movies])
+            movies = [dict(m, details=d) for m, d in zip(movies, details)]
 
         clear_pending_question(session_id)
         try:
-            add_seen_titles(session_id, [m.get("title", "") for m in movies])
+            add_seen_titles(session_id, [m.get("title", "") for m in movies], years=[m.get("year") for m in movies])
         except Exception:
             pass
         return ChatResponse(
@@ -590,11 +367,6 @@ def chat(req: ChatRequest) -> ChatResponse:
             movies=[],
         )
 
-def _normalize_text(s: str) -> str:
-    s = s.lower()
-    s = re.sub(r"\s+", " ", s)
-    return s
-
 SLOT_ORDER = [
     "emotion_direction",
     "desired_outcome",
@@ -605,275 +377,29 @@ SLOT_ORDER = [
 ]
 
 def interpret_followup_answer(pending_id: str, user_text: str, ml_scores: Dict[str, float]) -> Optional[str]:
-    t = _normalize_text(user_text)
-    synonyms = {
-        "emotion_direction": {
-            "comforting": [
-                "comfort", "comforting", "soft", "light", "happy", "calm", "gentle",
-                "soothing", "feel better", "uplifting", "positive", "warm",
-                "heartwarming", "wholesome"
-            ],
-            "intense": [
-                "intense", "dark", "thrill", "thrilling", "scary", "horror",
-                "action", "sad", "dramatic", "serious", "heavy"
-            ],
-        },
-        "desired_outcome": {
-            "feel_better": ["feel better", "lift mood", "uplift", "cheer up"],
-            "process_feelings": ["process feelings", "reflect", "think", "ponder"],
-            "get_excited": ["get excited", "pump", "adrenaline", "thrill"],
-        },
-        "era_preference": {
-            "classic": ["classic", "older", "vintage", "retro"],
-            "modern": ["modern", "newer", "recent", "contemporary"],
-        },
-        "content_sensitivity": {
-            "avoid_horror": ["avoid horror", "no horror", "not horror"],
-            "avoid_drama": ["avoid drama", "no drama", "not drama", "heavy"],
-            "avoid_violence": ["avoid violence", "no violence", "not violent", "no action"],
-        },
-        "intensity_style": {
-            "adrenaline": ["adrenaline", "adrenaline pumping", "pump", "exciting", "high octane"],
-            "suspense": ["suspense", "tense", "edge of seat", "thriller"],
-            "dark": ["dark", "edgy", "grisly", "grim", "horror"],
-        },
-        "comfort_style": {
-            "uplifting": ["uplifting", "feel good", "cheer up", "positive"],
-            "heartwarming": ["heartwarming", "warm", "wholesome"],
-            "calm": ["calm", "soothing", "relaxing", "low stakes", "calming", "gentle"],
-        },
-        "pace_preference": {
-            "fast": ["fast", "fast paced", "quick", "rapid"],
-            "slow": ["slow", "slow burn", "steady"],
-        },
-        "violence_tolerance": {
-            "none": ["no violence", "avoid violence"],
-            "mild": ["mild", "some", "a little"],
-            "strong": ["strong", "high", "ok with violence"],
-        }
-    }
-    # extended preferences
-    synonyms["usual_preference"] = {
-        "family_friendly": ["family friendly", "family‑friendly", "family", "kids", "wholesome"],
-        "action_packed": ["action packed", "action‑packed", "explosive", "high octane", "stunts"],
-        "thoughtful": ["thoughtful", "layered", "reflective", "serious drama", "slow burn"]
-    }
-    synonyms["music_tone"] = {
-        "uplifting": ["uplifting", "feel good", "cheerful", "bright"],
-        "somber": ["somber", "melancholy", "sad", "dark score"],
-        "intense": ["intense", "tense", "driving", "heavy"]
-    }
-    # first, interpret strictly for the pending slot
-    pending_opts = synonyms.get(pending_id, {})
-    for value, words in pending_opts.items():
-        if any(w in t for w in words):
-            return f"emo:{value}" if pending_id in {"desired_outcome","emotion_direction","cognitive_load"} else value
-    # if not found, allow cross-slot detection to capture implicit answers
-    for slot_id, opts in synonyms.items():
-        for value, words in opts.items():
-            if any(w in t for w in words):
-                return f"emo:{value}" if slot_id in {"desired_outcome","emotion_direction","cognitive_load"} else value
-    joy_dom = (ml_scores.get("joy", 0) + ml_scores.get("admiration", 0))
-    fear_dom = (ml_scores.get("fear", 0) + ml_scores.get("anger", 0))
-    if joy_dom or fear_dom:
-        val = "comforting" if joy_dom >= fear_dom else "intense"
-        return f"emo:{val}"
-    return None
-
-from typing import Tuple
+    # strictly for the pending slot (including its "no preference" answers)
+    return SLOT_MATCHER.match_slot(user_text, pending_id)
 
 def detect_any_slot_value(user_text: str, ml_scores: Dict[str, float]) -> Optional[Tuple[str, str]]:
-    t = _normalize_text(user_text)
-    synonyms = {
-        "emotion_direction": {
-            "comforting": [
-                "comfort", "comforting", "soft", "light", "happy", "calm", "gentle",
-                "soothing", "feel better", "uplifting", "positive", "warm",
-                "heartwarming", "wholesome"
-            ],
-            "intense": [
-                "intense", "dark", "thrill", "thrilling", "scary", "horror",
-                "action", "sad", "dramatic", "serious", "heavy"
-            ],
-        },
-        "desired_outcome": {
-            "feel_better": ["feel better", "lift mood", "uplift", "cheer up"],
-            "process_feelings": ["process feelings", "reflect", "think", "ponder"],
-            "get_excited": ["get excited", "pump", "adrenaline", "thrill"],
-        },
-        "era_preference": {
-            "classic": ["classic", "older", "vintage", "retro"],
-            "modern": ["modern", "newer", "recent", "contemporary"],
-        },
-        "content_sensitivity": {
-            "avoid_horror": ["avoid horror", "no horror", "not horror"],
-            "avoid_drama": ["avoid drama", "no drama", "not drama", "heavy"],
-            "avoid_violence": ["avoid violence", "no violence", "not violent", "no action"],
-        },
-        "intensity_style": {
-            "adrenaline": ["adrenaline", "adrenaline pumping", "pump", "exciting", "high octane"],
-            "suspense": ["suspense", "tense", "edge of seat", "thriller"],
-            "dark": ["dark", "edgy", "grisly", "grim", "horror"],
-        },
-        "comfort_style": {
-            "uplifting": ["uplifting", "feel good", "cheer up", "positive"],
-            "heartwarming": ["heartwarming", "warm", "wholesome"],
-            "calm": ["calm", "soothing", "relaxing", "low stakes", "calming", "gentle"],
-        },
-        "pace_preference": {
-            "fast": ["fast", "fast paced", "quick", "rapid"],
-            "slow": ["slow", "slow burn", "steady"],
-        },
-        "violence_tolerance": {
-            "none": ["no violence", "avoid violence"],
-            "mild": ["mild", "some", "a little"],
-            "strong": ["strong", "high", "ok with violence"],
-        }
-    }
-    synonyms["usual_preference"] = {
-        "family_friendly": ["family friendly", "family‑friendly", "family", "kids", "wholesome"],
-        "action_packed": ["action packed", "action‑packed", "explosive", "high octane", "stunts"],
-        "thoughtful": ["thoughtful", "layered", "reflective", "serious drama", "slow burn"]
-    }
-    synonyms["music_tone"] = {
-        "uplifting": ["uplifting", "feel good", "cheerful", "bright"],
-        "somber": ["somber", "melancholy", "sad", "dark score"],
-        "intense": ["intense", "tense", "driving", "heavy"]
-    }
-    for slot_id, opts in synonyms.items():
-        for value, words in opts.items():
-            if any(w in t for w in words):
-                return (slot_id, value)
+    det = SLOT_MATCHER.match_any(user_text)
+    if det:
+        return det
     joy_dom = (ml_scores.get("joy", 0) + ml_scores.get("admiration", 0))
     fear_dom = (ml_scores.get("fear", 0) + ml_scores.get("anger", 0))
     if joy_dom or fear_dom:
         return ("emotion_direction", "comforting" if joy_dom >= fear_dom else "intense")
     return None
 
-GENRE_LABELS_CACHE: Dict[str, str] = {}
-GENRE_FORMS_CACHE: Dict[str, str] = {}
-GENRE_SYNONYMS_CACHE: Dict[str, str] = {}
 ONTO_BASE = "http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#"
 
-def _normalize_simple(s: str) -> str:
-    return re.sub(r"\s+", " ", s.strip().lower())
-
-def _camel_to_words(name: str) -> str:
-    s = re.sub(r"([a-z])([A-Z])", r"\1 \2", name)
-    return re.sub(r"[^a-zA-Z0-9 ]", " ", s).strip()
-
-def _load_genre_labels() -> None:
-    global GENRE_LABELS_CACHE, GENRE_FORMS_CACHE
-    if GENRE_LABELS_CACHE:
-        return
-    try:
-        with open("kg/data/genre_labels.ttl", "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                m = re.search(r"emo:(\w+)\s+rdfs:label\s+\"([^\"]+)\"", line)
-                if m:
-                    curie = f"emo:{m.group(1)}"
-                    label = m.group(2)
-                    GENRE_LABELS_CACHE[curie] = label
-                    GENRE_FORMS_CACHE[curie] = _normalize_simple(label)
-    except Exception:
-        GENRE_LABELS_CACHE["emo:Comedy"] = "Comedy"
-        GENRE_LABELS_CACHE["emo:Drama"] = "Drama"
-        GENRE_LABELS_CACHE["emo:Horror"] = "Horror"
-        GENRE_LABELS_CACHE["emo:Action"] = "Action"
-        GENRE_LABELS_CACHE["emo:Family"] = "Family"
-        GENRE_FORMS_CACHE = {k: _normalize_simple(v) for k, v in GENRE_LABELS_CACHE.items()}
-
-SLOT_ORDER = [
-    "emotion_direction",
-    "desired_outcome",
-    "pace_preference",
-    "violence_tolerance",
-    "era_preference",
-    "content_sensitivity",
-]
-
-def _load_genre_synonyms() -> None:
-    global GENRE_SYNONYMS_CACHE
-    if GENRE_SYNONYMS_CACHE:
-        return
-    try:
-        with open("kg/data/genre_synonyms.json", "r", encoding="utf-8") as f:
-            import json as _json
-            data = _json.load(f)
-            for curie, syn in data.items():
-                if isinstance(syn, list) and syn:
-                    GENRE_SYNONYMS_CACHE[curie] = syn[0]
-    except Exception:
-        GENRE_SYNONYMS_CACHE = {}
-
-def interpret_followup_answer(pending_id: str, user_text: str, ml_scores: Dict[str, float]) -> Optional[str]:
-    t = _normalize_text(user_text)
-    synonyms = {
-        "emotion_direction": {
-            "comforting": [
-                "comfort", "comforting", "light", "happy", "calm", "gentle",
-                "soothing", "feel better", "uplifting", "positive", "warm",
-                "heartwarming", "wholesome"
-            ],
-            "intense": [
-                "intense", "dark", "thrill", "thrilling", "scary", "horror",
-                "action", "sad", "dramatic", "serious", "heavy"
-            ],
-        },
-        "desired_outcome": {
-            "feel_better": ["feel better", "lift mood", "uplift", "cheer up"],
-            "process_feelings": ["process feelings", "reflect", "think", "ponder"],
-            "get_excited": ["get excited", "pump", "adrenaline", "thrill"],
-        },
-        "era_preference": {
-            "classic": ["classic", "older", "vintage", "retro"],
-            "modern": ["modern", "newer", "recent", "contemporary"],
-        },
-        "content_sensitivity": {
-            "avoid_horror": ["avoid horror", "no horror", "not horror"],
-            "avoid_drama": ["avoid drama", "no drama", "not drama", "heavy"],
-            "avoid_violence": ["avoid violence", "no violence", "not violent", "no action"],
-            "none": ["either", "no preference", "anything", "tell me", "idk", "dont know"]
-        },
-        "intensity_style": {
-            "adrenaline": ["adrenaline", "adrenaline pumping", "pump", "exciting", "high octane"],
-            "suspense": ["suspense", "tense", "edge of seat", "thriller"],
-            "dark": ["dark", "edgy", "grisly", "grim", "horror"],
-        },
-        "comfort_style": {
-            "uplifting": ["uplifting", "feel good", "cheer up", "positive"],
-            "heartwarming": ["heartwarming", "warm", "wholesome"],
-            "calm": ["calm", "soothing", "relaxing", "low stakes", "calming", "gentle"],
-            "none": ["either", "no preference", "anything", "tell me", "idk", "dont know"]
-        },
-        "pace_preference": {
-            "fast": ["fast", "fast paced", "quick", "rapid"],
-            "slow": ["slow", "slow burn", "steady"],
-            "none": ["either", "no preference", "anything", "tell me", "idk", "dont know"]
-        },
-        "violence_tolerance": {
-            "none": ["no violence", "avoid violence"],
-            "mild": ["mild", "some", "a little"],
-            "strong": ["strong", "high", "ok with violence"],
-            "none_opt": ["either", "no preference", "anything", "tell me", "idk", "dont know"]
-        }
-    }
-    opts = synonyms.get(pending_id)
-    if not opts:
-        return None
-    for value, words in opts.items():
-        for w in words:
-            if w in t:
-                return value
-    return None
-
 # --- External movie details (TMDb) ---
-from typing import Any
 
-TMDB_API_KEY = (os.getenv("TMDB_API_KEY") or "").strip()
-TMDB_IMG_BASE = "https://image.tmdb.org/t/p/w500"
-MOVIE_DETAILS_CACHE: Dict[str, Dict[str, Any]] = {}
+# bounded LRU + TTL, negative entries for unmatched titles, SQLite tier shared across workers
+MOVIE_DETAILS_CACHE = details_cache_from_env()
+# concurrent rating checks: pool size, overall latency budget per /chat, and what to do with unrated titles
+RATING_CONCURRENCY = max(1, int(os.getenv("RATING_CONCURRENCY", "8")))
+RATING_BUDGET_MS = float(os.getenv("RATING_BUDGET_MS", "2500"))
+RATING_UNRATED_POLICY = (os.getenv("RATING_UNRATED_POLICY") or "drop").strip().lower()
 
 class MovieDetailsRequest(BaseModel):
     title: str
@@ -883,101 +409,200 @@ class MovieDetailsResponse(BaseModel):
     found: bool
     details: Optional[Dict[str, Any]]
 
+class MovieDetailsBatchRequest(BaseModel):
+    items: List[MovieDetailsRequest]
+
+class MovieDetailsBatchItem(BaseModel):
+    title: str
+    year: Optional[str] = None
+    found: bool
+    details: Optional[Dict[str, Any]]
 
-def _fetch_tmdb_details(title: str, year: Optional[str] = None) -> Optional[Dict[str, Any]]:
+class MovieDetailsBatchResponse(BaseModel):
+    results: List[MovieDetailsBatchItem]
+
+DETAILS_BATCH_MAX = int(os.getenv("DETAILS_BATCH_MAX", "50"))
+
+
+def _snapshot_details(title: str, year: Optional[str] = None):
+    """-> details from the offline TMDb snapshot, None when TMDb had no match, or MISS."""
+    snap = get_snapshot()
+    index = get_movie_index()
+    if snap is None or index is None:
+        return MISS
+    row = index.find(title, year)
+    hit = snap.get(int(index.ids[row])) if row is not None else None
+    if hit is None:
+        return MISS
+    found, details = hit
+    return details if found else None
+
+
+async def _snapshot_details_async(title: str, year: Optional[str] = None):
+    # snapshot reads are SQLite queries; keep them off the event loop
+    if get_snapshot() is None:
+        return MISS
+    return await asyncio.to_thread(_snapshot_details, title, year)
+
+
+def _rating_enforced() -> bool:
+    return bool(TMDB_API_KEY) or get_snapshot() is not None
+
+
+async def _fetch_tmdb_details(title: str, year: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    local = await _snapshot_details_async(title, year)
+    if local is not MISS:
+        return local
+    return await _fetch_live_details(title, year)
+
+
+async def _fetch_live_details(title: str, year: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # details cache, then TMDb; for titles the snapshot does not have
     if not TMDB_API_KEY:
         logger.warning("TMDB_API_KEY not set; skipping external lookup")
         return None
-    cache_key = f"{title}|{year or ''}".strip()
-    if cache_key in MOVIE_DETAILS_CACHE:
-        return MOVIE_DETAILS_CACHE[cache_key]
-
-    def _norm(s: str) -> str:
-        return re.sub(r"[^a-z0-9]+", " ", str(s).lower()).strip()
-
-    def _parse_year(y: Optional[str]) -> Optional[int]:
-        if y is None:
-            return None
-        m = re.search(r"\b(19|20)\d{2}\b", str(y))
-        if m:
-            try:
-                return int(m.group(0))
-            except Exception:
-                pass
-        try:
-            return int(float(str(y)))
-        except Exception:
-            return None
+    cache_key = details_key(title, year)
+    # the memory tier answers on the loop; the shared SQLite tier is read and written in a thread
+    disk = MOVIE_DETAILS_CACHE.disk is not None
+    cached = await asyncio.to_thread(MOVIE_DETAILS_CACHE.get, cache_key) if disk else MOVIE_DETAILS_CACHE.get(cache_key)
+    if cached is not MISS:
+        return cached
 
     try:
-        y = _parse_year(year)
-        params = {
-            "api_key": TMDB_API_KEY,
-            "query": title,
-            "include_adult": "false",
-            "language": "en-US",
-        }
-        if y:
-            params["year"] = y
-        r = requests.get("https://api.themoviedb.org/3/search/movie", params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        results = data.get("results", [])
-        if not results:
-            return None
-        nt = _norm(title)
-        # score candidates by exact/partial title match, year match, and vote_count as tie-breaker
-        scored = []
-        for mres in results:
-            rel_year = (mres.get("release_date") or "")[:4]
-            tf = [mres.get("title") or "", mres.get("original_title") or ""]
-            score = 0.0
-            if any(_norm(t) == nt for t in tf):
-                score += 3.0
-            elif any(nt and (nt in _norm(t)) for t in tf):
-                score += 1.0
-            if y and rel_year == str(y):
-                score += 2.0
-            try:
-                score += (float(mres.get("vote_count", 0)) / 10000.0)
-            except Exception:
-                pass
-            scored.append((score, mres))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        match = scored[0][1] if scored else None
-        if not match:
-            return None
-        movie_id = match.get("id")
-        dresp = requests.get(
-            f"https://api.themoviedb.org/3/movie/{movie_id}",
-            params={"api_key": TMDB_API_KEY, "append_to_response": "credits"},
-            timeout=10,
-        )
-        dresp.raise_for_status()
-        d = dresp.json()
-        details = {
-            "title": d.get("title") or match.get("title"),
-            "year": (d.get("release_date") or match.get("release_date") or "")[:4],
-            "rating": d.get("vote_average"),
-            "genres": [g.get("name") for g in d.get("genres", [])],
-            "cast": [c.get("name") for c in d.get("credits", {}).get("cast", [])[:8]],
-            "overview": d.get("overview"),
-            "poster_url": (TMDB_IMG_BASE + d["poster_path"]) if d.get("poster_path") else None,
-            "tmdb_id": movie_id,
-            "source": "tmdb",
-        }
-        MOVIE_DETAILS_CACHE[cache_key] = details
+        details = await search_details(title, year)
+        if disk:
+            await asyncio.to_thread(MOVIE_DETAILS_CACHE.set, cache_key, details)
+        else:
+            MOVIE_DETAILS_CACHE.set(cache_key, details)
         return details
     except Exception as e:
         logger.error(f"TMDb details fetch failed: {e}")
         return None
 
 
+def _rating_of(details: Optional[Dict[str, Any]]) -> Optional[float]:
+    try:
+        return float(details.get("rating")) if (details and details.get("rating") is not None) else None
+    except Exception:
+        return None
+
+
+async def _rating_filter(cands: List[Dict[str, Any]], k: int, threshold: float, deadline: float,
+                         exclude: Optional[set] = None) -> List[Dict[str, Any]]:
+    """
+    -> the first k candidates (in rank order) whose TMDb rating is >= threshold.
+
+    ratings come from the offline snapshot when it has the movie, otherwise
+    from a live TMDb lookup.
+
+    lookups run concurrently, at most RATING_CONCURRENCY at a time. as soon as
+    the first k passes are settled the remaining lookups are cancelled. titles
+    still unresolved at `deadline` (loop time), or without any rating, are
+    admitted or dropped per RATING_UNRATED_POLICY.
+    """
+    exclude = exclude if exclude is not None else set()
+    pool, titles = [], set()
+    for c in cands:
+        t = c.get("title", "")
+        if t and t not in exclude and t not in titles:
+            titles.add(t)
+            pool.append(c)
+    if not pool or k <= 0:
+        return []
+    if not _rating_enforced():
+        return pool[:k]
+
+    admit_unrated = RATING_UNRATED_POLICY == "admit"
+    sem = asyncio.Semaphore(RATING_CONCURRENCY)
+
+    async def _check(c: Dict[str, Any]) -> Optional[bool]:
+        # snapshot answers locally; only titles missing from it go out to TMDb
+        details = await _snapshot_details_async(c.get("title", ""), c.get("year"))
+        if details is MISS:
+            if not TMDB_API_KEY:
+                return None
+            async with sem:
+                details = await _fetch_live_details(c.get("title", ""), c.get("year"))
+        r = _rating_of(details)
+        return None if r is None else r >= threshold
+
+    tasks = [asyncio.ensure_future(_check(c)) for c in pool]
+    verdict: Dict[int, Optional[bool]] = {}
+    index_of = {t: i for i, t in enumerate(tasks)}
+
+    def _admitted(v: Optional[bool]) -> bool:
+        return admit_unrated if v is None else v
+
+    def _settled_prefix_passes() -> int:
+        # passes among the leading candidates whose verdict is already known
+        n = 0
+        for i in range(len(pool)):
+            if i not in verdict:
+                break
+            n += _admitted(verdict[i])
+        return n
+
+    loop = asyncio.get_running_loop()
+    pending = set(tasks)
+    try:
+        while pending and _settled_prefix_passes() < k:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                try:
+                    verdict[index_of[t]] = t.result()
+                except Exception:
+                    verdict[index_of[t]] = None
+    finally:
+        for t in pending:
+            t.cancel()
+    if pending and loop.time() >= deadline:
+        logger.info(f"Rating filter budget hit with {len(pending)} lookups outstanding (policy={RATING_UNRATED_POLICY})")
+
+    out = []
+    for i, c in enumerate(pool):
+        if _admitted(verdict.get(i)):
+            out.append(c)
+            if len(out) >= k:
+                break
+    return out
+
+
 @app.post("/movie/details", response_model=MovieDetailsResponse)
-def movie_details(req: MovieDetailsRequest) -> MovieDetailsResponse:
+async def movie_details(req: MovieDetailsRequest) -> MovieDetailsResponse:
     if not req.title or not req.title.strip():
         raise HTTPException(status_code=400, detail="Title required")
-    details = _fetch_tmdb_details(req.title.strip(), req.year)
+    details = await _fetch_tmdb_details(req.title.strip(), req.year)
     return MovieDetailsResponse(found=bool(details), details=details)
 
 
+async def _fetch_details_many(items: List[Tuple[str, Optional[str]]]) -> List[Optional[Dict[str, Any]]]:
+    """details for many (title, year) pairs: duplicates resolved once, lookups run concurrently."""
+    keys = [details_key(t, y) for t, y in items]
+    unique = {}
+    for k, item in zip(keys, items):
+        unique.setdefault(k, item)
+    sem = asyncio.Semaphore(RATING_CONCURRENCY)
+
+    async def _one(title: str, year: Optional[str]):
+        async with sem:
+            return await _fetch_tmdb_details(title, year)
+
+    resolved = await asyncio.gather(*(_one(t, y) for t, y in unique.values()))
+    by_key = dict(zip(unique, resolved))
+    return [by_key[k] for k in keys]
+
+
+@app.post("/movie/details/batch", response_model=MovieDetailsBatchResponse)
+async def movie_details_batch(req: MovieDetailsBatchRequest) -> MovieDetailsBatchResponse:
+    if len(req.items) > DETAILS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {DETAILS_BATCH_MAX} items per batch")
+    items = [((it.title or "").strip(), it.year) for it in req.items]
+    if any(not t for t, _ in items):
+        raise HTTPException(status_code=400, detail="Title required")
+    details = await _fetch_details_many(items)
+    return MovieDetailsBatchResponse(results=[
+        MovieDetailsBatchItem(title=t, year=y, found=bool(d), details=d) for (t, y), d in zip(items, details)
+    ])
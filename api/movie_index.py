@@ -0,0 +1,248 @@
+"""
+in-memory columnar movie index over data/movie_kb_final.csv.
+
+the CSV is parsed once into compact arrays:
+- ids    : int32 MovieLens movie ids
+- years  : int16 release years (0 when unknown)
+- masks  : uint32 genre bitmask per movie (bit i = genre_names[i])
+- titles : interned title strings
+
+scoring every movie against a genre weight vector is vectorized: the few
+hundred distinct genre combinations are scored once and gathered back per
+movie, so a full ranking over ~56k movies takes a few milliseconds. this is
+the offline recommender used when SPARQL returns nothing or Fuseki is down.
+"""
+import csv
+import logging
+import re
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+MOVIES_CSV = "data/movie_kb_final.csv"
+
+logger = logging.getLogger("api")
+
+
+def genre_curie(name: str) -> str:
+    return f"emo:{re.sub('[^A-Za-z0-9]', '', name)}"
+
+
+class MovieIndex:
+    def __init__(self, ids: np.ndarray, years: np.ndarray, masks: np.ndarray,
+                 titles: List[str], genre_names: List[str]):
+        if len(genre_names) > 32:
+            raise ValueError("MovieIndex supports at most 32 genres")
+        self.ids = ids
+        self.years = years
+        self.masks = masks
+        self.titles = titles
+        self.genre_names = genre_names
+        self.genre_curies = [genre_curie(g) for g in genre_names]
+        self._bit_of = {c: i for i, c in enumerate(self.genre_curies)}
+        self._row_of_id = {int(mid): i for i, mid in enumerate(ids)}
+        self._rows_of_title: Dict[str, List[int]] = {}
+        for i, t in enumerate(titles):
+            self._rows_of_title.setdefault(t.lower(), []).append(i)
+        # TMDb rating per movie (NaN = unrated), filled from the offline snapshot
+        self.ratings = np.full(len(ids), np.nan, dtype=np.float32)
+        # distinct genre combinations; scores are computed per combination then gathered
+        self._uniq_masks, self._mask_inverse = np.unique(masks, return_inverse=True)
+        bits = np.arange(len(genre_names), dtype=np.uint32)
+        self._uniq_bits = ((self._uniq_masks[:, None] >> bits) & 1).astype(np.float32)
+
+    @classmethod
+    def from_csv(cls, path: str = MOVIES_CSV) -> "MovieIndex":
+        ids, years, masks, titles = [], [], [], []
+        genre_bit: Dict[str, int] = {}
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rdr = csv.reader(f)
+            next(rdr, None)
+            for row in rdr:
+                if len(row) < 4 or not row[1]:
+                    continue
+                try:
+                    mid = int(row[0])
+                except ValueError:
+                    continue
+                try:
+                    year = int(float(row[2])) if row[2] else 0
+                except ValueError:
+                    year = 0
+                mask = 0
+                for g in row[3].split("|"):
+                    g = g.strip()
+                    if g:
+                        mask |= 1 << genre_bit.setdefault(g, len(genre_bit))
+                ids.append(mid)
+                years.append(year)
+                masks.append(mask)
+                titles.append(sys.intern(row[1]))
+        genre_names = sorted(genre_bit, key=genre_bit.get)
+        return cls(
+            np.asarray(ids, dtype=np.int32),
+            np.asarray(years, dtype=np.int16),
+            np.asarray(masks, dtype=np.uint32),
+            titles,
+            genre_names,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def weight_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        """{curie: weight} -> dense float32 vector in bit order; unknown genres weigh 0."""
+        vec = np.zeros(len(self.genre_curies), dtype=np.float32)
+        for curie, w in weights.items():
+            i = self._bit_of.get(curie)
+            if i is not None:
+                vec[i] = w
+        return vec
+
+    def genre_mask(self, names_or_curies: Iterable[str]) -> int:
+        mask = 0
+        for g in names_or_curies:
+            i = self._bit_of.get(g if g.startswith("emo:") else genre_curie(g))
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def score(self, weights) -> np.ndarray:
+        """sum of genre weights per movie, for every movie."""
+        vec = weights if isinstance(weights, np.ndarray) else self.weight_vector(weights)
+        return (self._uniq_bits @ vec)[self._mask_inverse]
+
+    def era_filter(self, era: Optional[str]) -> Optional[np.ndarray]:
+        if era == "classic":
+            return (self.years > 0) & (self.years < 1990)
+        if era == "modern":
+            return self.years >= 1990
+        return None
+
+    def genres_of(self, row: int) -> List[str]:
+        m = int(self.masks[row])
+        return [g for i, g in enumerate(self.genre_names) if m >> i & 1]
+
+    def row_of(self, movie_id: int) -> Optional[int]:
+        return self._row_of_id.get(int(movie_id))
+
+    def find(self, title: str, year=None) -> Optional[int]:
+        """row for a title (+year when several movies share it), or None."""
+        rows = self._rows_of_title.get(str(title).strip().lower())
+        if not rows:
+            return None
+        try:
+            y = int(float(year)) if year not in (None, "") else None
+        except (TypeError, ValueError):
+            y = None
+        if y is not None:
+            for r in rows:
+                if int(self.years[r]) == y:
+                    return r
+        return rows[0]
+
+    def attach_ratings(self, ratings: Dict[int, float]) -> int:
+        """load {movie_id: rating}; returns how many movies got a rating."""
+        self.ratings.fill(np.nan)
+        n = 0
+        for mid, r in ratings.items():
+            row = self._row_of_id.get(int(mid))
+            if row is not None:
+                self.ratings[row] = r
+                n += 1
+        return n
+
+    def candidate(self, row: int, vec: np.ndarray, score: float) -> dict:
+        genres = self.genres_of(row)
+        best = max(genres, key=lambda g: vec[self._bit_of[genre_curie(g)]], default="")
+        year = int(self.years[row])
+        return {
+            "movie_id": str(int(self.ids[row])),
+            "title": self.titles[row],
+            "year": str(year) if year else "",
+            "genre": best,
+            "score": round(float(score), 4),
+            "genres_full": genres,
+        }
+
+    def top_candidates(self, weights, era: Optional[str] = None, limit: int = 200,
+                       exclude_titles: Iterable[str] = (), blocked_genres: Iterable[str] = (),
+                       min_score: Optional[float] = None, min_rating: Optional[float] = None,
+                       admit_unrated: bool = False) -> List[dict]:
+        """
+        rank all movies by genre weight and return the best `limit` as candidate dicts
+        (same shape the SPARQL path produces), after era / blocked-genre / rating / exclusion filters.
+        """
+        vec = weights if isinstance(weights, np.ndarray) else self.weight_vector(weights)
+        scores = self.score(vec)
+        keep = np.ones(len(scores), dtype=bool)
+        era_keep = self.era_filter(era)
+        if era_keep is not None:
+            keep &= era_keep
+        blocked = self.genre_mask(blocked_genres)
+        if blocked:
+            keep &= (self.masks & np.uint32(blocked)) == 0
+        if min_score is not None:
+            keep &= scores > min_score
+        if min_rating is not None:
+            # NaN compares False, so unrated movies only survive when admitted explicitly
+            rated_ok = self.ratings >= min_rating
+            keep &= (rated_ok | np.isnan(self.ratings)) if admit_unrated else rated_ok
+        excluded = set(exclude_titles)
+
+        rows = np.flatnonzero(keep)
+        if len(rows) == 0:
+            return []
+        # oversample so title exclusions can't starve the result
+        take = min(len(rows), limit + len(excluded))
+        part = rows[np.argpartition(-scores[rows], take - 1)[:take]] if take < len(rows) else rows
+        part = part[np.lexsort((part, -scores[part]))]
+        out = []
+        for r in part:
+            if self.titles[r] in excluded:
+                continue
+            out.append(self.candidate(int(r), vec, scores[r]))
+            if len(out) >= limit:
+                break
+        return out
+
+
+_INDEX: Optional[MovieIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_movie_index(path: str = MOVIES_CSV) -> Optional[MovieIndex]:
+    """load once per process; None when the CSV is unavailable."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                try:
+                    _INDEX = MovieIndex.from_csv(path)
+                    logger.info(f"Movie index loaded: {len(_INDEX)} movies, {len(_INDEX.genre_names)} genres")
+                except Exception as e:
+                    logger.error(f"Movie index load failed: {e}")
+                    return None
+    return _INDEX
+
+
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    idx = get_movie_index()
+    t1 = time.perf_counter()
+    w = {c: 1.0 for c in idx.genre_curies}
+    for c in ["emo:Comedy", "emo:Family", "emo:Romance"]:
+        w[c] += 0.8
+    n = 200
+    t2 = time.perf_counter()
+    for _ in range(n):
+        top = idx.top_candidates(w, era="modern", limit=100, blocked_genres=["Horror", "War", "Crime"])
+    t3 = time.perf_counter()
+    print(f"load: {1000 * (t1 - t0):.1f} ms for {len(idx)} movies ({len(idx._uniq_masks)} genre combos)")
+    print(f"rank + filter: {1000 * (t3 - t2) / n:.2f} ms/query")
+    for c in top[:5]:
+        print(c)
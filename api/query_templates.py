@@ -0,0 +1,264 @@
+"""
+prepared SPARQL query templates.
+
+a template is parsed once at import: its text is normalized and split into
+fixed segments and typed $placeholders, so binding a request only renders the
+parameters and joins. every parameter renders canonically (genres sorted,
+weights fixed-point, titles sorted and deduped), so one logical query always
+yields the same string; the result is exactly what normalize_query() would
+produce, and carries its cache key and template name for the SPARQL result
+cache.
+
+genre terms are validated (prefixed name with a known prefix, or a plain
+<IRI>), and so are excluded movie IRIs, instead of being spliced in verbatim. the rendered text is plain
+SPARQL 1.1 that Fuseki and the embedded store (api.local_store) both run
+unchanged.
+"""
+import hashlib
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ONTO_BASE = "http://www.semanticweb.org/ibrah/ontologies/2025/11/emotion-ontology#"
+
+PREFIXES = {
+    "emo": ONTO_BASE,
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+
+# era name -> [from, to) release years, None = open
+ERA_BOUNDS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "classic": (None, 1990),
+    "modern": (1990, None),
+}
+
+_PLACEHOLDER_RE = re.compile(r"\$([a-z_]+)")
+_CURIE_RE = re.compile(r"^([A-Za-z][\w-]*):([A-Za-z_](?:[\w.-]*[\w-])?)$")
+_IRI_RE = re.compile(r'^<[^<>"{}|^`\\\s]*>$')
+# string literals are kept verbatim, every other whitespace run becomes one space
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|<[^>\s]*>|\s+')
+
+
+def era_bounds(era: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    return ERA_BOUNDS.get(era or "", (None, None))
+
+
+def term(g: str) -> str:
+    """validated genre term: emo:Comedy or <http://...>; anything else raises ValueError."""
+    g = str(g).strip()
+    m = _CURIE_RE.match(g)
+    if m:
+        if m.group(1) not in PREFIXES:
+            raise ValueError(f"unknown prefix in genre term {g!r}")
+        return g
+    if _IRI_RE.match(g):
+        return g
+    raise ValueError(f"invalid genre term {g!r}")
+
+
+def iri(s: str) -> str:
+    """<s> for a full IRI as the store returns it; anything that is not a valid IRI raises ValueError."""
+    out = f"<{str(s).strip()}>"
+    if not _IRI_RE.match(out):
+        raise ValueError(f"invalid IRI {s!r}")
+    return out
+
+
+def literal(s: str) -> str:
+    return '"' + str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r") + '"'
+
+
+def _non_negative_int(v: Any) -> int:
+    n = int(v)
+    if n < 0 or n != v:
+        raise ValueError(f"expected a non-negative integer, got {v!r}")
+    return n
+
+
+# parameter renderers: typed value -> canonical SPARQL fragment ("" leaves the clause out)
+
+def weighted_genres(weights: Dict[str, float]) -> str:
+    """{"emo:Genre": weight} -> VALUES rows; genres with weight <= 0 are left out."""
+    rows = sorted((term(g), float(w)) for g, w in weights.items() if w > 0)
+    if not rows:
+        raise ValueError("query needs at least one positive genre weight")
+    # fixed-point literals are xsd:decimal, so SUM(?w) stays exact
+    return " ".join(f"({g} {w:.4f})" for g, w in rows)
+
+
+def year_filter(var: str) -> Callable[[Tuple[Optional[int], Optional[int]]], str]:
+    def render(bounds: Tuple[Optional[int], Optional[int]]) -> str:
+        lo, hi = bounds
+        # years may be typed xsd:gYear, which does not cast to integer directly
+        year = f"xsd:integer(SUBSTR(STR({var}), 1, 4))"
+        conds = ([f"{year} >= {int(lo)}"] if lo is not None else []) + ([f"{year} < {int(hi)}"] if hi is not None else [])
+        return f"FILTER({' && '.join(conds)})" if conds else ""
+    return render
+
+
+def excluded(var: str) -> Callable[[Iterable[str]], str]:
+    def render(titles: Iterable[str]) -> str:
+        titles = sorted(set(t for t in titles if t))
+        return f"FILTER({var} NOT IN ({', '.join(literal(t) for t in titles)}))" if titles else ""
+    return render
+
+
+def excluded_iris(var: str) -> Callable[[Iterable[str]], str]:
+    def render(iris: Iterable[str]) -> str:
+        terms = sorted(set(iri(i) for i in iris if i))
+        return f"FILTER({var} NOT IN ({', '.join(terms)}))" if terms else ""
+    return render
+
+
+def without_genres(var: str) -> Callable[[Iterable[str]], str]:
+    """movies in `var` belonging to any of the genres are filtered out."""
+    def render(genres: Iterable[str]) -> str:
+        terms = sorted(set(term(g) for g in genres))
+        if not terms:
+            return ""
+        return f"FILTER NOT EXISTS {{ VALUES ?blocked {{ {' '.join(terms)} }} {var} emo:belongsToGenre ?blocked }}"
+    return render
+
+
+def limit(n: int) -> str:
+    return f"LIMIT {_non_negative_int(n)}"
+
+
+def offset(n: int) -> str:
+    n = _non_negative_int(n)
+    return f"OFFSET {n}" if n else ""
+
+
+class PreparedQuery(str):
+    """rendered query text; also carries the template name and the result-cache key."""
+
+    template: str
+    cache_key: str
+
+    def __new__(cls, text: str, template: str):
+        q = super().__new__(cls, text)
+        q.template = template
+        q.cache_key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return q
+
+
+def _normalize(text: str) -> str:
+    return _TOKEN_RE.sub(lambda m: " " if m.group(0).isspace() else m.group(0), text).strip()
+
+
+class QueryTemplate:
+    """
+    name   : shown in the result-cache stats instead of a hash
+    text   : query body without PREFIX lines, with $name placeholders
+    params : {name: renderer}, each turning a typed value into a fragment
+    """
+
+    def __init__(self, name: str, text: str, params: Dict[str, Callable[[Any], str]]):
+        self.name = name
+        self.params = dict(params)
+        body = _normalize(text)
+        found = _PLACEHOLDER_RE.findall(body)
+        if sorted(found) != sorted(self.params):
+            raise ValueError(f"template {name}: placeholders {found} do not match params {sorted(self.params)}")
+        # every known prefix is declared: parameter fragments (year filters) use xsd: too
+        header = " ".join(f"PREFIX {p}: <{iri}>" for p, iri in sorted(PREFIXES.items()))
+        # alternating fixed text / parameter name, stripped so empty fragments leave no double spaces
+        parts = _PLACEHOLDER_RE.split(body)
+        self._segments: List[str] = [s.strip() for s in parts[0::2]]
+        self._slots: List[str] = parts[1::2]
+        self._segments[0] = f"{header} {self._segments[0]}".strip()
+
+    def bind(self, **values) -> PreparedQuery:
+        missing = set(self.params) - set(values)
+        extra = set(values) - set(self.params)
+        if missing or extra:
+            raise TypeError(f"template {self.name}: missing {sorted(missing)}, unexpected {sorted(extra)}")
+        rendered = {k: render(values[k]) for k, render in self.params.items()}
+        out = [self._segments[0]]
+        for slot, seg in zip(self._slots, self._segments[1:]):
+            out.append(rendered[slot])
+            out.append(seg)
+        return PreparedQuery(" ".join(p for p in out if p), self.name)
+
+
+RANKED_MOVIES = QueryTemplate(
+    "ranked_movies",
+    """
+SELECT ?m ?title (SAMPLE(?y) AS ?year) (SUM(?w) AS ?score)
+       (GROUP_CONCAT(DISTINCT COALESCE(?label, STRAFTER(STR(?genre), "#")); separator="|") AS ?genres)
+WHERE {
+  VALUES (?genre ?w) { $genres }
+  ?m a emo:Movie ; emo:belongsToGenre ?genre ; emo:hasTitle ?title ; emo:hasYear ?y .
+  OPTIONAL { ?genre rdfs:label ?label }
+  $years
+  $exclude
+  $rejected
+  $blocked
+}
+GROUP BY ?m ?title
+ORDER BY DESC(?score) ?title ?m
+$limit $offset""",
+    {
+        "genres": weighted_genres,
+        "years": year_filter("?y"),
+        "exclude": excluded("?title"),
+        "rejected": excluded_iris("?m"),
+        "blocked": without_genres("?m"),
+        "limit": limit,
+        "offset": offset,
+    },
+)
+
+
+if __name__ == "__main__":
+    # build cost per query: f-string assembly + normalize/hash at cache lookup vs binding the prepared template
+    import random
+    import time
+
+    from api.sparql_client import normalize_query
+
+    genres = ["emo:Action", "emo:Adventure", "emo:Animation", "emo:Comedy", "emo:Crime", "emo:Drama", "emo:Family",
+              "emo:Fantasy", "emo:Horror", "emo:Mystery", "emo:Romance", "emo:SciFi", "emo:Thriller", "emo:War"]
+    rng = random.Random(0)
+    requests = []
+    for _ in range(2000):
+        weights = {g: rng.choice([0.0, 1.0, 1.5, 1.8]) for g in genres}
+        weights["emo:Drama"] = 1.0
+        seen = [f"Movie {rng.randrange(5000)}" for _ in range(rng.choice([0, 10, 40]))]
+        requests.append((weights, rng.choice([None, "classic", "modern"]), seen))
+
+    def fstring(weights, era, seen):
+        rows = " ".join(f"({g} {w:.4f})" for g, w in sorted(weights.items()) if w > 0)
+        year = {"classic": "FILTER(xsd:integer(SUBSTR(STR(?y), 1, 4)) < 1990)",
+                "modern": "FILTER(xsd:integer(SUBSTR(STR(?y), 1, 4)) >= 1990)"}.get(era or "", "")
+        titles = sorted(set(seen))
+        not_in = f"FILTER(?title NOT IN ({', '.join(literal(t) for t in titles)}))" if titles else ""
+        q = f"""PREFIX emo: <{ONTO_BASE}>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+SELECT ?m ?title (SAMPLE(?y) AS ?year) (SUM(?w) AS ?score)
+       (GROUP_CONCAT(DISTINCT COALESCE(?label, STRAFTER(STR(?genre), "#")); separator="|") AS ?genres)
+WHERE {{
+  VALUES (?genre ?w) {{ {rows} }}
+  ?m a emo:Movie ; emo:belongsToGenre ?genre ; emo:hasTitle ?title ; emo:hasYear ?y .
+  OPTIONAL {{ ?genre rdfs:label ?label }}
+  {year}
+  {not_in}
+}}
+GROUP BY ?m ?title
+ORDER BY DESC(?score) ?title ?m
+LIMIT 50"""
+        return hashlib.sha1(normalize_query(q).encode("utf-8")).hexdigest()
+
+    def prepared(weights, era, seen):
+        return RANKED_MOVIES.bind(genres=weights, years=era_bounds(era), exclude=seen, rejected=(), blocked=(),
+                                  limit=50, offset=0).cache_key
+
+    for name, fn in [("f-string + normalize", fstring), ("prepared template", prepared)]:
+        t0 = time.perf_counter()
+        keys = [fn(*r) for r in requests]
+        print(f"{name:22}: {1e6 * (time.perf_counter() - t0) / len(requests):7.1f} us/query")
+    q = RANKED_MOVIES.bind(genres=requests[0][0], years=era_bounds("modern"), exclude=["A \"quoted\" title"],
+                           rejected=[f"{ONTO_BASE}movie_1"], blocked=["emo:Horror"], limit=50, offset=100)
+    assert normalize_query(q) == q, "template output is not canonical"
+    print(q)
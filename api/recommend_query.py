@@ -0,0 +1,270 @@
+"""
+ranked recommendation query for the movie KG.
+
+genre weights are passed to Fuseki as VALUES (?genre ?w) rows, so scoring
+(SUM of matching genre weights per movie) and ranking (ORDER BY DESC) happen
+in the store and one round trip returns an oversampled, already-ranked
+candidate pool instead of LIMIT top_k arbitrary (movie, genre) rows.
+
+RecommendationPlanner drives that query for one /chat: seen titles, rejected
+movies (by IRI, so a remake sharing a title stays in) and movies in blocked
+genres are excluded in the store (FILTER NOT IN / NOT EXISTS), unused
+candidates from a page are served before another page is fetched, and
+OFFSET paging only happens when a page runs dry.
+"""
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from api.query_templates import PREFIXES, RANKED_MOVIES, PreparedQuery, era_bounds
+
+# candidates fetched per requested movie; leaves room for seen/blocked/rating filters
+OVERSAMPLE = max(1, int(os.getenv("SPARQL_OVERSAMPLE", "10")))
+
+_PREFIXES = "\n".join(f"PREFIX {p}: <{iri}>" for p, iri in PREFIXES.items())
+
+
+def pool_size(top_k: int, seen: int = 0) -> int:
+    return max(1, top_k) * OVERSAMPLE + seen
+
+
+def ranked_movies_query(weights: Dict[str, float], era: Optional[str] = None, limit: int = 50,
+                        exclude_titles: Iterable[str] = (), offset: int = 0,
+                        blocked_genres: Iterable[str] = (), exclude_movies: Iterable[str] = ()) -> PreparedQuery:
+    """
+    weights        : {"emo:Genre": weight}; genres with weight <= 0 are left out.
+    exclude_titles : titles filtered out in the store (seen).
+    blocked_genres : movies in any of these genres are filtered out in the store.
+    exclude_movies : movie IRIs filtered out in the store (already rejected).
+    -> SELECT ?m ?title ?year ?score ?genres ordered by score, best first.
+    """
+    return RANKED_MOVIES.bind(genres=weights, years=era_bounds(era), exclude=exclude_titles,
+                              rejected=exclude_movies, blocked=blocked_genres, limit=limit, offset=offset)
+
+
+def ranked_candidates(result: dict, weights: Dict[str, float], labels: Dict[str, str]) -> List[dict]:
+    """
+    SELECT result of ranked_movies_query -> candidate dicts (title, year, genre, score, genres_full),
+    the same shape the rest of /chat and the movie index use, plus the movie's iri. `labels`
+    maps curie -> label and picks the display genre with the highest weight.
+    """
+    weight_of_label = {labels.get(c, c.split(":", 1)[-1]): w for c, w in weights.items()}
+    out = []
+    for b in result.get("results", {}).get("bindings", []):
+        title = b.get("title", {}).get("value", "")
+        if not title:
+            continue
+        genres = [g for g in b.get("genres", {}).get("value", "").split("|") if g]
+        try:
+            score = float(b.get("score", {}).get("value", 0.0))
+        except ValueError:
+            score = 0.0
+        m = b.get("m", {})
+        out.append({
+            "iri": m.get("value", "") if m.get("type") == "uri" else "",
+            "title": title,
+            "year": b.get("year", {}).get("value", ""),
+            "genre": max(genres, key=lambda g: weight_of_label.get(g, 0.0), default=""),
+            "score": round(score, 4),
+            "genres_full": genres,
+        })
+    return out
+
+
+
+def _movie_key(m: dict) -> tuple:
+    return m.get("title", ""), str(m.get("year", ""))
+
+
+class PlannerStats:
+    """SPARQL queries issued per /chat, aggregated across requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.queries = 0
+        self.pages = 0
+        self.fallbacks = 0
+        self.histogram: Dict[int, int] = {}
+
+    def record(self, queries: int, pages: int, fallback: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.queries += queries
+            self.pages += pages
+            self.fallbacks += int(fallback)
+            self.histogram[queries] = self.histogram.get(queries, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "queries": self.queries,
+                "avg_queries_per_request": round(self.queries / self.requests, 3) if self.requests else 0.0,
+                "pages_after_first": self.pages,
+                "index_fallbacks": self.fallbacks,
+                "queries_per_request_histogram": {str(k): v for k, v in sorted(self.histogram.items())},
+            }
+
+
+PLANNER_STATS = PlannerStats()
+
+
+class RecommendationPlanner:
+    """
+    candidate source for one /chat request.
+
+    candidates() hands out the unused part of the current page and only
+    queries when it is empty. seen titles, and the movies behind offered
+    candidates rejected by later filters, are excluded in the store; rejected
+    movies all come from earlier pages, so the next page starts at
+    OFFSET = rows fetched - rows of rejected movies.
+    """
+
+    def __init__(self, select: Callable[[str], Awaitable[dict]], weights: Dict[str, float],
+                 labels: Dict[str, str], era: Optional[str] = None, top_k: int = 5,
+                 seen: Iterable[str] = (), page_size: Optional[int] = None, max_pages: int = 3,
+                 blocked: Iterable[str] = ()):
+        self.select = select
+        self.weights = weights
+        self.blocked = tuple(blocked)
+        self.labels = labels
+        self.era = era
+        self.page_size = page_size or pool_size(top_k)
+        self.max_pages = max_pages
+        self.seen = set(seen)
+        # movie IRIs: one per fetched row, and those rejected after being offered
+        self.rejected = set()
+        self.fetched: List[str] = []
+        self.pending: List[dict] = []
+        self._offered: Dict[tuple, set] = {}
+        self.queries = 0
+        self.exhausted = False
+        self.fallback = False
+
+    async def _fetch(self) -> List[dict]:
+        offset = sum(1 for m in self.fetched if m not in self.rejected)
+        q = ranked_movies_query(self.weights, era=self.era, limit=self.page_size,
+                                exclude_titles=self.seen, offset=offset,
+                                blocked_genres=self.blocked, exclude_movies=self.rejected)
+        result = await self.select(q)
+        # counted once answered: breaker rejections and failed calls never reached the store
+        self.queries += 1
+        cands = ranked_candidates(result, self.weights, self.labels)
+        if len(cands) < self.page_size or self.queries >= self.max_pages:
+            self.exhausted = True
+        self.fetched.extend(c["iri"] for c in cands)
+        return cands
+
+    async def candidates(self) -> List[dict]:
+        """-> candidates not yet offered; fetches the next page only when none are left."""
+        if not self.pending and not self.exhausted:
+            self.pending = await self._fetch()
+            if not self.pending and not self.fetched and self.seen:
+                # everything matching was seen already: allow repeats rather than nothing
+                self.seen = set()
+                self.exhausted = False
+                self.pending = await self._fetch()
+        return list(self.pending)
+
+    def offered(self, movies: Iterable[dict]) -> None:
+        """movies (title/year dicts) taken from candidates(); they are not handed out again."""
+        taken = {_movie_key(m) for m in movies}
+        for c in self.pending:
+            if _movie_key(c) in taken and c["iri"]:
+                self._offered.setdefault(_movie_key(c), set()).add(c["iri"])
+        self.pending = [c for c in self.pending if _movie_key(c) not in taken]
+
+    def reject(self, movies: Iterable[dict]) -> None:
+        """offered movies a later filter dropped; anything not offered from the store is ignored."""
+        for m in movies:
+            self.rejected.update(self._offered.get(_movie_key(m), ()))
+
+    def finish(self) -> None:
+        PLANNER_STATS.record(self.queries, max(0, self.queries - 1), self.fallback)
+
+
+if __name__ == "__main__":
+    # queries per /chat over a 10-turn session: legacy LIMIT top_k cascade vs the planner.
+    # runs against Fuseki when --endpoint is given, else the embedded store over kg/movies_1000.ttl
+    import argparse
+    import asyncio
+    import time
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--endpoint", default=None, help="SPARQL select endpoint (default: the embedded store)")
+    ap.add_argument("--engine", default="oxigraph", help="embedded store engine: oxigraph | rdflib")
+    ap.add_argument("--turns", type=int, default=10)
+    ap.add_argument("--top-k", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.endpoint:
+        from api.sparql_client import SparqlClient
+
+        client = SparqlClient(select_endpoint=args.endpoint)
+        select = client.select
+    else:
+        from api.local_store import load_local_store
+
+        # same in-process store SPARQL_BACKEND=local serves, with the emo:hasTitle / emo:hasYear aliases
+        select = load_local_store(args.engine).select
+
+    weights = {c: 1.0 for c in ["emo:Action", "emo:Adventure", "emo:Animation", "emo:Comedy", "emo:Drama",
+                                "emo:Family", "emo:Fantasy", "emo:Romance", "emo:Thriller", "emo:Mystery"]}
+    for c in ["emo:Comedy", "emo:Family", "emo:Romance"]:
+        weights[c] += 0.8
+    labels = {c: c.split(":", 1)[1] for c in weights}
+    k = args.top_k
+    values = " ".join(f"({g})" for g in sorted(weights, key=weights.get, reverse=True))
+    legacy_queries = [
+        f"""{_PREFIXES}
+SELECT ?title ?year ?genre WHERE {{ VALUES (?genre) {{ {values} }}
+  ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year ; emo:belongsToGenre ?genre . }} LIMIT {k}""",
+        f"{_PREFIXES}\nSELECT ?title ?year WHERE {{ ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year . }} LIMIT {k}",
+        f"{_PREFIXES}\nSELECT ?title ?year WHERE {{ ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year . }} LIMIT {k}",
+    ] + [
+        f"""{_PREFIXES}
+SELECT ?title ?year ?genre WHERE {{ VALUES (?genre) {{ {values} }}
+  ?m a emo:Movie ; emo:hasTitle ?title ; emo:hasYear ?year ; emo:belongsToGenre ?genre . }} LIMIT 60"""
+    ] * 5
+
+    def session(turn_fn):
+        seen, queries, elapsed, fresh = set(), 0, 0.0, 0
+        for _ in range(args.turns):
+            t0 = time.perf_counter()
+            picked, n = turn_fn(seen)
+            elapsed += time.perf_counter() - t0
+            queries += n
+            fresh += len(picked)
+            seen.update(picked)
+        return queries / args.turns, 1000 * elapsed / args.turns, fresh / args.turns
+
+    def legacy_turn(seen):
+        picked, n = [], 0
+        for q in legacy_queries:
+            n += 1
+            for b in select(q)["results"]["bindings"]:
+                t = b["title"]["value"]
+                if t not in seen and t not in picked:
+                    picked.append(t)
+            if len(picked) >= k:
+                break
+        return picked[:k], n
+
+    def planned_turn(seen):
+        async def _select(q):
+            return select(q)
+
+        async def _run():
+            planner = RecommendationPlanner(_select, weights, labels, top_k=k, seen=seen)
+            picked = [c["title"] for c in (await planner.candidates())[:k]]
+            planner.finish()
+            return picked, planner.queries
+
+        return asyncio.run(_run())
+
+    for name, fn in [("legacy cascade", legacy_turn), ("planned query", planned_turn)]:
+        q, ms, fresh = session(fn)
+        print(f"{name:15}: {q:5.2f} queries/chat, {ms:8.1f} ms/chat, {fresh:.1f} unseen movies/chat")
+    print(f"({args.endpoint or args.engine}) the planned query ranks every matching movie by score, the legacy ones "
+          f"return the first {k} rows unranked; in-process timings carry no network round trip per query")
@@ -1,23 +1,633 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+from api.circuit_breaker import CLOSED, CircuitBreaker
+from ttl_cache import TTLCache
+
+# endpoints come from the environment; defaults match the docker-compose Fuseki dataset
+FUSEKI_URL = (os.getenv("FUSEKI_URL") or "http://localhost:3030").rstrip("/")
+FUSEKI_DATASET = os.getenv("FUSEKI_DATASET") or "emotion"
+JENA_SELECT_ENDPOINT = os.getenv("SPARQL_SELECT_ENDPOINT") or f"{FUSEKI_URL}/{FUSEKI_DATASET}/sparql"
+JENA_UPDATE_ENDPOINT = os.getenv("SPARQL_UPDATE_ENDPOINT") or f"{FUSEKI_URL}/{FUSEKI_DATASET}/update"
+
+logger = logging.getLogger("api")
+
+
+class QueryStats:
+    """thread-safe counters + recent latency window shared by the sync and async clients."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._counts = {"queries": 0, "updates": 0, "errors": 0, "retries": 0, "bytes_sent": 0, "bytes_received": 0}
+
+    def record(self, kind: str, elapsed: float, sent: int, received: int, error: bool = False) -> None:
+        with self._lock:
+            self._counts[kind] += 1
+            self._counts["bytes_sent"] += sent
+            self._counts["bytes_received"] += received
+            if error:
+                self._counts["errors"] += 1
+            self._latencies.append(elapsed)
+
+    def retry(self) -> None:
+        with self._lock:
+            self._counts["retries"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            out = dict(self._counts)
+        pct = lambda q: round(1000 * lat[min(len(lat) - 1, int(q * len(lat)))], 2) if lat else 0.0
+        out.update({
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_max": round(1000 * lat[-1], 2) if lat else 0.0,
+        })
+        return out
+
+
+def _sent_bytes(data) -> int:
+    return len(data) if isinstance(data, bytes) else len(data.get("query", ""))
+
+
+class SparqlClient:
+    """
+    pooled keep-alive client for a SPARQL endpoint.
+
+    one requests.Session is shared by all threads, so queries reuse TCP
+    connections instead of opening one per call. transient failures are
+    retried with exponential backoff; every query's latency and byte counts
+    are recorded for stats().
+    """
+
+    def __init__(self, select_endpoint: str = JENA_SELECT_ENDPOINT, update_endpoint: str = JENA_UPDATE_ENDPOINT,
+                 pool_size: int = 16, retries: int = 2, backoff: float = 0.2,
+                 connect_timeout: float = 3.0, timeout: float = 30.0):
+        self.select_endpoint = select_endpoint
+        self.update_endpoint = update_endpoint
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = QueryStats()
+
+    def select(self, query: str, timeout: float = None) -> dict:
+        r = self._post(
+            "queries",
+            self.select_endpoint,
+            data={"query": query},
+            headers={"Accept": "application/sparql-results+json"},
+            timeout=timeout,
+            idempotent=True,
+        )
+        return r.json()
+
+    def update(self, update_query: str, timeout: float = None) -> None:
+        self._post(
+            "updates",
+            self.update_endpoint,
+            data=update_query.encode("utf-8"),
+            headers={"Content-Type": "application/sparql-update"},
+            timeout=timeout,
+            idempotent=False,
+        )
+
+    def _post(self, kind: str, url: str, data, headers: dict, timeout, idempotent: bool) -> requests.Response:
+        read_timeout = timeout if timeout is not None else self.timeout
+        sent = _sent_bytes(data)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                r = self.session.post(url, data=data, headers=headers, timeout=(self.connect_timeout, read_timeout))
+                if r.status_code >= 500 and idempotent and attempt < self.retries:
+                    raise requests.HTTPError(f"{r.status_code} from {url}", response=r)
+                r.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                # an update is only retried when it never reached the server
+                retryable = (
+                    attempt < self.retries
+                    and (idempotent or isinstance(e, requests.ConnectionError))
+                    and (status is None or status >= 500)
+                )
+                if not retryable:
+                    self.metrics.record(kind, time.perf_counter() - start, sent, 0, error=True)
+                    raise
+                attempt += 1
+                self.metrics.retry()
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+            elapsed = time.perf_counter() - start
+            received = len(r.content)
+            self.metrics.record(kind, elapsed, sent, received)
+            logger.debug(f"SPARQL {kind[:-1]} {1000 * elapsed:.1f} ms, {sent} B sent, {received} B received")
+            return r
+
+    def stats(self) -> dict:
+        out = self.metrics.snapshot()
+        out["select_endpoint"] = self.select_endpoint
+        return out
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENT = SparqlClient(
+    pool_size=int(os.getenv("SPARQL_POOL_SIZE", "16")),
+    retries=int(os.getenv("SPARQL_RETRIES", "1")),
+    backoff=float(os.getenv("SPARQL_RETRY_BACKOFF", "0.1")),
+)
+
+
+class AsyncSparqlClient:
+    """
+    asyncio variant of SparqlClient on a pooled httpx.AsyncClient.
+
+    awaiting a query releases the event loop, so one worker can keep many
+    conversations waiting on Fuseki without holding a thread for each.
+    """
+
+    def __init__(self, select_endpoint: str = JENA_SELECT_ENDPOINT, update_endpoint: str = JENA_UPDATE_ENDPOINT,
+                 pool_size: int = 64, retries: int = 1, backoff: float = 0.1,
+                 connect_timeout: float = 3.0, timeout: float = 30.0):
+        self.select_endpoint = select_endpoint
+        self.update_endpoint = update_endpoint
+        self.pool_size = pool_size
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.metrics = QueryStats()
+        self._client = None
+        self._loop = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # created lazily inside the running loop; re-created after aclose() or on a new loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            )
+            self._loop = loop
+        return self._client
+
+    async def select(self, query: str, timeout: float = None) -> dict:
+        r = await self._post(
+            "queries",
+            self.select_endpoint,
+            data={"query": query},
+            headers={"Accept": "application/sparql-results+json"},
+            timeout=timeout,
+            idempotent=True,
+        )
+        return r.json()
+
+    async def update(self, update_query: str, timeout: float = None) -> None:
+        await self._post(
+            "updates",
+            self.update_endpoint,
+            data=update_query.encode("utf-8"),
+            headers={"Content-Type": "application/sparql-update"},
+            timeout=timeout,
+            idempotent=False,
+        )
+
+    async def _post(self, kind: str, url: str, data, headers: dict, timeout, idempotent: bool) -> httpx.Response:
+        read_timeout = timeout if timeout is not None else self.timeout
+        sent = _sent_bytes(data)
+        body = {"content": data} if isinstance(data, bytes) else {"data": data}
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                r = await self._http().post(
+                    url, headers=headers, timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout), **body
+                )
+                r.raise_for_status()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                retryable = (
+                    attempt < self.retries
+                    and (idempotent or isinstance(e, httpx.ConnectError))
+                    and (status is None or status >= 500)
+                )
+                if not retryable:
+                    self.metrics.record(kind, time.perf_counter() - start, sent, 0, error=True)
+                    raise
+                attempt += 1
+                self.metrics.retry()
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+            elapsed = time.perf_counter() - start
+            received = len(r.content)
+            self.metrics.record(kind, elapsed, sent, received)
+            logger.debug(f"SPARQL {kind[:-1]} {1000 * elapsed:.1f} ms, {sent} B sent, {received} B received")
+            return r
+
+    def stats(self) -> dict:
+        out = self.metrics.snapshot()
+        out["select_endpoint"] = self.select_endpoint
+        return out
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalSparqlClient:
+    """
+    same interface as SparqlClient, answered by the embedded store in api.local_store.
+    the store is loaded on first use (or by warm()).
+    """
+
+    def __init__(self, engine: str = None, paths: list = None):
+        self.engine = engine
+        self.paths = paths
+        self.metrics = QueryStats()
+        self._store = None
+        self._lock = threading.Lock()
+
+    def warm(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    from api.local_store import load_local_store
+
+                    self._store = load_local_store(self.engine, self.paths)
+        return self._store
+
+    def select(self, query: str, timeout: float = None) -> dict:
+        return self._run("queries", query, lambda store: store.select(query))
+
+    def update(self, update_query: str, timeout: float = None) -> None:
+        self._run("updates", update_query, lambda store: store.update(update_query))
+
+    def _run(self, kind: str, query: str, fn):
+        store = self.warm()
+        start = time.perf_counter()
+        try:
+            out = fn(store)
+        except Exception:
+            self.metrics.record(kind, time.perf_counter() - start, len(query), 0, error=True)
+            raise
+        self.metrics.record(kind, time.perf_counter() - start, len(query), 0)
+        return out
+
+    def stats(self) -> dict:
+        out = self.metrics.snapshot()
+        out["select_endpoint"] = f"local:{self._store.name if self._store is not None else self.engine or 'auto'}"
+        return out
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncLocalSparqlClient:
+    """asyncio face of LocalSparqlClient; queries run in a worker thread so the loop stays free."""
+
+    def __init__(self, client: LocalSparqlClient):
+        self.client = client
+
+    async def select(self, query: str, timeout: float = None) -> dict:
+        return await asyncio.to_thread(self.client.select, query)
+
+    async def update(self, update_query: str, timeout: float = None) -> None:
+        await asyncio.to_thread(self.client.update, update_query)
+
+    def stats(self) -> dict:
+        return self.client.stats()
+
+    async def aclose(self) -> None:
+        pass
+
+
+# "http" talks to Fuseki; "local" answers in-process from the TTL files (see api.local_store)
+SPARQL_BACKEND = (os.getenv("SPARQL_BACKEND") or "http").strip().lower()
+if SPARQL_BACKEND not in {"http", "local"}:
+    raise ValueError(f"Unknown SPARQL_BACKEND '{SPARQL_BACKEND}', expected 'http' or 'local'")
+
+if SPARQL_BACKEND == "local":
+    _CLIENT = LocalSparqlClient()
+
+_ASYNC_CLIENT = AsyncLocalSparqlClient(_CLIENT) if SPARQL_BACKEND == "local" else AsyncSparqlClient(
+    pool_size=int(os.getenv("SPARQL_ASYNC_POOL_SIZE", "64")),
+    retries=int(os.getenv("SPARQL_RETRIES", "1")),
+    backoff=float(os.getenv("SPARQL_RETRY_BACKOFF", "0.1")),
+)
+
+
+_PREFIX_RE = re.compile(r"PREFIX\s+([\w-]*):\s*<([^>]*)>\s*", re.IGNORECASE)
+# string literals (kept verbatim), IRIs (kept verbatim), comments and runs of whitespace
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|<[^>\s]*>|(?:\s|#[^\n]*)+')
+_SHAPE_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\b\d+(?:\.\d+)?\b|VALUES\s*\([^)]*\)\s*\{[^}]*\}', re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """canonical text: PREFIX declarations sorted and deduped, comments dropped, whitespace outside literals collapsed."""
+    query = _TOKEN_RE.sub(lambda m: m.group(0) if m.group(0)[0] in '"<' else " ", query)
+    prefixes = sorted(set(_PREFIX_RE.findall(query)))
+    body = _PREFIX_RE.sub("", query).strip()
+    return " ".join(f"PREFIX {p}: <{iri}>" for p, iri in prefixes) + " " + body
+
+
+def query_shape(normalized: str) -> str:
+    """the query with literals, numbers and VALUES rows blanked: one id per query template."""
+    body = _PREFIX_RE.sub("", normalized)
+    shape = re.sub(r"\?(?:\s*,\s*\?)+", "?", _SHAPE_RE.sub("?", body))
+    return f"{' '.join(body.split()[:2]).lower()}:{hashlib.sha1(shape.encode('utf-8')).hexdigest()[:8]}"
+
+
+class SparqlResultCache:
+    """
+    LRU + TTL cache of SELECT results keyed by the hash of the normalized query.
+
+    the KG version is bumped by run_update(), and, every probe_interval
+    seconds, by a triple-count probe noticing the store changed underneath
+    (run beside the request on the async path, under the same deadline and
+    circuit breaker as any SELECT); a bump drops every cached result, and a
+    result whose fetch started before the bump is not stored.
+    """
+
+    PROBE_QUERY = "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }"
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0, enabled: bool = True, probe_interval: float = 60.0):
+        self.enabled = enabled
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.probe_interval = probe_interval
+        self.version = 0
+        self._stamp = None
+        self._next_probe = 0.0
+        self._lock = threading.Lock()
+        self._shapes = {}
+
+    def key(self, query: str):
+        # prepared template queries (api.query_templates) are canonical already
+        if getattr(query, "cache_key", None):
+            return query.cache_key, query.template
+        normalized = normalize_query(query)
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest(), query_shape(normalized)
+
+    def get(self, key: str, shape: str):
+        hit = self.memory.get(key)
+        with self._lock:
+            counts = self._shapes.setdefault(shape, [0, 0])
+            counts[0 if hit is not None else 1] += 1
+        return hit
+
+    def set(self, key: str, result: dict, version: int = None) -> None:
+        # a result fetched before a bump describes the old KG: drop it rather than cache it
+        with self._lock:
+            if version is None or version == self.version:
+                self.memory.set(key, result)
+
+    def bump(self, reason: str = "update") -> None:
+        with self._lock:
+            self.version += 1
+            self.memory.clear()
+        logger.info(f"SPARQL cache invalidated ({reason}), KG version {self.version}")
+
+    def probe_due(self) -> bool:
+        if not self.enabled or self.probe_interval <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_probe:
+                return False
+            self._next_probe = now + self.probe_interval
+            return True
+
+    def observe_stamp(self, result: dict) -> None:
+        try:
+            stamp = result["results"]["bindings"][0]["n"]["value"]
+        except (KeyError, IndexError, TypeError):
+            return
+        with self._lock:
+            changed = self._stamp is not None and stamp != self._stamp
+            self._stamp = stamp
+        if changed:
+            self.bump("triple count changed")
+
+    def stats(self) -> dict:
+        s = self.memory.stats()
+        s["enabled"] = self.enabled
+        s["kg_version"] = self.version
+        with self._lock:
+            s["shapes"] = {
+                shape: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 4) if h + m else 0.0}
+                for shape, (h, m) in sorted(self._shapes.items())
+            }
+        return s
+
+
+_RESULT_CACHE = SparqlResultCache(
+    maxsize=int(os.getenv("SPARQL_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("SPARQL_CACHE_TTL", "600")),
+    enabled=os.getenv("SPARQL_CACHE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"},
+    probe_interval=float(os.getenv("SPARQL_CACHE_PROBE_S", "60")),
+)
+
+
+def get_result_cache() -> SparqlResultCache:
+    return _RESULT_CACHE
+
+
+_ENV_OFF = {"0", "false", "no", "off"}
+# trips on outages or slow calls and sends /chat to the movie index until a probe succeeds
+_BREAKER = CircuitBreaker(
+    window=int(os.getenv("SPARQL_BREAKER_WINDOW", "20")),
+    min_calls=int(os.getenv("SPARQL_BREAKER_MIN_CALLS", "5")),
+    error_rate=float(os.getenv("SPARQL_BREAKER_ERROR_RATE", "0.5")),
+    slow_ms=float(os.getenv("SPARQL_BREAKER_SLOW_MS", "2000")),
+    slow_rate=float(os.getenv("SPARQL_BREAKER_SLOW_RATE", "0.8")),
+    cooldown=float(os.getenv("SPARQL_BREAKER_COOLDOWN_S", "10")),
+    enabled=os.getenv("SPARQL_BREAKER_ENABLED", "1").strip().lower() not in _ENV_OFF,
+)
+# budget for one async SELECT including retries and hedges (0 = only the per-call timeout)
+SPARQL_DEADLINE_MS = float(os.getenv("SPARQL_DEADLINE_MS", "3000"))
+# send a second, identical SELECT when the first has not answered after this long (0 = off; http backend only)
+SPARQL_HEDGE_MS = float(os.getenv("SPARQL_HEDGE_MS", "0"))
+_HEDGES = {"sent": 0, "won": 0, "deadline_exceeded": 0}
+
+
+def get_breaker() -> CircuitBreaker:
+    return _BREAKER
+
+
+def breaker_stats() -> dict:
+    out = _BREAKER.stats()
+    out.update({
+        "deadline_ms": SPARQL_DEADLINE_MS,
+        "hedge_ms": SPARQL_HEDGE_MS if SPARQL_BACKEND == "http" else 0.0,
+        "hedges_sent": _HEDGES["sent"],
+        "hedges_won": _HEDGES["won"],
+        "deadline_exceeded": _HEDGES["deadline_exceeded"],
+    })
+    return out
+
+
+def _consume(task: asyncio.Future) -> None:
+    # losing attempts are cancelled or fail unobserved; keep asyncio from logging them
+    if not task.cancelled():
+        task.exception()
+
+
+def _budget(timeout: float) -> float:
+    return min(timeout, SPARQL_DEADLINE_MS / 1000.0) if SPARQL_DEADLINE_MS > 0 else timeout
+
+
+async def _hedged_select(query: str, timeout: float) -> dict:
+    loop = asyncio.get_running_loop()
+    budget = _budget(timeout)
+    deadline = loop.time() + budget
+    tasks = [asyncio.ensure_future(_ASYNC_CLIENT.select(query, timeout=budget))]
+    tasks[0].add_done_callback(_consume)
+    try:
+        hedge_after = SPARQL_HEDGE_MS / 1000.0
+        if hedge_after > 0 and SPARQL_BACKEND == "http" and hedge_after < budget:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                _HEDGES["sent"] += 1
+                hedge = asyncio.ensure_future(_ASYNC_CLIENT.select(query, timeout=deadline - loop.time()))
+                hedge.add_done_callback(_consume)
+                tasks.append(hedge)
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                _HEDGES["deadline_exceeded"] += 1
+                raise asyncio.TimeoutError(f"SPARQL select exceeded its {1000 * budget:.0f} ms deadline")
+            for t in done:
+                if t.exception() is None:
+                    if t is not tasks[0]:
+                        _HEDGES["won"] += 1
+                    return t.result()
+                error = t.exception()
+        raise error
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+def warm() -> None:
+    """load the embedded store up front so the first /chat does not pay for it."""
+    if SPARQL_BACKEND == "local":
+        _CLIENT.warm()
+
+
+def get_client() -> SparqlClient:
+    return _CLIENT
+
+
+def get_async_client() -> AsyncSparqlClient:
+    return _ASYNC_CLIENT
 
-JENA_SELECT_ENDPOINT = "http://localhost:3030/emotion/sparql"
-JENA_UPDATE_ENDPOINT = "http://localhost:3030/emotion/update"
 
 def run_select(query: str, timeout: int = 30) -> dict:
-    r = requests.post(
-        JENA_SELECT_ENDPOINT,
-        data={"query": query},
-        headers={"Accept": "application/sparql-results+json"},
-        timeout=timeout,
-    )
-    r.raise_for_status()
-    return r.json()
+    cache = _RESULT_CACHE
+    if not cache.enabled:
+        return _guarded_select(query, timeout)
+    if _BREAKER.state == CLOSED and cache.probe_due():
+        # held to the select deadline and seen by the breaker like any other call
+        try:
+            cache.observe_stamp(_guarded_select(cache.PROBE_QUERY, _budget(timeout)))
+        except Exception as e:
+            logger.warning(f"SPARQL version probe failed: {e!r}")
+    key, shape = cache.key(query)
+    hit = cache.get(key, shape)
+    if hit is not None:
+        return hit
+    version = cache.version
+    result = _guarded_select(query, timeout)
+    cache.set(key, result, version)
+    return result
+
+
+def _guarded_select(query: str, timeout: float) -> dict:
+    _BREAKER.check()
+    start = time.perf_counter()
+    try:
+        result = _CLIENT.select(query, timeout=timeout)
+    except BaseException as e:
+        _BREAKER.record(time.perf_counter() - start, e)
+        raise
+    _BREAKER.record(time.perf_counter() - start)
+    return result
+
 
 def run_update(update_query: str, timeout: int = 30) -> None:
-    r = requests.post(
-        JENA_UPDATE_ENDPOINT,
-        data=update_query.encode("utf-8"),
-        headers={"Content-Type": "application/sparql-update"},
-        timeout=timeout,
-    )
-    r.raise_for_status()
\ No newline at end of file
+    try:
+        _CLIENT.update(update_query, timeout=timeout)
+    finally:
+        # even a failed update may have been applied server-side
+        _RESULT_CACHE.bump()
+
+
+async def run_select_async(query: str, timeout: int = 30) -> dict:
+    cache = _RESULT_CACHE
+    if not cache.enabled:
+        return await _guarded_select_async(query, timeout)
+    if _BREAKER.state == CLOSED and cache.probe_due():
+        _schedule_probe(timeout)
+    key, shape = cache.key(query)
+    hit = cache.get(key, shape)
+    if hit is not None:
+        return hit
+    version = cache.version
+    result = await _guarded_select_async(query, timeout)
+    cache.set(key, result, version)
+    return result
+
+
+_PROBE_TASK = None
+
+
+async def _probe_version(timeout: float) -> None:
+    try:
+        _RESULT_CACHE.observe_stamp(await _guarded_select_async(_RESULT_CACHE.PROBE_QUERY, timeout))
+    except Exception as e:
+        logger.warning(f"SPARQL version probe failed: {e!r}")
+
+
+def _schedule_probe(timeout: float) -> None:
+    # the version probe runs beside the request, never in front of it; one at a time
+    global _PROBE_TASK
+    if _PROBE_TASK is None or _PROBE_TASK.done():
+        _PROBE_TASK = asyncio.ensure_future(_probe_version(timeout))
+
+
+async def _guarded_select_async(query: str, timeout: float) -> dict:
+    _BREAKER.check()
+    start = time.perf_counter()
+    try:
+        result = await _hedged_select(query, timeout)
+    except BaseException as e:
+        _BREAKER.record(time.perf_counter() - start, e)
+        raise
+    _BREAKER.record(time.perf_counter() - start)
+    return result
+
+
+async def run_update_async(update_query: str, timeout: int = 30) -> None:
+    try:
+        await _ASYNC_CLIENT.update(update_query, timeout=timeout)
+    finally:
+        _RESULT_CACHE.bump()
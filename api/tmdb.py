@@ -0,0 +1,129 @@
+"""
+TMDb HTTP client shared by the API and the offline snapshot job.
+
+TMDB_BASE_URL can point at a local stub instead of api.themoviedb.org.
+the lookup functions raise on transport/HTTP errors and return None only
+when TMDb has no match, so callers can tell "not found" from "failed".
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+TMDB_API_KEY = (os.getenv("TMDB_API_KEY") or "").strip()
+TMDB_BASE_URL = (os.getenv("TMDB_BASE_URL") or "https://api.themoviedb.org/3").rstrip("/")
+TMDB_IMG_BASE = "https://image.tmdb.org/t/p/w500"
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def get_tmdb_client() -> httpx.AsyncClient:
+    # one pooled keep-alive client for every TMDb call (search + details share connections)
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            limits=httpx.Limits(max_connections=int(os.getenv("TMDB_POOL_SIZE", "32"))),
+        )
+    return _CLIENT
+
+
+async def close_tmdb_client() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+def norm_title(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(s).lower()).strip()
+
+
+def parse_year(y: Optional[str]) -> Optional[int]:
+    if y is None:
+        return None
+    m = re.search(r"\b(19|20)\d{2}\b", str(y))
+    if m:
+        try:
+            return int(m.group(0))
+        except Exception:
+            pass
+    try:
+        return int(float(str(y)))
+    except Exception:
+        return None
+
+
+def best_match(results: List[Dict[str, Any]], title: str, y: Optional[int]) -> Optional[Dict[str, Any]]:
+    nt = norm_title(title)
+    # score candidates by exact/partial title match, year match, and vote_count as tie-breaker
+    scored = []
+    for mres in results:
+        rel_year = (mres.get("release_date") or "")[:4]
+        tf = [mres.get("title") or "", mres.get("original_title") or ""]
+        score = 0.0
+        if any(norm_title(t) == nt for t in tf):
+            score += 3.0
+        elif any(nt and (nt in norm_title(t)) for t in tf):
+            score += 1.0
+        if y and rel_year == str(y):
+            score += 2.0
+        try:
+            score += (float(mres.get("vote_count", 0)) / 10000.0)
+        except Exception:
+            pass
+        scored.append((score, mres))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[0][1] if scored else None
+
+
+def _details_from(d: Dict[str, Any], match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    match = match or {}
+    return {
+        "title": d.get("title") or match.get("title"),
+        "year": (d.get("release_date") or match.get("release_date") or "")[:4],
+        "rating": d.get("vote_average"),
+        "vote_count": d.get("vote_count"),
+        "genres": [g.get("name") for g in d.get("genres", [])],
+        "cast": [c.get("name") for c in d.get("credits", {}).get("cast", [])[:8]],
+        "overview": d.get("overview"),
+        "poster_url": (TMDB_IMG_BASE + d["poster_path"]) if d.get("poster_path") else None,
+        "tmdb_id": d.get("id") or match.get("id"),
+        "source": "tmdb",
+    }
+
+
+async def details_by_id(tmdb_id: int, client: Optional[httpx.AsyncClient] = None,
+                        match: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    client = client or get_tmdb_client()
+    r = await client.get(
+        f"{TMDB_BASE_URL}/movie/{tmdb_id}",
+        params={"api_key": TMDB_API_KEY, "append_to_response": "credits"},
+    )
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return _details_from(r.json(), match)
+
+
+async def search_details(title: str, year: Optional[str] = None,
+                         client: Optional[httpx.AsyncClient] = None) -> Optional[Dict[str, Any]]:
+    """search by title (+year), then fetch details for the best match; None when nothing matches."""
+    client = client or get_tmdb_client()
+    y = parse_year(year)
+    params = {
+        "api_key": TMDB_API_KEY,
+        "query": title,
+        "include_adult": "false",
+        "language": "en-US",
+    }
+    if y:
+        params["year"] = y
+    r = await client.get(f"{TMDB_BASE_URL}/search/movie", params=params)
+    r.raise_for_status()
+    results = r.json().get("results", [])
+    match = best_match(results, title, y) if results else None
+    if not match:
+        return None
+    return await details_by_id(match.get("id"), client=client, match=match)
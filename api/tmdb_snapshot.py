@@ -0,0 +1,266 @@
+"""
+offline TMDb snapshot keyed by MovieLens movie_id.
+
+a batch job walks data/movie_kb_final.csv, fetches details for every movie
+with rate-limited concurrency and writes them to a SQLite file. the job
+resumes where it stopped: movies already in the store are skipped, failed
+lookups are not recorded and get retried on the next run.
+
+at serve time /chat and /movie/details answer from the store, so the
+rating threshold becomes a local filter instead of a live TMDb call.
+
+    python -m api.tmdb_snapshot --concurrency 8 --rate 30
+    python -m api.tmdb_snapshot --links data/raw/links.csv   # MovieLens movieId -> tmdbId, skips the search call
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from api.movie_index import MOVIES_CSV
+from api.tmdb import TMDB_API_KEY, TMDB_BASE_URL, details_by_id, search_details
+
+SNAPSHOT_PATH = os.getenv("TMDB_SNAPSHOT_PATH") or "data/tmdb_snapshot.sqlite"
+
+# details fields kept in the snapshot (rating lives in its own column)
+_KEEP = ("title", "year", "genres", "cast", "overview", "poster_url", "tmdb_id", "vote_count")
+
+logger = logging.getLogger("api")
+
+
+class TmdbSnapshot:
+    """
+    movie_id -> (found, rating, details) on SQLite (WAL, one connection per thread).
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshot ("
+                "movie_id INTEGER PRIMARY KEY, found INTEGER NOT NULL, rating REAL, "
+                "details TEXT, fetched_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, movie_id: int) -> Optional[Tuple[bool, Optional[Dict]]]:
+        """-> (found, details) or None when the movie was never fetched."""
+        row = self._conn().execute(
+            "SELECT found, rating, details FROM snapshot WHERE movie_id = ?", (int(movie_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        found, rating, details = row
+        if not found:
+            return False, None
+        d = json.loads(details) if details else {}
+        d["rating"] = rating
+        d["source"] = "tmdb-snapshot"
+        return True, d
+
+    def put_many(self, rows: Iterable[Tuple[int, Optional[Dict]]]) -> None:
+        now = time.time()
+        data = []
+        for movie_id, details in rows:
+            if details is None:
+                data.append((int(movie_id), 0, None, None, now))
+            else:
+                compact = {k: details.get(k) for k in _KEEP if details.get(k) not in (None, "", [])}
+                data.append((int(movie_id), 1, details.get("rating"), json.dumps(compact, separators=(",", ":")), now))
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO snapshot VALUES (?, ?, ?, ?, ?)", data)
+
+    def ratings(self) -> Dict[int, float]:
+        """-> {movie_id: rating} for every matched movie that has a rating."""
+        rows = self._conn().execute("SELECT movie_id, rating FROM snapshot WHERE found = 1 AND rating IS NOT NULL")
+        return {int(mid): float(r) for mid, r in rows}
+
+    def done_ids(self) -> set:
+        return {int(r[0]) for r in self._conn().execute("SELECT movie_id FROM snapshot")}
+
+    def stats(self) -> dict:
+        total, found = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(found), 0) FROM snapshot").fetchone()
+        return {"path": self.path, "movies": int(total), "found": int(found)}
+
+
+_SNAPSHOT: Optional[TmdbSnapshot] = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def get_snapshot(path: str = SNAPSHOT_PATH) -> Optional[TmdbSnapshot]:
+    """open the snapshot once per process; None when no snapshot has been built."""
+    global _SNAPSHOT
+    if _SNAPSHOT is None and os.path.exists(path):
+        with _SNAPSHOT_LOCK:
+            if _SNAPSHOT is None:
+                try:
+                    _SNAPSHOT = TmdbSnapshot(path)
+                except Exception as e:
+                    logger.error(f"TMDb snapshot at {path} unavailable: {e}")
+                    return None
+    return _SNAPSHOT
+
+
+class RateLimiter:
+    """async token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+def _read_movies(path: str):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                mid = int(row["movie_id"])
+            except (KeyError, ValueError):
+                continue
+            year = row.get("year") or ""
+            try:
+                year = str(int(float(year))) if year else ""
+            except ValueError:
+                year = ""
+            yield mid, row.get("title") or "", year
+
+
+def _read_links(path: Optional[str]) -> Dict[int, int]:
+    if not path:
+        return {}
+    out = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                out[int(row["movieId"])] = int(float(row["tmdbId"]))
+            except (KeyError, ValueError):
+                continue
+    return out
+
+
+async def build_snapshot(snapshot: TmdbSnapshot, movies_csv: str = MOVIES_CSV, links_csv: Optional[str] = None,
+                         concurrency: int = 8, rate: float = 30.0, retries: int = 3, limit: Optional[int] = None,
+                         flush_every: int = 200) -> dict:
+    links = _read_links(links_csv)
+    done = snapshot.done_ids()
+    todo = [m for m in _read_movies(movies_csv) if m[0] not in done]
+    if limit is not None:
+        todo = todo[:limit]
+    logger.info(f"TMDb snapshot: {len(done)} already stored, {len(todo)} to fetch")
+
+    limiter = RateLimiter(rate, burst=concurrency)
+    buffer = []
+    counts = {"fetched": 0, "found": 0, "not_found": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def _get(client: httpx.AsyncClient, movie_id: int, title: str, year: str):
+        tmdb_id = links.get(movie_id)
+        for attempt in range(retries + 1):
+            # a title search costs two requests (search + details), a known tmdb id one
+            await limiter.acquire()
+            if not tmdb_id:
+                await limiter.acquire()
+            try:
+                if tmdb_id:
+                    return await details_by_id(tmdb_id, client=client)
+                return await search_details(title, year, client=client)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 429 and e.response.status_code < 500:
+                    raise
+                wait = float(e.response.headers.get("Retry-After") or 2 ** attempt)
+            except httpx.TransportError:
+                wait = 2 ** attempt
+            if attempt < retries:
+                await asyncio.sleep(wait)
+        raise RuntimeError(f"gave up after {retries + 1} attempts")
+
+    async def _one(client: httpx.AsyncClient, movie_id: int, title: str, year: str):
+        try:
+            details = await _get(client, movie_id, title, year)
+        except Exception as e:
+            counts["failed"] += 1
+            logger.warning(f"TMDb fetch failed for {movie_id} '{title}': {e}")
+            return
+        counts["fetched"] += 1
+        counts["found" if details else "not_found"] += 1
+        buffer.append((movie_id, details))
+        if len(buffer) >= flush_every:
+            snapshot.put_many(buffer)
+            buffer.clear()
+            rate_now = counts["fetched"] / max(1e-9, time.perf_counter() - started)
+            logger.info(f"TMDb snapshot: {counts['fetched']}/{len(todo)} ({rate_now:.1f} movies/s)")
+
+    # a fixed pool of workers drains one queue, so only `concurrency` coroutines exist at a time
+    queue: asyncio.Queue = asyncio.Queue()
+    for m in todo:
+        queue.put_nowait(m)
+
+    async def _worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                m = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await _one(client, *m)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=3.0),
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        try:
+            await asyncio.gather(*(_worker(client) for _ in range(max(1, concurrency))))
+        finally:
+            # flush on the way out too, so an interrupted run resumes from here
+            if buffer:
+                snapshot.put_many(buffer)
+                buffer.clear()
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s - %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    ap = argparse.ArgumentParser(description="pre-fetch TMDb details for every movie into a local snapshot")
+    ap.add_argument("--movies", default=MOVIES_CSV)
+    ap.add_argument("--links", default=None, help="MovieLens links.csv (movieId,imdbId,tmdbId)")
+    ap.add_argument("--out", default=SNAPSHOT_PATH)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=30.0, help="max requests per second")
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args()
+    if not TMDB_API_KEY and TMDB_BASE_URL.startswith("https://api.themoviedb.org"):
+        raise SystemExit("TMDB_API_KEY not set")
+    snap = TmdbSnapshot(args.out)
+    result = asyncio.run(build_snapshot(snap, args.movies, args.links, args.concurrency, args.rate, limit=args.limit))
+    print(result, snap.stats())
@@ -0,0 +1,119 @@
+"""
+inference backends for the emotion classifier.
+
+every backend takes a list of texts and returns sigmoid probabilities,
+one row per text in classifier label order. available backends:
+- "torch" : the fp32 PyTorch model (default)
+- "int8"  : the same model with torch dynamic INT8 quantization of Linear layers
+- "onnx"  : an ONNX Runtime session over the exported graph (see dl/export_model.py)
+- "onnx-int8" : ONNX Runtime over the dynamically quantized export
+
+the backend is picked by the EMOTION_BACKEND environment variable.
+no training or label logic is included here.
+"""
+import os
+
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+ONNX_DIRNAME = "onnx"
+ONNX_FILENAME = "model.onnx"
+MAX_LENGTH = 128
+
+
+def onnx_model_path(model_path: str, quantized: bool = False) -> str:
+    name = "model.int8.onnx" if quantized else ONNX_FILENAME
+    return os.path.join(model_path, ONNX_DIRNAME, name)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_path: str):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self.model_path = model_path
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        self.model = self._prepare(model)
+        self.num_labels = model.config.num_labels
+
+    def _prepare(self, model):
+        return model
+
+    def predict_proba(self, texts: list) -> list:
+        inputs = self.tokenizer(
+            list(texts),
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=MAX_LENGTH
+        )
+        with self._torch.no_grad():
+            logits = self.model(**inputs).logits
+        return self._torch.sigmoid(logits).tolist()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    name = "int8"
+
+    def _prepare(self, model):
+        #dynamic quantization: int8 weights, activations quantized on the fly, no calibration data needed
+        return self._torch.quantization.quantize_dynamic(
+            model, {self._torch.nn.Linear}, dtype=self._torch.qint8
+        )
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_path: str, onnx_path: str = None):
+        import numpy as np
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self._np = np
+        self.model_path = model_path
+        self.onnx_path = onnx_path or os.getenv("EMOTION_ONNX_PATH") or onnx_model_path(model_path)
+        if not os.path.exists(self.onnx_path):
+            raise FileNotFoundError(
+                f"ONNX model not found at {self.onnx_path}; run `python -m dl.export_model` first"
+            )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMOTION_ONNX_THREADS", "0"))
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.onnx_path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        dim = self.session.get_outputs()[0].shape[-1]
+        self.num_labels = dim if isinstance(dim, int) else None
+
+    def predict_proba(self, texts: list) -> list:
+        np = self._np
+        enc = self.tokenizer(
+            list(texts),
+            return_tensors="np",
+            truncation=True,
+            padding=True,
+            max_length=MAX_LENGTH
+        )
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._input_names}
+        logits = self.session.run(None, feeds)[0]
+        return (1.0 / (1.0 + np.exp(-logits))).tolist()
+
+
+def get_backend(name: str = None, model_path: str = "models/emotion_classifier"):
+    name = (name or os.getenv("EMOTION_BACKEND") or "torch").strip().lower()
+    if name == "torch":
+        return TorchBackend(model_path)
+    if name == "int8":
+        return QuantizedTorchBackend(model_path)
+    if name == "onnx":
+        return OnnxBackend(model_path)
+    if name == "onnx-int8":
+        return OnnxBackend(model_path, onnx_model_path(model_path, quantized=True))
+    raise ValueError(f"Unknown emotion backend '{name}', expected one of {BACKENDS}")
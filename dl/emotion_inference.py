@@ -1,45 +1,142 @@
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-from dl.dataset_loader import load_goemotions
+import asyncio
+import os
+import threading
+from dl.backends import get_backend
+from dl.label_manifest import load_label_names
+from dl.micro_batcher import MicroBatcher
+from dl.result_cache import cache_from_env
 
 MODEL_PATH = "models/emotion_classifier"
 
-#LOAD ONCE (IMPORTANT FOR API USE) ----
-dataset, LABEL_NAMES = load_goemotions()
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
-tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-model.eval()
+#micro-batching: requests arriving within the window are run as one padded batch
+MAX_BATCH_SIZE = int(os.getenv("EMOTION_MAX_BATCH", "16"))
+BATCH_WINDOW_MS = float(os.getenv("EMOTION_BATCH_WINDOW_MS", "5"))
 
+#LOAD ONCE, LAZILY (IMPORTANT FOR API USE) ----
+#the backend (torch / int8 / onnx, see dl/backends.py) is built on the first
+#inference call; label names come from the manifest next to the weights, so
+#importing this module (and starting the API) is fast and needs no network
+_BACKEND = None
+_LABEL_NAMES = None
+_LOAD_LOCK = threading.Lock()
 
-def infer_emotions(text: str) -> dict:
+
+def load_backend():
+    """
+    thread-safe lazy loader.
+    -> returns (backend, label_names), loaded once per process.
+    """
+    global _BACKEND, _LABEL_NAMES
+    if _BACKEND is None:
+        with _LOAD_LOCK:
+            if _BACKEND is None:
+                backend = get_backend(model_path=MODEL_PATH)
+                _LABEL_NAMES = load_label_names(MODEL_PATH, num_labels=backend.num_labels)
+                _BACKEND = backend
+    return _BACKEND, _LABEL_NAMES
+
+
+def get_label_names() -> list:
+    return load_backend()[1]
+
+
+def infer_emotions_batch(texts: list) -> list:
+    """
+    Input: list of raw user texts
+    Output: list of { emotion_label: confidence }, one per text, same order
+    """
+
+    if not texts:
+        return []
+    for text in texts:
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("Input text must be non-empty")
+
+    backend, label_names = load_backend()
+    probs = backend.predict_proba(texts)
+
+    return [
+        {label_names[i]: round(float(row[i]), 4) for i in range(len(label_names))}
+        for row in probs
+    ]
+
+
+#repeated short answers skip the forward pass; keyed per backend so int8/onnx results never mix with fp32
+_RESULT_CACHE = cache_from_env(namespace=(os.getenv("EMOTION_BACKEND") or "torch").strip().lower())
+
+_BATCHER = MicroBatcher(
+    infer_emotions_batch,
+    max_batch_size=MAX_BATCH_SIZE,
+    window_ms=BATCH_WINDOW_MS,
+    name="emotion-batcher",
+)
+
+
+def infer_emotions(text: str, use_cache: bool = True) -> dict:
     """
     Input: raw user text
     Output: { emotion_label: confidence }
+
+    results are served from the result cache when possible; misses from
+    concurrent callers are coalesced into one forward pass by the micro-batcher.
     """
 
     if not isinstance(text, str) or not text.strip():
         raise ValueError("Input text must be non-empty")
 
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    )
-
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-
-    probs = torch.sigmoid(logits)[0]
-
-    return {
-        LABEL_NAMES[i]: round(float(probs[i]), 4)
-        for i in range(len(LABEL_NAMES))
-    }
-    
+    if use_cache:
+        cached = _RESULT_CACHE.get(text)
+        if cached is not None:
+            return cached
+
+    if MAX_BATCH_SIZE <= 1:
+        scores = infer_emotions_batch([text])[0]
+    else:
+        scores = _BATCHER.submit(text).result()
+
+    if use_cache:
+        _RESULT_CACHE.set(text, scores)
+    return scores
+
+
+async def infer_emotions_async(text: str, use_cache: bool = True) -> dict:
+    """
+    infer_emotions for the event loop: no thread is parked per request, so
+    every concurrent conversation can have a text waiting in the micro-batcher.
+    """
+
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Input text must be non-empty")
+
+    # the in-memory tier answers on the loop; the optional SQLite tier is read off it
+    disk = use_cache and _RESULT_CACHE.disk is not None
+    if use_cache:
+        cached = await asyncio.to_thread(_RESULT_CACHE.get, text) if disk else _RESULT_CACHE.get(text)
+        if cached is not None:
+            return cached
+
+    if MAX_BATCH_SIZE <= 1:
+        scores = (await asyncio.to_thread(infer_emotions_batch, [text]))[0]
+    else:
+        scores = await asyncio.wrap_future(_BATCHER.submit(text))
+
+    if disk:
+        await asyncio.to_thread(_RESULT_CACHE.set, text, scores)
+    elif use_cache:
+        _RESULT_CACHE.set(text, scores)
+    return scores
+
+
+def batching_stats() -> dict:
+    return _BATCHER.stats()
+
+
+def cache_stats() -> dict:
+    return _RESULT_CACHE.stats()
+
+
 if __name__ == "__main__":
     text = "This movie was slow but emotionally powerful and thought-provoking."
     emotions = infer_emotions(text)
-    print(emotions)
\ No newline at end of file
+    print(emotions)
+    print(batching_stats())
@@ -0,0 +1,132 @@
+"""
+export + parity check for the CPU inference backends.
+
+this script:
+- exports models/emotion_classifier to ONNX (models/emotion_classifier/onnx/model.onnx)
+- writes a dynamically quantized INT8 copy of the ONNX graph (model.int8.onnx)
+- runs every backend over a GoEmotions validation slice and compares it
+  against the fp32 PyTorch outputs (probability drift, label agreement, latency)
+
+usage:
+    python -m dl.export_model                 # export + parity check
+    python -m dl.export_model --skip-export   # parity check only
+    python -m dl.export_model --samples 1000 --threshold 0.3
+"""
+import argparse
+import os
+import time
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from dl.backends import BACKENDS, MAX_LENGTH, get_backend, onnx_model_path
+
+MODEL_PATH = "models/emotion_classifier"
+
+
+def export_onnx(model_path: str = MODEL_PATH, opset: int = 14) -> str:
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.eval()
+
+    out_path = onnx_model_path(model_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    sample = tokenizer(
+        ["this movie made me feel uneasy and thoughtful."],
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+        max_length=MAX_LENGTH
+    )
+    dynamic = {"batch": 0, "sequence": 1}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            out_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    return out_path
+
+
+def quantize_onnx(model_path: str = MODEL_PATH) -> str:
+    #dynamic quantization only needs the weights; activation ranges are computed at run time
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = onnx_model_path(model_path)
+    dst = onnx_model_path(model_path, quantized=True)
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    return dst
+
+
+def _run(backend, texts, batch_size):
+    rows = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        rows.extend(backend.predict_proba(texts[i:i + batch_size]))
+    return rows, time.perf_counter() - start
+
+
+def parity_check(model_path: str = MODEL_PATH, samples: int = 500, batch_size: int = 32,
+                 threshold: float = 0.3) -> dict:
+    """
+    compare each backend to the fp32 torch reference on a validation slice.
+    -> returns { backend: metrics }
+    """
+    from dl.dataset_loader import load_goemotions
+
+    dataset, _ = load_goemotions()
+    val = dataset["validation"]
+    texts = val.select(range(min(samples, len(val))))["text"]
+
+    reference, ref_s = _run(get_backend("torch", model_path), texts, batch_size)
+    ref = torch.tensor(reference)
+    ref_top1 = ref.argmax(dim=1)
+    ref_bin = ref >= threshold
+
+    report = {"torch": {"seconds": round(ref_s, 3), "texts_per_s": round(len(texts) / ref_s, 1)}}
+    for name in BACKENDS:
+        if name == "torch":
+            continue
+        try:
+            rows, secs = _run(get_backend(name, model_path), texts, batch_size)
+        except Exception as e:
+            report[name] = {"error": str(e)}
+            continue
+        cand = torch.tensor(rows)
+        diff = (cand - ref).abs()
+        report[name] = {
+            "seconds": round(secs, 3),
+            "texts_per_s": round(len(texts) / secs, 1),
+            "speedup": round(ref_s / secs, 2),
+            "max_abs_diff": round(float(diff.max()), 5),
+            "mean_abs_diff": round(float(diff.mean()), 6),
+            "top1_agreement": round(float((cand.argmax(dim=1) == ref_top1).float().mean()), 4),
+            "label_agreement": round(float(((cand >= threshold) == ref_bin).float().mean()), 4),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="export and validate CPU backends for the emotion classifier")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        print("exported:", export_onnx(args.model_path))
+        print("quantized:", quantize_onnx(args.model_path))
+
+    for backend, metrics in parity_check(args.model_path, args.samples, args.batch_size, args.threshold).items():
+        print(f"{backend:>10}: {metrics}")
@@ -1,43 +1,80 @@
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-from dl.dataset_loader import load_goemotions
+import json
+import sys
+from itertools import islice
 
-MODELS_PATH = "models/emotion_classifier"
+from dl.emotion_inference import load_backend
+
+
+class EmotionPredictor:
+    """
+    reusable emotion predictor for scripts and batch jobs.
+
+    the model, tokenizer and label names are loaded once and shared with
+    dl.emotion_inference (the API path), so both use the same cached instance.
+    """
+
+    def __init__(self, threshold=0.3, batch_size=32):
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.backend, self.label_names = load_backend()
+
+    def _to_predictions(self, row, threshold):
+        return {
+            self.label_names[i]: float(row[i])
+            for i in range(len(self.label_names))
+            if row[i] >= threshold
+        }
+
+    def predict(self, text, threshold=None):
+        threshold = self.threshold if threshold is None else threshold
+        row = self.backend.predict_proba([text])[0]
+        return self._to_predictions(row, threshold)
+
+    def predict_many(self, texts, threshold=None, batch_size=None):
+        """
+        stream predictions for an iterable of texts (e.g. lines of a large file).
+
+        texts are read a window at a time; inside each window they are sorted
+        by length so every batch pads to similar lengths, then results are
+        yielded back in input order.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        batch_size = batch_size or self.batch_size
+        window = batch_size * 8
+        it = iter(texts)
+        while True:
+            chunk = list(islice(it, window))
+            if not chunk:
+                return
+            order = sorted(range(len(chunk)), key=lambda i: len(chunk[i]))
+            results = [None] * len(chunk)
+            for start in range(0, len(order), batch_size):
+                idx = order[start:start + batch_size]
+                rows = self.backend.predict_proba([chunk[i] for i in idx])
+                for i, row in zip(idx, rows):
+                    results[i] = self._to_predictions(row, threshold)
+            yield from results
+
+
+_DEFAULT_PREDICTOR = None
 
-def load_model_and_tokenizer():
-    model = AutoModelForSequenceClassification.from_pretrained(MODELS_PATH)
-    tokenizer = AutoTokenizer.from_pretrained(MODELS_PATH)
-    model.eval()
-    return model, tokenizer
 
 def predict_emotions(text, threshold=0.3):
-    dataset, label_names = load_goemotions()
-    model, tokenizer = load_model_and_tokenizer()
-    
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    )
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-    
-    probs = torch.sigmoid(logits)[0]
-    
-    predictions = {
-        label_names[i]: float(probs[i])
-        for i in range(len(label_names))
-        if probs[i] >= threshold
-    }
-    
-    return predictions
-
-
-if __name__ == "__main__":
+    global _DEFAULT_PREDICTOR
+    if _DEFAULT_PREDICTOR is None:
+        _DEFAULT_PREDICTOR = EmotionPredictor()
+    return _DEFAULT_PREDICTOR.predict(text, threshold)
+
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    #batch mode: one text per line in, one json prediction per line out
+    predictor = EmotionPredictor()
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        for preds in predictor.predict_many(line for line in lines if line):
+            print(json.dumps(preds))
+
+elif __name__ == "__main__":
     text = "This movie was slow but emotionally powerful and thought-provoking."
     emotions = predict_emotions(text)
 
@@ -45,4 +82,4 @@ if __name__ == "__main__":
     print(text)
     print("\npredicted emotions: ")
     for emo, score in emotions.items():
-        print(f"{emo}: {score:.3f}")
\ No newline at end of file
+        print(f"{emo}: {score:.3f}")
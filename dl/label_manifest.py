@@ -0,0 +1,69 @@
+"""
+label manifest for the trained emotion classifier.
+
+the manifest is a small json file saved next to the model weights
+(models/emotion_classifier/labels.json). it records the emotion label
+names in classifier output order, so inference never has to download
+the GoEmotions dataset just to read them.
+"""
+import json
+import logging
+import os
+
+MANIFEST_NAME = "labels.json"
+
+logger = logging.getLogger("dl")
+
+#GoEmotions (simplified) label order, used only when an older model dir has no manifest
+GOEMOTIONS_LABELS = [
+    "admiration", "amusement", "anger", "annoyance", "approval", "caring",
+    "confusion", "curiosity", "desire", "disappointment", "disapproval",
+    "disgust", "embarrassment", "excitement", "fear", "gratitude", "grief",
+    "joy", "love", "nervousness", "optimism", "pride", "realization",
+    "relief", "remorse", "sadness", "surprise", "neutral",
+]
+
+
+def manifest_path(model_path: str) -> str:
+    return os.path.join(model_path, MANIFEST_NAME)
+
+
+def save_label_manifest(model_path: str, label_names, source: str = "go_emotions") -> str:
+    """
+    write the label manifest next to the saved model.
+    -> returns the manifest path.
+    """
+    os.makedirs(model_path, exist_ok=True)
+    path = manifest_path(model_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"source": source, "num_labels": len(label_names), "labels": list(label_names)},
+            f,
+            indent=2,
+        )
+    return path
+
+
+def load_label_names(model_path: str, num_labels: int = None) -> list:
+    """
+    read label names for a saved model.
+    falls back to the built-in GoEmotions order when the manifest is missing.
+    """
+    path = manifest_path(model_path)
+    labels = None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            labels = json.load(f).get("labels")
+    except FileNotFoundError:
+        logger.warning(f"No label manifest at {path}; using built-in GoEmotions label order")
+    if not labels:
+        labels = list(GOEMOTIONS_LABELS)
+    if num_labels is not None and len(labels) != num_labels:
+        raise ValueError(f"Label manifest has {len(labels)} labels but model outputs {num_labels}")
+    return labels
+
+
+if __name__ == "__main__":
+    #backfill a manifest for a model directory trained before manifests existed
+    out = save_label_manifest("models/emotion_classifier", GOEMOTIONS_LABELS)
+    print(f"wrote {out}")
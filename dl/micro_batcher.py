@@ -0,0 +1,128 @@
+"""
+micro-batching engine for model inference.
+
+callers submit single items and get a Future back. a background worker
+collects items that arrive within a short window (up to a max batch size)
+and runs them through one batched call, then resolves each caller's future
+with its own result.
+
+no model logic is included here; the batch function is injected.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+
+class MicroBatcher:
+    """
+    batch_fn : callable(list[item]) -> list[result], same length and order.
+    max_batch_size : upper bound on items per batched call.
+    window_ms : how long to wait after the first item for more to arrive.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 window_ms: float = 5.0, name: str = "micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._size_hist: Dict[int, int] = {}
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    def submit(self, item: Any) -> Future:
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((item, fut, time.perf_counter()))
+        return fut
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "batches": batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / batches, 3) if batches else 0.0,
+                "max_batch_size_seen": self._max_batch,
+                "batch_size_histogram": dict(sorted(self._size_hist.items())),
+                "avg_queue_wait_ms": round(1000.0 * self._wait_total_s / self._items, 3) if self._items else 0.0,
+                "max_queue_wait_ms": round(1000.0 * self._wait_max_s, 3),
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.window_s * 1000.0,
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                t = threading.Thread(target=self._run, name=self.name, daemon=True)
+                t.start()
+                self._worker = t
+
+    def _collect(self, first) -> List[Any]:
+        batch = [first]
+        deadline = time.perf_counter() + self.window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                # keep the sentinel for the outer loop
+                self._queue.put(None)
+                break
+            batch.append(nxt)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+            self._record(len(batch), [started - enq for _, _, enq in batch])
+
+            items = [it for it, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut, _), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+    def _record(self, size: int, waits: List[float]) -> None:
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._size_hist[size] = self._size_hist.get(size, 0) + 1
+            self._wait_total_s += sum(waits)
+            self._wait_max_s = max(self._wait_max_s, max(waits, default=0.0))
@@ -0,0 +1,68 @@
+"""
+result cache for emotion inference.
+
+follow-up answers are short and repetitive ("comforting", "fast", "idk"),
+so results are cached by normalized text:
+- in-process LRU with TTL (EMOTION_CACHE_SIZE, EMOTION_CACHE_TTL)
+- optional SQLite tier (EMOTION_CACHE_PATH) so a restarted worker comes back warm
+- EMOTION_CACHE_ENABLED=0 turns caching off
+"""
+import os
+import re
+from typing import Optional
+
+from ttl_cache import SqliteStore, TTLCache
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+class EmotionResultCache:
+    def __init__(self, maxsize: int = 2048, ttl: float = 6 * 3600.0, enabled: bool = True,
+                 path: Optional[str] = None, namespace: str = ""):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = SqliteStore(path, table="emotion_results") if (enabled and path) else None
+        self.disk_hits = 0
+
+    def _key(self, text: str) -> str:
+        return f"{self.namespace}:{normalize_text(text)}"
+
+    def get(self, text: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        key = self._key(text)
+        hit = self.memory.get(key)
+        if hit is None and self.disk is not None:
+            hit = self.disk.get(key)
+            if hit is not None:
+                self.disk_hits += 1
+                self.memory.set(key, hit)
+        return dict(hit) if hit is not None else None
+
+    def set(self, text: str, scores: dict) -> None:
+        if not self.enabled:
+            return
+        key = self._key(text)
+        self.memory.set(key, dict(scores))
+        if self.disk is not None:
+            self.disk.set(key, scores, ttl=self.memory.ttl)
+
+    def stats(self) -> dict:
+        s = self.memory.stats()
+        s["enabled"] = self.enabled
+        s["persistent"] = self.disk is not None
+        s["disk_hits"] = self.disk_hits
+        return s
+
+
+def cache_from_env(namespace: str = "") -> EmotionResultCache:
+    return EmotionResultCache(
+        maxsize=int(os.getenv("EMOTION_CACHE_SIZE", "2048")),
+        ttl=float(os.getenv("EMOTION_CACHE_TTL", str(6 * 3600))),
+        enabled=os.getenv("EMOTION_CACHE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"},
+        path=os.getenv("EMOTION_CACHE_PATH") or None,
+        namespace=namespace,
+    )
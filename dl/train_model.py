@@ -13,6 +13,7 @@ from transformers import AutoModelForSequenceClassification
 from torch.optim import AdamW
 
 from dl.dataset_loader import load_goemotions
+from dl.label_manifest import save_label_manifest
 from dl.preprocess import tokenize_texts, binarize_labels
 from dl.preprocess import tokenizer
 
@@ -27,11 +28,16 @@ imports from our own files → modular design
 #initilialize model
 MODEL_NAME = "distilroberta-base"
 
-def load_model(num_labels):
+def load_model(num_labels, label_names=None):
+    kwargs = {}
+    if label_names:
+        kwargs["id2label"] = {i: name for i, name in enumerate(label_names)}
+        kwargs["label2id"] = {name: i for i, name in enumerate(label_names)}
     model = AutoModelForSequenceClassification.from_pretrained(
         MODEL_NAME,
         num_labels=num_labels,
-        problem_type = "multi_label_classification"
+        problem_type = "multi_label_classification",
+        **kwargs
     )
     return model
 
@@ -86,7 +92,7 @@ def collate_fn(batch):
 #minimal training loop
 def train():
     dataset, label_names = load_goemotions()
-    model = load_model(num_labels=len(label_names))
+    model = load_model(num_labels=len(label_names), label_names=label_names)
     
     model.train()
     
@@ -111,7 +117,9 @@ def train():
         save_path = "models/emotion_classifier"
         model.save_pretrained(save_path)
         tokenizer.save_pretrained(save_path)
-        print(f"Model and tokenizer saved to {save_path}")
+        #label names travel with the weights so inference never needs the dataset
+        save_label_manifest(save_path, label_names)
+        print(f"Model, tokenizer and label manifest saved to {save_path}")
 
             
 
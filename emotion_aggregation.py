@@ -0,0 +1,203 @@
+"""
+per-session emotion aggregation over fixed-size label vectors.
+
+an aggregator keeps its state as a small float32 matrix (rows x labels) and
+folds each turn in with a few O(labels) vector ops, however long the
+conversation gets:
+- mean   : running mean over the turns each label was reported in
+- ema    : exponential moving average with a half-life in turns, so the
+           latest messages weigh most (default)
+- window : mean over the last `window` turns (a label missing from a turn
+           counts as 0 there)
+- max    : max-pool, the strongest score each label has reached
+
+    EMOTION_AGGREGATION = ema | mean | window | max
+    EMOTION_HALF_LIFE   = 3   turns, for ema
+    EMOTION_WINDOW      = 5   turns, for window
+
+update() gets `counts` (per-label reports, already including this turn) and
+`steps` (turns folded in so far, including this one).
+"""
+import os
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class MeanAggregator:
+    name = "mean"
+    rows = 1
+
+    @property
+    def key(self) -> str:
+        return self.name
+
+    def init(self, n: int) -> np.ndarray:
+        return np.zeros((self.rows, n), dtype=np.float32)
+
+    def update(self, state: np.ndarray, counts: np.ndarray, steps: int, vec: np.ndarray, hit: np.ndarray,
+               full: bool) -> None:
+        if full:
+            state[0] += (vec - state[0]) / counts
+        else:
+            state[0, hit] += (vec[hit] - state[0, hit]) / counts[hit]
+
+    def value(self, state: np.ndarray, counts: np.ndarray, steps: int) -> np.ndarray:
+        return state[0]
+
+
+class EmaAggregator(MeanAggregator):
+    """rows: decayed score sum, decayed weight sum (bias correction for short conversations)."""
+
+    name = "ema"
+    rows = 2
+
+    def __init__(self, half_life: float = 3.0):
+        self.half_life = max(1e-3, float(half_life))
+        self.alpha = np.float32(1.0 - 0.5 ** (1.0 / self.half_life))
+
+    @property
+    def key(self) -> str:
+        return f"ema:{self.half_life:g}"
+
+    def update(self, state, counts, steps, vec, hit, full) -> None:
+        # a label not reported this turn decays in both rows, so its value stays put
+        state *= 1.0 - self.alpha
+        if full:
+            state[0] += self.alpha * vec
+            state[1] += self.alpha
+        else:
+            state[0, hit] += self.alpha * vec[hit]
+            state[1, hit] += self.alpha
+
+    def value(self, state, counts, steps) -> np.ndarray:
+        w = state[1]
+        return np.divide(state[0], w, out=np.zeros_like(w), where=w > 0)
+
+
+class WindowAggregator(MeanAggregator):
+    """rows: running sum of the window, then the last `window` turn vectors as a ring."""
+
+    name = "window"
+
+    def __init__(self, window: int = 5):
+        self.window = max(1, int(window))
+        self.rows = self.window + 1
+
+    @property
+    def key(self) -> str:
+        return f"window:{self.window}"
+
+    def update(self, state, counts, steps, vec, hit, full) -> None:
+        x = vec if full else np.where(hit, vec, np.float32(0.0))
+        slot = 1 + (steps - 1) % self.window
+        state[0] += x - state[slot]
+        state[slot] = x
+
+    def value(self, state, counts, steps) -> np.ndarray:
+        return state[0] / max(1, min(steps, self.window))
+
+
+class MaxAggregator(MeanAggregator):
+    name = "max"
+
+    def update(self, state, counts, steps, vec, hit, full) -> None:
+        # fmax ignores NaN, i.e. labels not reported this turn
+        np.fmax(state[0], vec, out=state[0])
+
+
+AGGREGATORS = ("ema", "mean", "window", "max")
+
+
+def make_aggregator(name: str = "ema", half_life: float = 3.0, window: int = 5):
+    name = (name or "ema").strip().lower()
+    if name == "ema":
+        return EmaAggregator(half_life)
+    if name == "mean":
+        return MeanAggregator()
+    if name == "window":
+        return WindowAggregator(window)
+    if name == "max":
+        return MaxAggregator()
+    raise ValueError(f"Unknown EMOTION_AGGREGATION '{name}', expected one of {AGGREGATORS}")
+
+
+def aggregator_from_env():
+    return make_aggregator(
+        os.getenv("EMOTION_AGGREGATION") or "ema",
+        half_life=float(os.getenv("EMOTION_HALF_LIFE", "3")),
+        window=int(os.getenv("EMOTION_WINDOW", "5")),
+    )
+
+
+def top_k(values: np.ndarray, counts: np.ndarray, labels: Sequence[str], k: int) -> List[Tuple[str, float]]:
+    """best k (label, value) among labels reported at least once, highest first; partial selection, no full sort."""
+    reported = counts > 0
+    n = int(np.count_nonzero(reported))
+    k = min(k, n)
+    if k <= 0:
+        return []
+    vals = np.where(reported, values, -np.inf)
+    if k < len(vals):
+        # every label scoring at least the k-th best, so ties at the cut keep label order
+        kth = -np.partition(-vals, k - 1)[k - 1]
+        idx = np.flatnonzero(vals >= kth)
+    else:
+        idx = np.arange(len(vals))
+    # stable: ties keep label order, as the stable sort over the label dict did
+    idx = idx[np.argsort(-vals[idx], kind="stable")][:k]
+    return [(labels[i], float(vals[i])) for i in idx.tolist()]
+
+
+if __name__ == "__main__":
+    # per-turn cost: re-averaging every stored turn + full sort (the old path) vs one vector update + partial top-k
+    import time
+
+    from dl.label_manifest import GOEMOTIONS_LABELS
+
+    labels = list(GOEMOTIONS_LABELS)
+    n = len(labels)
+    rng = np.random.default_rng(0)
+    turns = [rng.random(n, dtype=np.float32) for _ in range(200)]
+    dicts = [dict(zip(labels, v.tolist())) for v in turns]
+    all_hit = np.ones(n, dtype=bool)
+
+    def legacy(t):
+        lists = {e: [] for e in labels}
+        for d in dicts[:t]:
+            for e, v in d.items():
+                lists[e].append(v)
+        start = time.perf_counter()
+        lists_sum = {e: sum(v) / len(v) for e, v in lists.items()}
+        [e for e, _ in sorted(lists_sum.items(), key=lambda x: x[1], reverse=True)][:3]
+        return time.perf_counter() - start
+
+    print(f"{'turns':>6} {'old mean+sort':>14} " + " ".join(f"{a:>10}" for a in AGGREGATORS) + "   (us per turn)")
+    for t in (5, 50, 200):
+        row = [1e6 * legacy(t)]
+        for name in AGGREGATORS:
+            agg = make_aggregator(name)
+            state, counts = agg.init(n), np.zeros(n, dtype=np.uint32)
+            start = time.perf_counter()
+            for i, v in enumerate(turns[:t]):
+                counts += 1
+                agg.update(state, counts, i + 1, v, all_hit, True)
+                top_k(agg.value(state, counts, i + 1), counts, labels, 3)
+            row.append(1e6 * (time.perf_counter() - start) / t)
+        print(f"{t:6d} {row[0]:14.1f} " + " ".join(f"{x:10.1f}" for x in row[1:]))
+
+    # how fast each aggregator follows a mood change: 5 joyful turns, then sad ones
+    joy, sad = labels.index("joy"), labels.index("sadness")
+    for name in AGGREGATORS:
+        agg = make_aggregator(name)
+        state, counts = agg.init(n), np.zeros(n, dtype=np.uint32)
+        flips = None
+        for i in range(15):
+            v = np.full(n, 0.05, dtype=np.float32)
+            v[joy if i < 5 else sad] = 0.9
+            counts += 1
+            agg.update(state, counts, i + 1, v, all_hit, True)
+            if flips is None and i >= 5 and top_k(agg.value(state, counts, i + 1), counts, labels, 1)[0][0] == "sadness":
+                flips = i - 4
+        print(f"{name:7}: " + (f"dominant emotion switches to sadness after {flips} sad turn(s)" if flips
+                               else "dominant emotion stays joy (equal peaks)"))
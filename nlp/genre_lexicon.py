@@ -0,0 +1,165 @@
+"""
+genre lexicon built from the KG label file and the synonym table.
+
+- kg/data/genre_labels.ttl   : emo:Genre rdfs:label "Label" .
+- kg/data/genre_synonyms.json: { "emo:Genre": ["synonym", ...] }
+
+every label, local name and synonym is compiled into one PhraseMatcher, so
+finding genre mentions is a single pass that returns ranked genre hits.
+the index is rebuilt when either source file changes on disk.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from nlp.phrase_matcher import PhraseHit, PhraseMatcher, normalize_phrase
+
+GENRE_LABELS_PATH = "kg/data/genre_labels.ttl"
+GENRE_SYNONYMS_PATH = "kg/data/genre_synonyms.json"
+
+#an explicit genre name counts more than a loose synonym ("horror" vs "dark")
+LABEL_WEIGHT = 2.0
+SYNONYM_WEIGHT = 1.0
+
+FALLBACK_LABELS = {
+    "emo:Comedy": "Comedy",
+    "emo:Drama": "Drama",
+    "emo:Horror": "Horror",
+    "emo:Action": "Action",
+    "emo:Family": "Family",
+}
+
+logger = logging.getLogger("nlp")
+
+
+class GenreHit(NamedTuple):
+    curie: str
+    score: float
+    first_pos: int
+    phrases: tuple
+
+
+def _camel_to_words(name: str) -> str:
+    s = re.sub(r"([a-z])([A-Z])", r"\1 \2", name)
+    return re.sub(r"[^a-zA-Z0-9 ]", " ", s).strip()
+
+
+def rank_mentions(mentions: Iterable[PhraseHit]) -> List[GenreHit]:
+    """phrase occurrences -> one GenreHit per genre, ranked by summed weight, then by first mention."""
+    acc: Dict[str, list] = {}
+    for h in mentions:
+        curie, weight = h.payload
+        entry = acc.setdefault(curie, [0.0, h.start, []])
+        entry[0] += weight
+        entry[2].append(h.phrase)
+    hits = [GenreHit(c, s, pos, tuple(ph)) for c, (s, pos, ph) in acc.items()]
+    hits.sort(key=lambda g: (-g.score, g.first_pos))
+    return hits
+
+
+class GenreLexicon:
+    def __init__(self, labels_path: str = GENRE_LABELS_PATH, synonyms_path: str = GENRE_SYNONYMS_PATH,
+                 check_interval: float = 2.0):
+        self.labels_path = labels_path
+        self.synonyms_path = synonyms_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._next_check = 0.0
+        self._labels: Dict[str, str] = {}
+        self._matcher = PhraseMatcher([])
+        self.reloads = 0
+        self._maybe_reload(force=True)
+
+    def _stat(self):
+        out = []
+        for p in (self.labels_path, self.synonyms_path):
+            try:
+                out.append(os.stat(p).st_mtime_ns)
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            if not force and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            mtimes = self._stat()
+            if not force and mtimes == self._mtimes:
+                return
+            self._build()
+            self._mtimes = mtimes
+            self.reloads += 1
+
+    def _read_labels(self) -> Dict[str, str]:
+        labels = {}
+        try:
+            with open(self.labels_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    m = re.search(r"emo:(\w+)\s+rdfs:label\s+\"([^\"]+)\"", line.strip())
+                    if m:
+                        labels[f"emo:{m.group(1)}"] = m.group(2)
+        except OSError as e:
+            logger.warning(f"Genre labels unavailable ({e}); using fallback labels")
+        return labels or dict(FALLBACK_LABELS)
+
+    def _read_synonyms(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.synonyms_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Genre synonyms unavailable ({e})")
+            return {}
+        return {curie: [s for s in syns if isinstance(s, str)] for curie, syns in data.items() if isinstance(syns, list)}
+
+    def _build(self) -> None:
+        labels = self._read_labels()
+        entries = []
+        for curie, label in labels.items():
+            local = curie.split(":", 1)[1]
+            for form in {normalize_phrase(label), normalize_phrase(_camel_to_words(local))}:
+                entries.append((form, (curie, LABEL_WEIGHT)))
+        for curie, syns in self._read_synonyms().items():
+            for syn in syns:
+                entries.append((syn, (curie, SYNONYM_WEIGHT)))
+        self._labels = labels
+        self._matcher = PhraseMatcher(entries)
+
+    def labels(self) -> Dict[str, str]:
+        """-> { curie: label } for the genre classes known to the KG."""
+        self._maybe_reload()
+        return self._labels
+
+    def mentions(self, text: str) -> List[PhraseHit]:
+        """-> every genre phrase occurrence in the normalized text; payload is (curie, weight)."""
+        self._maybe_reload()
+        out, seen = [], set()
+        for h in self._matcher.finditer(normalize_phrase(text)):
+            if (h.payload[0], h.start) not in seen:
+                seen.add((h.payload[0], h.start))
+                out.append(h)
+        return out
+
+    def match(self, text: str) -> List[GenreHit]:
+        """-> genre hits ranked by score, then by first mention."""
+        return rank_mentions(self.mentions(text))
+
+    def best(self, text: str) -> Optional[str]:
+        hits = self.match(text)
+        return hits[0].curie if hits else None
+
+
+GENRE_LEXICON = GenreLexicon()
+
+
+if __name__ == "__main__":
+    for s in ["something scary but funny", "a sci-fi romcom for date night", "film noir or a whodunit", "idk"]:
+        print(f"{s!r:40} -> {[(h.curie, h.score) for h in GENRE_LEXICON.match(s)]}")
@@ -0,0 +1,297 @@
+"""
+slot -> genre weighting for /chat recommendations.
+
+the follow-up answers steer genres through two declarative tables:
+- GENRE_RULES  : slot -> value -> {genre: weight delta}
+- GENRE_BLOCKS : slot -> value -> genres ruled out entirely; they leave the
+                 ranked list and the query weights, and movies carrying them
+                 are filtered out of the candidates (store and movie index)
+
+GenreWeighter compiles both into a (slot value x genre) delta matrix and a
+boolean block matrix over the KG genre classes, so weighting a session is
+one vector sum over the rows of its active slot values plus the emotion seed
+and the genre named in the message. results are memoized per distinct
+(slot values, emotion individual, genre hint) combination. rules naming a
+genre the KG does not know are skipped instead of raising.
+"""
+import re
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from nlp.emotion_genre_map import EMOTION_TO_GENRES
+from nlp.genre_lexicon import GENRE_LEXICON, rank_mentions
+from nlp.phrase_matcher import normalize_phrase
+from nlp.slot_lexicon import SLOT_MATCHER
+
+# every KG genre starts here; the tables below move it up or down
+BASE_WEIGHT = 1.0
+# genres the dominant emotion's ontology individual maps to
+SEED_BOOST = 0.2
+# genre named in the user's message ("something with horror"), see extract_genre_hint
+HINT_BOOST = 1.0
+
+GENRE_RULES: Dict[str, Dict[str, Dict[str, float]]] = {
+    "desired_outcome": {
+        "get_excited": {"emo:Action": 0.8, "emo:Thriller": 0.8, "emo:SciFi": 0.8},
+        "feel_better": {"emo:Comedy": 0.8, "emo:Family": 0.8, "emo:Romance": 0.8},
+        "process_feelings": {"emo:Drama": 0.8, "emo:Documentary": 0.8},
+    },
+    "intensity_style": {
+        "adrenaline": {"emo:Action": 0.7, "emo:Thriller": 0.7, "emo:Adventure": 0.7},
+        "suspense": {"emo:Thriller": 0.7, "emo:Mystery": 0.7, "emo:Crime": 0.7},
+        "dark": {"emo:Horror": 0.7, "emo:Crime": 0.7, "emo:FilmNoir": 0.7},
+    },
+    "comfort_style": {
+        "uplifting": {"emo:Comedy": 0.7, "emo:Family": 0.7, "emo:Romance": 0.7},
+        "heartwarming": {"emo:Family": 0.6, "emo:Romance": 0.6, "emo:Drama": 0.6},
+        "calm": {"emo:Drama": 0.5, "emo:Documentary": 0.5, "emo:Fantasy": 0.5},
+    },
+    "cognitive_load": {
+        "escapist": {"emo:Fantasy": 0.6, "emo:Comedy": 0.6, "emo:Adventure": 0.6},
+        "thoughtful": {"emo:Drama": 0.6, "emo:Mystery": 0.6, "emo:Documentary": 0.6},
+    },
+    "pace_preference": {
+        "fast": {"emo:Action": 0.6, "emo:Thriller": 0.6, "emo:Adventure": 0.6},
+        "slow": {"emo:Drama": 0.6, "emo:Mystery": 0.6, "emo:Western": 0.6},
+    },
+    "violence_tolerance": {
+        "none": {"emo:Action": -0.7, "emo:Crime": -0.7, "emo:War": -0.7, "emo:Horror": -0.7},
+        "mild": {"emo:Action": -0.3, "emo:Crime": -0.3, "emo:War": -0.3, "emo:Horror": -0.3},
+    },
+    "usual_preference": {
+        "family_friendly": {"emo:Family": 0.8, "emo:Animation": 0.8, "emo:Comedy": 0.8},
+        "action_packed": {"emo:Action": 0.8, "emo:Adventure": 0.8, "emo:Thriller": 0.8},
+        "thoughtful": {"emo:Drama": 0.8, "emo:Mystery": 0.8, "emo:Documentary": 0.8},
+    },
+    "music_tone": {
+        "uplifting": {"emo:Musical": 0.6, "emo:Romance": 0.6, "emo:Family": 0.6, "emo:Comedy": 0.6},
+        "somber": {"emo:Drama": 0.6, "emo:FilmNoir": 0.6},
+        "intense": {"emo:Action": 0.6, "emo:Thriller": 0.6},
+    },
+}
+
+_HARSH = ["emo:Horror", "emo:War", "emo:Crime"]
+
+GENRE_BLOCKS: Dict[str, Dict[str, List[str]]] = {
+    # comfort-first conversations
+    "emotion_direction": {"comforting": _HARSH},
+    "desired_outcome": {"feel_better": _HARSH},
+    "comfort_style": {"calm": _HARSH, "heartwarming": _HARSH},
+    "content_sensitivity": {
+        "avoid_horror": ["emo:Horror"],
+        "avoid_drama": ["emo:Drama"],
+        "avoid_violence": ["emo:Action", "emo:Crime", "emo:War"],
+    },
+}
+
+
+# a genre mention after one of these, in the same clause, is something the user wants less of
+_NEGATION_RE = re.compile(
+    r"\b(?:no|not|non|nothing|none|without|avoid|avoiding|skip|never|except|hate|dislike|"
+    r"don[’']?t|do not|doesn[’']?t|isn[’']?t|anything but|rather not|less|too much)\b"
+)
+# clause boundaries: "no horror, but comedy" / "no horror but a comedy"
+_CLAUSE_RE = re.compile(r"[,.;:!?]|\b(?:but|instead|rather)\b")
+
+
+def _negated(text: str, start: int) -> bool:
+    clause = _CLAUSE_RE.split(text[:start])[-1]
+    return _NEGATION_RE.search(clause) is not None
+
+
+def extract_genre_hint(text: str) -> Optional[str]:
+    """
+    genre the message asks for, if any. mentions under a negation ("no horror",
+    "nothing dark") or inside a content_sensitivity answer, and genres that
+    the message's own slot answers block, never count as a request.
+    """
+    norm = normalize_phrase(text)
+    mentions = GENRE_LEXICON.mentions(norm)
+    if not mentions:
+        return None
+    avoided = set()
+    spans = []
+    for h in SLOT_MATCHER.find_all(norm):
+        blocked = GENRE_BLOCKS.get(h.slot, {}).get(h.value)
+        if blocked:
+            avoided.update(blocked)
+            spans.append((h.start, h.end))
+    wanted = [
+        m for m in mentions
+        if m.payload[0] not in avoided
+        and not any(s < m.end and m.start < e for s, e in spans)
+        and not _negated(norm, m.start)
+    ]
+    hits = rank_mentions(wanted)
+    return hits[0].curie if hits else None
+
+
+class GenreProfile(NamedTuple):
+    weights: Mapping[str, float]  # {curie: weight} for every KG genre, blocked ones at 0
+    ranked: Tuple[str, ...]       # positive-weight genres, genre hint first, then by weight
+    blocked: Tuple[str, ...]
+
+
+class GenreWeighter:
+    def __init__(self, genres: Iterable[str], rules: Dict[str, Dict[str, Dict[str, float]]] = GENRE_RULES,
+                 blocks: Dict[str, Dict[str, List[str]]] = GENRE_BLOCKS, memo_size: int = 4096):
+        self.genres = sorted(set(genres))
+        self._col = {g: i for i, g in enumerate(self.genres)}
+        self._row: Dict[Tuple[str, str], int] = {}
+        for table in (rules, blocks):
+            for slot, values in table.items():
+                for value in values:
+                    self._row.setdefault((slot, value), len(self._row))
+        n, m = len(self._row), len(self.genres)
+        self.deltas = np.zeros((n, m), dtype=np.float32)
+        self.blocks = np.zeros((n, m), dtype=bool)
+        for slot, values in rules.items():
+            for value, adj in values.items():
+                for g, d in adj.items():
+                    if g in self._col:
+                        self.deltas[self._row[(slot, value)], self._col[g]] += d
+        for slot, values in blocks.items():
+            for value, gs in values.items():
+                for g in gs:
+                    if g in self._col:
+                        self.blocks[self._row[(slot, value)], self._col[g]] = True
+        self.slots = frozenset(s for s, _ in self._row)
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[tuple, GenreProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, slots: Mapping[str, object], individual: Optional[str] = None,
+            hint: Optional[str] = None) -> tuple:
+        active = tuple(sorted((s, v) for s, v in slots.items() if s in self.slots and isinstance(v, str)))
+        return active, individual or None, hint if hint in self._col else None
+
+    def vector(self, slots: Mapping[str, object], individual: Optional[str] = None,
+               hint: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """-> (weights, blocked mask) in `genres` order, computed without the memo."""
+        active, individual, hint = self.key(slots, individual, hint)
+        rows = [self._row[sv] for sv in active if sv in self._row]
+        w = self.deltas[rows].sum(axis=0) + np.float32(BASE_WEIGHT)
+        blocked = self.blocks[rows].any(axis=0)
+        seed = [self._col[g] for g in EMOTION_TO_GENRES.get(individual or "", []) if g in self._col]
+        w[seed] += np.float32(SEED_BOOST)
+        if hint is not None:
+            w[self._col[hint]] += np.float32(HINT_BOOST)
+        w[blocked] = 0.0
+        return w, blocked
+
+    def profile(self, slots: Mapping[str, object], individual: Optional[str] = None,
+                hint: Optional[str] = None) -> GenreProfile:
+        key = self.key(slots, individual, hint)
+        with self._lock:
+            hit = self._memo.get(key)
+            if hit is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return hit
+        w, blocked = self.vector(slots, individual, hint)
+        # stable: equal weights keep genre order
+        order = np.argsort(-w, kind="stable")
+        ranked = [self.genres[i] for i in order.tolist() if w[i] > 0]
+        hint = key[2]
+        if hint is not None and hint in ranked:
+            ranked.remove(hint)
+            ranked.insert(0, hint)
+        out = GenreProfile(
+            MappingProxyType({g: round(float(x), 4) for g, x in zip(self.genres, w.tolist())}),
+            tuple(ranked),
+            tuple(g for g, b in zip(self.genres, blocked.tolist()) if b),
+        )
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = out
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"genres": len(self.genres), "slot_values": len(self._row), "memoized": len(self._memo),
+                    "hits": self.hits, "misses": self.misses}
+
+
+_WEIGHTER: Optional[GenreWeighter] = None
+_WEIGHTER_LABELS = None
+_WEIGHTER_LOCK = threading.Lock()
+
+
+def get_genre_weighter() -> GenreWeighter:
+    """weighter over the current KG genre classes; recompiled when the genre lexicon reloads."""
+    global _WEIGHTER, _WEIGHTER_LABELS
+    labels = GENRE_LEXICON.labels()
+    if labels is not _WEIGHTER_LABELS:
+        with _WEIGHTER_LOCK:
+            if labels is not _WEIGHTER_LABELS:
+                _WEIGHTER = GenreWeighter(labels.keys())
+                _WEIGHTER_LABELS = labels
+    return _WEIGHTER
+
+
+def genre_profile(slots: Mapping[str, object], individual: Optional[str] = None,
+                  hint: Optional[str] = None) -> GenreProfile:
+    return get_genre_weighter().profile(slots, individual, hint)
+
+
+if __name__ == "__main__":
+    # per-request dict updates (the old cascade, driven by the same table) vs one matrix row sum vs the memoized profile, over random slot combinations;
+    # also checks the tables reproduce the cascade's weights wherever nothing is blocked
+    import itertools
+    import random
+    import time
+
+    weighter = get_genre_weighter()
+    genres = weighter.genres
+    individuals = list(EMOTION_TO_GENRES)[:8] + [None]
+
+    def legacy(slots, individual):
+        weights = {g: 1.0 for g in genres}
+        for slot, values in GENRE_RULES.items():
+            v = slots.get(slot)
+            for g, d in values.get(v, {}).items():
+                if g in weights:
+                    weights[g] += d
+        for g in EMOTION_TO_GENRES.get(individual or "", []):
+            if g in weights:
+                weights[g] += 0.2
+        return [g for g, w in sorted(weights.items(), key=lambda x: x[1], reverse=True) if w > 0], weights
+
+    choices = {s: list(v) + [None] for s, v in GENRE_RULES.items()}
+    choices["emotion_direction"] = ["comforting", "intense", None]
+    choices["content_sensitivity"] = ["avoid_horror", "avoid_drama", "avoid_violence", None]
+    rng = random.Random(0)
+    combos = [({s: rng.choice(v) for s, v in choices.items()}, rng.choice(individuals)) for _ in range(200)]
+    requests = [rng.choice(combos) for _ in range(20000)]
+    total = 1
+    for v in choices.values():
+        total *= len(v)
+    print(f"{len(weighter._row)} slot values x {len(genres)} genres, {total * len(individuals)} possible combinations")
+
+    for slots, ind in combos:
+        _, old = legacy(slots, ind)
+        p = weighter.profile(slots, ind)
+        for g, w in p.weights.items():
+            if g not in p.blocked:
+                assert abs(w - old[g]) < 1e-4, (slots, ind, g, w, old[g])
+        assert not set(p.ranked) & set(p.blocked)
+
+    for name, fn in [("dict updates", lambda s, i: legacy(s, i)),
+                     ("matrix sum", lambda s, i: weighter.vector(s, i)),
+                     ("memoized profile", lambda s, i: weighter.profile(s, i))]:
+        t0 = time.perf_counter()
+        for slots, ind in requests:
+            fn(slots, ind)
+        print(f"{name:17}: {1e6 * (time.perf_counter() - t0) / len(requests):6.2f} us/request")
+    print(weighter.stats())
+    for slots, ind in itertools.islice(combos, 2):
+        p = weighter.profile(slots, ind, hint="emo:Comedy")
+        print({k: v for k, v in slots.items() if v}, "->", list(p.ranked[:5]), "blocked", list(p.blocked))
@@ -0,0 +1,88 @@
+"""
+compiled multi-phrase matcher.
+
+all phrases are compiled into one trie-shaped regex (longest alternative
+first, with word boundaries) that is scanned as a lookahead, so a single pass
+over the text reports every phrase occurrence with its position, including
+phrases that overlap or share a start ("slow" inside "slow burn").
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple
+
+
+class PhraseHit(NamedTuple):
+    phrase: str
+    payload: Any
+    start: int
+    end: int
+
+
+def normalize_phrase(s: str) -> str:
+    return re.sub(r"\s+", " ", s.strip().lower())
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """regex for a set of phrases with shared prefixes factored out, so matching is one walk per position."""
+    trie: dict = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        # greedy branches first so the longest phrase is tried before its prefixes
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    def __init__(self, entries: Iterable[tuple]):
+        """
+        entries : iterable of (phrase, payload); a phrase may carry several payloads.
+        """
+        self._payloads: Dict[str, List[Any]] = {}
+        for phrase, payload in entries:
+            p = normalize_phrase(phrase)
+            if p:
+                self._payloads.setdefault(p, []).append(payload)
+
+        phrases = sorted(self._payloads, key=len, reverse=True)
+        # each phrase also implies the shorter phrases that start with it and end on a word boundary
+        self._expanded: Dict[str, List[tuple]] = {}
+        for p in phrases:
+            implied = [p] + [q for q in phrases if q != p and p.startswith(q) and not p[len(q)].isalnum()]
+            self._expanded[p] = [(q, payload, len(q)) for q in implied for payload in self._payloads[q]]
+        self._regex = None
+        if phrases:
+            self._regex = re.compile(rf"(?<!\w)(?=({_trie_pattern(phrases)})(?!\w))")
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def payloads(self, text: str) -> Iterator[Any]:
+        """-> payloads of every occurrence in the normalized text, without position bookkeeping."""
+        if self._regex is None:
+            return
+        for m in self._regex.finditer(text):
+            for _, payload, _ in self._expanded[m.group(1)]:
+                yield payload
+
+    def finditer(self, text: str) -> List[PhraseHit]:
+        """-> every (phrase, payload) occurrence in the normalized text, in text order."""
+        if self._regex is None:
+            return []
+        hits = []
+        for m in self._regex.finditer(text):
+            start = m.start(1)
+            for p, payload, n in self._expanded[m.group(1)]:
+                hits.append(PhraseHit(p, payload, start, start + n))
+        return hits
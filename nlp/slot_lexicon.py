@@ -0,0 +1,163 @@
+"""
+follow-up slot lexicon and its compiled matcher.
+
+SLOT_LEXICON maps slot -> value -> trigger phrases. it is compiled once into
+a PhraseMatcher, so interpreting an answer is a single regex pass that
+returns every (slot, value) hit with its position.
+
+priority follows the lexicon order: earlier slots, then earlier values, win.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from nlp.phrase_matcher import PhraseMatcher, normalize_phrase
+
+SLOT_LEXICON: Dict[str, Dict[str, List[str]]] = {
+    "emotion_direction": {
+        "comforting": [
+            "comfort", "comforting", "soft", "light", "happy", "calm", "gentle",
+            "soothing", "feel better", "uplifting", "positive", "warm",
+            "heartwarming", "wholesome"
+        ],
+        "intense": [
+            "intense", "dark", "thrill", "thrilling", "scary", "horror",
+            "action", "sad", "dramatic", "serious", "heavy"
+        ],
+    },
+    "desired_outcome": {
+        "feel_better": ["feel better", "lift mood", "uplift", "cheer up"],
+        "process_feelings": ["process feelings", "reflect", "think", "ponder"],
+        "get_excited": ["get excited", "pump", "adrenaline", "thrill"],
+    },
+    "era_preference": {
+        "classic": ["classic", "older", "vintage", "retro"],
+        "modern": ["modern", "newer", "recent", "contemporary"],
+    },
+    "content_sensitivity": {
+        "avoid_horror": ["avoid horror", "no horror", "not horror"],
+        "avoid_drama": ["avoid drama", "no drama", "not drama", "heavy"],
+        "avoid_violence": ["avoid violence", "no violence", "not violent", "no action"],
+    },
+    "intensity_style": {
+        "adrenaline": ["adrenaline", "adrenaline pumping", "pump", "exciting", "high octane"],
+        "suspense": ["suspense", "tense", "edge of seat", "thriller"],
+        "dark": ["dark", "edgy", "grisly", "grim", "horror"],
+    },
+    "comfort_style": {
+        "uplifting": ["uplifting", "feel good", "cheer up", "positive"],
+        "heartwarming": ["heartwarming", "warm", "wholesome"],
+        "calm": ["calm", "soothing", "relaxing", "low stakes", "calming", "gentle"],
+    },
+    "pace_preference": {
+        "fast": ["fast", "fast paced", "quick", "rapid"],
+        "slow": ["slow", "slow burn", "steady"],
+    },
+    "violence_tolerance": {
+        "none": ["no violence", "avoid violence"],
+        "mild": ["mild", "some", "a little"],
+        "strong": ["strong", "high", "ok with violence"],
+    },
+    "usual_preference": {
+        "family_friendly": ["family friendly", "family‑friendly", "family", "kids", "wholesome"],
+        "action_packed": ["action packed", "action‑packed", "explosive", "high octane", "stunts"],
+        "thoughtful": ["thoughtful", "layered", "reflective", "serious drama", "slow burn"],
+    },
+    "music_tone": {
+        "uplifting": ["uplifting", "feel good", "cheerful", "bright"],
+        "somber": ["somber", "melancholy", "sad", "dark score"],
+        "intense": ["intense", "tense", "driving", "heavy"],
+    },
+}
+
+# "no preference" answers only count when they reply to that slot's question
+NO_PREFERENCE_PHRASES = ["either", "no preference", "anything", "tell me", "idk", "dont know"]
+NO_PREFERENCE_VALUES: Dict[str, str] = {
+    "content_sensitivity": "none",
+    "comfort_style": "none",
+    "pace_preference": "none",
+    "violence_tolerance": "none_opt",
+}
+
+
+class SlotHit(NamedTuple):
+    slot: str
+    value: str
+    start: int
+    end: int
+    rank: Tuple[int, int]
+    pending_only: bool
+
+
+class SlotMatcher:
+    def __init__(self, lexicon: Dict[str, Dict[str, List[str]]] = SLOT_LEXICON,
+                 no_preference: Dict[str, str] = NO_PREFERENCE_VALUES,
+                 no_preference_phrases: List[str] = NO_PREFERENCE_PHRASES):
+        entries = []
+        for si, (slot, values) in enumerate(lexicon.items()):
+            for vi, (value, words) in enumerate(values.items()):
+                for w in words:
+                    entries.append((w, (slot, value, (si, vi), False)))
+        slot_index = {slot: si for si, slot in enumerate(lexicon)}
+        for slot, value in no_preference.items():
+            rank = (slot_index.get(slot, len(slot_index)), len(lexicon.get(slot, {})))
+            for w in no_preference_phrases:
+                entries.append((w, (slot, value, rank, True)))
+        self._matcher = PhraseMatcher(entries)
+
+    def find_all(self, text: str) -> List[SlotHit]:
+        """-> every distinct (slot, value) hit in the text with its character span."""
+        hits, seen = [], set()
+        for h in self._matcher.finditer(normalize_phrase(text)):
+            slot, value, rank, pending_only = h.payload
+            if (slot, value, h.start) in seen:
+                continue
+            seen.add((slot, value, h.start))
+            hits.append(SlotHit(slot, value, h.start, h.end, rank, pending_only))
+        return hits
+
+    def match_slot(self, text: str, slot_id: str) -> Optional[str]:
+        """best value for one slot, including its "no preference" answers."""
+        best = None
+        for slot, value, rank, _ in self._matcher.payloads(normalize_phrase(text)):
+            if slot == slot_id and (best is None or rank < best[0]):
+                best = (rank, value)
+        return best[1] if best else None
+
+    def match_any(self, text: str) -> Optional[Tuple[str, str]]:
+        """best (slot, value) across all slots, ignoring pending-only answers."""
+        best = None
+        for slot, value, rank, pending_only in self._matcher.payloads(normalize_phrase(text)):
+            if not pending_only and (best is None or rank < best[0]):
+                best = (rank, slot, value)
+        return (best[1], best[2]) if best else None
+
+
+SLOT_MATCHER = SlotMatcher()
+
+
+if __name__ == "__main__":
+    #microbenchmark: rebuilding the nested dict + substring scans per call vs one compiled pass
+    import timeit
+
+    samples = [
+        "idk", "comforting", "fast", "no violence", "something slow burn and thoughtful please",
+        "i want a high octane thriller with no horror", "honestly anything with a dark score",
+    ]
+
+    def legacy_detect(text):
+        # stands in for the nested dict literal the old handlers rebuilt on every call
+        synonyms = {k: {v: list(ws) for v, ws in opts.items()} for k, opts in SLOT_LEXICON.items()}
+        t = normalize_phrase(text)
+        for slot_id, opts in synonyms.items():
+            for value, words in opts.items():
+                if any(w in t for w in words):
+                    return (slot_id, value)
+        return None
+
+    n = 5000
+    legacy = timeit.timeit(lambda: [legacy_detect(s) for s in samples], number=n)
+    compiled = timeit.timeit(lambda: [SLOT_MATCHER.match_any(s) for s in samples], number=n)
+    per_call = lambda secs: 1e6 * secs / (n * len(samples))
+    print(f"legacy   : {per_call(legacy):8.2f} us/call")
+    print(f"compiled : {per_call(compiled):8.2f} us/call ({legacy / compiled:.1f}x)")
+    for s in samples:
+        print(f"{s!r:50} -> {SLOT_MATCHER.match_any(s)}  all={[(h.slot, h.value, h.start) for h in SLOT_MATCHER.find_all(s)]}")
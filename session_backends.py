@@ -0,0 +1,322 @@
+"""
+external session backends, so several API workers / replicas share conversations.
+
+a backend stores opaque session blobs (see session_state.encode_session)
+under a session id, with an idle TTL:
+
+- SqliteSessionBackend: one SQLite file (WAL) shared by the workers of a node
+- RedisSessionBackend : any Redis-protocol server, through the small RESP
+                        client below (no redis package needed)
+- StandInRespServer   : in-process RESP server speaking the handful of
+                        commands the backend uses; a local stand-in for Redis
+
+    SESSION_BACKEND = memory (default) | sqlite | redis
+    SESSION_SQLITE_PATH = data/cache/sessions.sqlite
+    SESSION_REDIS_URL   = redis://localhost:6379/0
+
+    python session_backends.py --serve 6380   # run the stand-in
+"""
+import logging
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_SQLITE_PATH = "data/cache/sessions.sqlite"
+KEY_PREFIX = "emo:session:"
+
+logger = logging.getLogger("api")
+
+
+class SqliteSessionBackend:
+    name = "sqlite"
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self._next_purge = 0.0
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE id = ? AND (expires IS NULL OR expires > ?)", (session_id, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def save(self, session_id: str, data: bytes, ttl: Optional[float]) -> None:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                         (session_id, sqlite3.Binary(data), now + ttl if ttl else None))
+            if now >= self._next_purge:
+                # idle sessions are swept here instead of on every read
+                self._next_purge = now + 60.0
+                conn.execute("DELETE FROM sessions WHERE expires IS NOT NULL AND expires <= ?", (now,))
+
+    def delete(self, session_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self) -> dict:
+        n = self._conn().execute("SELECT COUNT(*) FROM sessions WHERE expires IS NULL OR expires > ?",
+                                 (time.time(),)).fetchone()[0]
+        return {"backend": self.name, "path": self.path, "stored": int(n)}
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    """
+    minimal blocking Redis-protocol client: one socket, one command in flight
+    (guarded by a lock), reconnects once when the connection drops.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 2.0):
+        self.host, self.port, self.db, self.password, self.timeout = host, port, db, password, timeout
+        self._sock = None
+        self._buf = None
+        self._lock = threading.Lock()
+        self.round_trips = 0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 2.0) -> "RespClient":
+        u = urlparse(url)
+        db = int((u.path or "/0").lstrip("/") or 0)
+        return cls(u.hostname or "localhost", u.port or 6379, db, u.password, timeout)
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buf = self._sock.makefile("rb")
+        if self.password:
+            self._call(("AUTH", self.password))
+        if self.db:
+            self._call(("SELECT", self.db))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.close()
+                finally:
+                    self._sock = self._buf = None
+
+    @staticmethod
+    def _pack(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        return b"".join(out)
+
+    def _read(self):
+        line = self._buf.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RespError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = self._buf.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RespError(f"unexpected reply {line!r}")
+
+    def _call(self, args):
+        self._sock.sendall(self._pack(args))
+        return self._read()
+
+    def execute(self, *args):
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self.round_trips += 1
+                    return self._call(args)
+                except (ConnectionError, OSError):
+                    self._sock = self._buf = None
+                    if attempt:
+                        raise
+
+
+class RedisSessionBackend:
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = KEY_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self.client = RespClient.from_url(url)
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        return self.client.execute("GET", self.prefix + session_id)
+
+    def save(self, session_id: str, data: bytes, ttl: Optional[float]) -> None:
+        args = ["SET", self.prefix + session_id, data]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        self.client.execute(*args)
+
+    def delete(self, session_id: str) -> None:
+        self.client.execute("DEL", self.prefix + session_id)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "url": self.url, "round_trips": self.client.round_trips}
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class StandInRespServer:
+    """
+    threaded in-process server for GET / SET [EX|PX] / DEL / EXISTS / PING / DBSIZE / FLUSHALL / SELECT,
+    enough for RedisSessionBackend when no Redis is around.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        args = server._read_command(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    self.wfile.write(server._dispatch(args))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def start(self) -> "StandInRespServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _read_command(rfile) -> Optional[List[bytes]]:
+        line = rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:-2])):
+            n = int(rfile.readline()[1:-2])
+            args.append(rfile.read(n + 2)[:-2])
+        return args
+
+    def _get(self, key: bytes):
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def _dispatch(self, args: List[bytes]) -> bytes:
+        cmd = args[0].upper() if args else b""
+        with self.lock:
+            if cmd == b"PING":
+                return b"+PONG\r\n"
+            if cmd in (b"SELECT", b"AUTH"):
+                return b"+OK\r\n"
+            if cmd == b"GET" and len(args) == 2:
+                item = self._get(args[1])
+                return b"$-1\r\n" if item is None else b"$%d\r\n%s\r\n" % (len(item[0]), item[0])
+            if cmd == b"SET" and len(args) in (3, 5):
+                expires = None
+                if len(args) == 5:
+                    unit = 1.0 if args[3].upper() == b"EX" else 0.001
+                    expires = time.monotonic() + int(args[4]) * unit
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if cmd in (b"DEL", b"EXISTS") and len(args) >= 2:
+                n = sum(self._get(k) is not None for k in args[1:])
+                if cmd == b"DEL":
+                    for k in args[1:]:
+                        self.data.pop(k, None)
+                return b":%d\r\n" % n
+            if cmd == b"DBSIZE":
+                return b":%d\r\n" % sum(self._get(k) is not None for k in list(self.data))
+            if cmd == b"FLUSHALL":
+                self.data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command or wrong number of arguments\r\n"
+
+
+def backend_from_env():
+    """-> None for the in-process store, else the configured shared backend."""
+    kind = (os.getenv("SESSION_BACKEND") or "memory").strip().lower()
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SqliteSessionBackend(os.getenv("SESSION_SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+    if kind == "redis":
+        return RedisSessionBackend(os.getenv("SESSION_REDIS_URL") or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown SESSION_BACKEND '{kind}', expected memory, sqlite or redis")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Redis-protocol stand-in for SESSION_BACKEND=redis")
+    ap.add_argument("--serve", type=int, default=6379, help="port to listen on")
+    ap.add_argument("--host", default="127.0.0.1")
+    args = ap.parse_args()
+    srv = StandInRespServer(args.host, args.serve)
+    print(f"serving on {srv.url}")
+    try:
+        srv._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
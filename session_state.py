@@ -1,160 +1,594 @@
-from collections import defaultdict
-from typing import Dict, List
+"""
+per-conversation state for /chat.
+
+SessionStore keeps every session in one LRU-ordered map: sessions idle for
+longer than SESSION_TTL_S are dropped, and at most SESSION_MAX are kept
+(least recently used go first). each session has its own lock, and emotion
+scores are folded into a fixed-size aggregate (EMA by default, see
+emotion_aggregation), so a turn costs O(labels) no matter how long the
+conversation is. emotion state is a pair of fixed-size vectors
+in classifier label order, and recommended movies are kept as int movie ids
+in a bounded ring (SeenRing) rather than lists of titles.
+
+with SESSION_BACKEND=sqlite|redis (see session_backends) sessions live
+outside the process instead, so every worker sees the same conversation.
+/chat wraps a request in session_scope_async(): the session is read once at
+the start and written back once at the end (in a worker thread, never on the
+event loop), in the compact binary form of encode_session().
+
+the module-level functions are the API /chat uses; they all go through the
+store singleton.
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from dl.label_manifest import load_label_names
+from emotion_aggregation import aggregator_from_env, top_k
+from session_backends import backend_from_env
 
-#in-memory session store
-_SESSIONS = {}
+CONFIDENCE_INCREMENT = 0.2
+CONFIDENCE_THRESHOLD = 0.6
+# recommended movies remembered per session (not offered again)
+SEEN_MAX = 50
+
+# emotion vectors are indexed in classifier output order (the label manifest next to the
+# weights dl.emotion_inference loads; GoEmotions order when there is none)
+EMOTION_ORDER = load_label_names("models/emotion_classifier")
+_EMOTION_INDEX = {e: i for i, e in enumerate(EMOTION_ORDER)}
+_ORDER_CRC = zlib.crc32("|".join(EMOTION_ORDER).encode("utf-8"))
+# how turns combine into the session's emotion profile (EMOTION_AGGREGATION, see emotion_aggregation)
+AGGREGATOR = aggregator_from_env()
+_AGG_CRC = zlib.crc32(AGGREGATOR.key.encode("utf-8"))
+# version, turns, confidence, labels, aggregator state rows, aggregator steps, seen ids,
+# crc32 of the label order, crc32 of the aggregator config
+_HEADER = struct.Struct("<BIfHHIHII")
+_CODEC_VERSION = 3
+
+logger = logging.getLogger("api")
+
+
+def emotion_vector(ml_scores: Dict[str, float]) -> np.ndarray:
+    """{label: score} -> float32 vector in EMOTION_ORDER, NaN for labels not reported."""
+    get = ml_scores.get
+    return np.fromiter((get(e, np.nan) for e in EMOTION_ORDER), dtype=np.float32, count=len(EMOTION_ORDER))
+
+
+class SeenRing:
+    """
+    the last `capacity` recommended movies as int ids: a fixed int32 ring for
+    order plus a set for O(1) membership. ids are MovieLens movie ids; titles
+    the movie index does not know get a negative hashed id, with the title
+    kept in `names` while the id is in the ring.
+    """
+
+    __slots__ = ("ids", "head", "size", "members", "names")
+
+    def __init__(self, capacity: int = SEEN_MAX):
+        self.ids = np.zeros(max(1, capacity), dtype=np.int32)
+        self.head = 0
+        self.size = 0
+        self.members = set()
+        self.names: Optional[Dict[int, str]] = None
+
+    def __contains__(self, movie_id: int) -> bool:
+        return movie_id in self.members
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, movie_id: int, name: Optional[str] = None) -> None:
+        if movie_id in self.members:
+            return
+        cap = len(self.ids)
+        if self.size == cap:
+            old = int(self.ids[self.head])
+            self.members.discard(old)
+            if self.names:
+                self.names.pop(old, None)
+        else:
+            self.size += 1
+        self.ids[self.head] = movie_id
+        self.head = (self.head + 1) % cap
+        self.members.add(movie_id)
+        if name is not None:
+            if self.names is None:
+                self.names = {}
+            self.names[movie_id] = name
+
+    def ordered(self) -> np.ndarray:
+        """ids oldest first."""
+        if self.size < len(self.ids):
+            return self.ids[:self.size].copy()
+        return np.roll(self.ids, -self.head)
+
+
+def _movie_index():
+    # lazy: the index is only needed once titles are recorded, and the API has loaded it by then
+    from api.movie_index import get_movie_index
+
+    return get_movie_index()
+
+
+def movie_id_of(title: str, year=None) -> Tuple[int, bool]:
+    """-> (id, known): the MovieLens id when the movie index has the title, else a negative hashed id."""
+    index = _movie_index()
+    row = index.find(title, year) if index is not None else None
+    if row is not None:
+        return int(index.ids[row]), True
+    return -1 - (zlib.crc32(str(title).strip().lower().encode("utf-8")) & 0x7FFFFFFF), False
+
+
+class Session:
+    __slots__ = ("agg", "counts", "steps", "extra", "turns", "confidence", "slots", "pending_question",
+                 "seen", "touched", "lock")
+
+    def __init__(self):
+        n = len(EMOTION_ORDER)
+        # aggregator state (rows x labels) and number of reports per label, EMOTION_ORDER-indexed
+        self.agg = AGGREGATOR.init(n)
+        self.counts = np.zeros(n, dtype=np.uint32)
+        # turns folded into agg (turns without any score are skipped)
+        self.steps = 0
+        # labels outside EMOTION_ORDER: {label: [mean, count]}, normally never allocated
+        self.extra: Optional[Dict[str, list]] = None
+        self.turns = 0
+        self.confidence = 0.0
+        self.slots: Dict[str, str] = {}
+        self.pending_question: Optional[str] = None
+        self.seen: Optional[SeenRing] = None
+        self.touched = time.monotonic()
+        self.lock = threading.RLock()
+
+    def add_emotions(self, ml_scores: Dict[str, float]) -> None:
+        vec = emotion_vector(ml_scores)
+        hit = ~np.isnan(vec)
+        n_hit = int(np.count_nonzero(hit))
+        with self.lock:
+            if n_hit:
+                # the classifier normally reports every label: plain vector update
+                full = n_hit == len(vec)
+                self.counts += 1 if full else hit
+                self.steps += 1
+                AGGREGATOR.update(self.agg, self.counts, self.steps, vec, hit, full)
+            if len(ml_scores) > n_hit:
+                # labels the classifier order does not know: plain running mean
+                if self.extra is None:
+                    self.extra = {}
+                for emo, score in ml_scores.items():
+                    if emo not in _EMOTION_INDEX:
+                        m = self.extra.setdefault(emo, [0.0, 0])
+                        m[1] += 1
+                        m[0] += (score - m[0]) / m[1]
+            self.turns += 1
+            self.confidence = max(self.confidence, max(ml_scores.values(), default=0.0))
+
+    def aggregated(self) -> Dict[str, float]:
+        """{label: aggregated score} for every label reported at least once."""
+        with self.lock:
+            values = AGGREGATOR.value(self.agg, self.counts, self.steps).tolist()
+            out = {EMOTION_ORDER[i]: values[i] for i in np.flatnonzero(self.counts).tolist()}
+            if self.extra:
+                out.update({e: m for e, (m, _) in self.extra.items()})
+        return out
+
+    def top_emotions(self, k: int = 3) -> List[Tuple[str, float]]:
+        with self.lock:
+            top = top_k(AGGREGATOR.value(self.agg, self.counts, self.steps), self.counts, EMOTION_ORDER, k)
+            if self.extra:
+                top = sorted(top + [(e, m) for e, (m, _) in self.extra.items()], key=lambda x: x[1], reverse=True)[:k]
+        return top
+
+
+def encode_session(s: Session) -> bytes:
+    """
+    header, float32 aggregator state (rows x labels) + uint32 counts in
+    EMOTION_ORDER, int32 seen ids (oldest first), then a small json tail for
+    slots, the pending question, names of unindexed seen titles and labels
+    outside EMOTION_ORDER.
+    """
+    seen = s.seen.ordered() if s.seen is not None else np.zeros(0, dtype=np.int32)
+    tail = {}
+    if s.slots:
+        tail["s"] = s.slots
+    if s.pending_question:
+        tail["p"] = s.pending_question
+    if s.seen is not None and s.seen.names:
+        tail["n"] = {str(k): v for k, v in s.seen.names.items()}
+    if s.extra:
+        tail["x"] = s.extra
+    return b"".join([
+        _HEADER.pack(_CODEC_VERSION, s.turns, s.confidence, s.agg.shape[1], s.agg.shape[0], s.steps, len(seen),
+                     _ORDER_CRC, _AGG_CRC),
+        s.agg.astype("<f4", copy=False).tobytes(),
+        s.counts.astype("<u4", copy=False).tobytes(),
+        seen.astype("<i4", copy=False).tobytes(),
+        json.dumps(tail, separators=(",", ":"), ensure_ascii=False).encode("utf-8") if tail else b"",
+    ])
+
+
+def decode_session(data: bytes) -> Session:
+    version, turns, confidence, n, rows, steps, n_seen, order_crc, agg_crc = _HEADER.unpack_from(data)
+    if version != _CODEC_VERSION:
+        raise ValueError(f"unknown session encoding version {version}")
+    off = _HEADER.size
+    agg = np.frombuffer(data, dtype="<f4", count=rows * n, offset=off)
+    off += 4 * rows * n
+    counts = np.frombuffer(data, dtype="<u4", count=n, offset=off)
+    seen = np.frombuffer(data, dtype="<i4", count=n_seen, offset=off + 4 * n)
+    off += 4 * n + 4 * n_seen
+    tail = json.loads(data[off:].decode("utf-8")) if len(data) > off else {}
+    s = Session()
+    s.turns, s.confidence = turns, confidence
+    # state written under another label order or aggregator config would be misread; start it over
+    if order_crc == _ORDER_CRC and agg_crc == _AGG_CRC and (rows, n) == s.agg.shape:
+        s.agg[:] = agg.reshape(rows, n)
+        s.counts[:] = counts
+        s.steps = steps
+    s.extra = tail.get("x")
+    s.slots = tail.get("s", {})
+    s.pending_question = tail.get("p")
+    if n_seen:
+        names = {int(k): v for k, v in tail.get("n", {}).items()}
+        s.seen = SeenRing(max(SEEN_MAX, n_seen))
+        for mid in seen.tolist():
+            s.seen.add(mid, names.get(mid))
+    return s
+
+
+class SessionStore:
+    def __init__(self, max_sessions: int = 10000, ttl: Optional[float] = 6 * 3600.0, backend=None):
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl
+        self.backend = backend
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        # sessions checked out by session_scope() with a shared backend: id -> [session, open scopes]
+        self._active: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.saves = 0
+        self.backend_errors = 0
+
+    def get(self, session_id: str) -> Session:
+        """the session for session_id, created on first use (or after it expired)."""
+        if self.backend is not None:
+            with self._lock:
+                active = self._active.get(session_id)
+            return active[0] if active is not None else self._load(session_id)
+        now = time.monotonic()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is not None and self.ttl is not None and now - s.touched > self.ttl:
+                del self._sessions[session_id]
+                self.expirations += 1
+                s = None
+            if s is None:
+                s = self._sessions[session_id] = Session()
+                self.created += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            s.touched = now
+            self._sweep(now)
+        return s
+
+    def _sweep(self, now: float) -> None:
+        # caller holds the lock; LRU order is also idle order, so expired sessions sit at the front
+        while self.ttl is not None and self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.touched <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, session_id: str) -> Session:
+        self.loads += 1
+        try:
+            data = self.backend.load(session_id)
+            return decode_session(data) if data else Session()
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Session load failed for '{session_id}': {e}")
+            return Session()
+
+    def _save(self, session_id: str, s: Session) -> None:
+        self.saves += 1
+        try:
+            with s.lock:
+                data = encode_session(s)
+            self.backend.save(session_id, data, self.ttl)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Session save failed for '{session_id}': {e}")
+
+    def _checkout(self, session_id: str) -> Optional[list]:
+        # the open scope's entry for session_id, or None when the session must be loaded first
+        with self._lock:
+            active = self._active.get(session_id)
+            if active is not None:
+                active[1] += 1
+        return active
+
+    def _checkin_loaded(self, session_id: str, loaded: Session) -> list:
+        with self._lock:
+            active = self._active.setdefault(session_id, [loaded, 0])
+            active[1] += 1
+        return active
+
+    def _release(self, session_id: str, active: list) -> bool:
+        """-> True when this was the last open scope, so the session is due for saving."""
+        with self._lock:
+            active[1] -= 1
+            last = active[1] == 0
+            if last:
+                self._active.pop(session_id, None)
+        return last
+
+    @contextmanager
+    def scope(self, session_id: str) -> Iterator[Session]:
+        """
+        one read + one write per request with a shared backend; nested and
+        concurrent scopes for the same id share the loaded session.
+        """
+        if self.backend is None:
+            yield self.get(session_id)
+            return
+        active = self._checkout(session_id)
+        if active is None:
+            active = self._checkin_loaded(session_id, self._load(session_id))
+        try:
+            yield active[0]
+        finally:
+            if self._release(session_id, active):
+                self._save(session_id, active[0])
+
+    @asynccontextmanager
+    async def ascope(self, session_id: str) -> AsyncIterator[Session]:
+        """scope() for the event loop: the backend read and write run in a worker thread."""
+        if self.backend is None:
+            yield self.get(session_id)
+            return
+        active = self._checkout(session_id)
+        if active is None:
+            active = self._checkin_loaded(session_id, await asyncio.to_thread(self._load, session_id))
+        try:
+            yield active[0]
+        finally:
+            if self._release(session_id, active):
+                await asyncio.to_thread(self._save, session_id, active[0])
+
+    @contextmanager
+    def edit(self, session_id: str) -> Iterator[Session]:
+        """locked session for a change; outside a scope, a shared backend gets the change written back at once."""
+        with self.scope(session_id) as s:
+            with s.lock:
+                yield s
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend is not None:
+            self.backend.delete(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        if self.backend is not None:
+            out = {"ttl_s": self.ttl, "active": len(self._active), "loads": self.loads, "saves": self.saves,
+                   "backend_errors": self.backend_errors}
+            try:
+                out.update(self.backend.stats())
+            except Exception as e:
+                out["backend_stats_error"] = str(e)
+            return out
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_s": self.ttl,
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_ttl = float(os.getenv("SESSION_TTL_S", str(6 * 3600)))
+_STORE = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX", "10000")),
+    ttl=_ttl if _ttl > 0 else None,
+    backend=backend_from_env(),
+)
+
+
+def get_store() -> SessionStore:
+    return _STORE
+
+
+def session_stats() -> dict:
+    return _STORE.stats()
+
+
+def session_scope(session_id: str):
+    """wrap one /chat turn: with a shared backend the session is loaded once and saved once."""
+    return _STORE.scope(session_id)
+
+
+def session_scope_async(session_id: str):
+    """session_scope for async handlers; backend I/O stays off the event loop."""
+    return _STORE.ascope(session_id)
 
-_SESSIONS.clear()
 
 # --- Context slots (follow-up answers) ---
 
 def get_slots(session_id: str) -> dict:
-    session = get_session(session_id)
-    if "slots" not in session:
-        session["slots"] = {}
-    return session["slots"]
+    s = _STORE.get(session_id)
+    with s.lock:
+        return dict(s.slots)
 
 
 def set_slot_value(session_id: str, slot_id: str, value: str):
-    session = get_session(session_id)
-    if "slots" not in session:
-        session["slots"] = {}
-    session["slots"][slot_id] = value
+    with _STORE.edit(session_id) as s:
+        s.slots[slot_id] = value
 
 
 def filled_slot_count(session_id: str) -> int:
-    return len(get_slots(session_id))
-
-CONFIDENCE_INCREMENT = 0.2
-CONFIDENCE_THRESHOLD = 0.6
-
-
-def get_session(session_id: str):
-    session = _SESSIONS.setdefault(
-        session_id,
-        {
-            "emotions": {},
-            "turns": 0,
-            "confidence": 0.0,
-            "slots": {},
-            "seen_titles": []
-        }
-    )
-
-    if "confidence" not in session:
-        session["confidence"] = 0.0
-    if "seen_titles" not in session:
-        session["seen_titles"] = []
-
-    return session
-
-
-def _get_session(session_id):
-    if session_id not in _SESSIONS:
-        _SESSIONS[session_id] = {
-            "emotions": {},
-            "turns": 0,
-            "pending_question": None,
-            "seen_titles": []
-        }
-    return _SESSIONS[session_id]
+    return len(_STORE.get(session_id).slots)
 
 
 def set_pending_question(session_id, question_id):
-    session = _get_session(session_id)
-    session["pending_question"] = question_id
+    with _STORE.edit(session_id) as s:
+        s.pending_question = question_id
 
 
 def get_pending_question(session_id):
-    session = _get_session(session_id)
-    return session.get("pending_question")
+    return _STORE.get(session_id).pending_question
 
 
 def clear_pending_question(session_id):
-    session = _get_session(session_id)
-    session["pending_question"] = None
-
+    set_pending_question(session_id, None)
 
-def update_emotions(session_id: str, ml_scores: dict):
-    session = _SESSIONS.setdefault(
-        session_id,
-        {
-            "emotions": {},
-            "turns": 0,
-            "confidence": 0.0
-        }
-    )
-
-    for emo, score in ml_scores.items():
-        if emo not in session["emotions"]:
-            session["emotions"][emo] = []
 
-        session["emotions"][emo].append(score)
+# --- Emotions ---
 
-    session["turns"] += 1
-    session["confidence"] = max(session["confidence"], max(ml_scores.values(), default=0.0))
+def update_emotions(session_id: str, ml_scores: dict):
+    with _STORE.edit(session_id) as s:
+        s.add_emotions(ml_scores)
 
 
 def aggregated_emotions(session_id: str):
-    session = get_session(session_id)
+    """aggregated score per emotion reported so far (EMOTION_AGGREGATION decides how turns combine)."""
+    return _STORE.get(session_id).aggregated()
 
-    aggregated = {}
-    for emo, scores in session["emotions"].items():
-        aggregated[emo] = sum(scores) / len(scores)
 
-    return aggregated
+def dominant_emotions(session_id: str, k: int = 3) -> List[Tuple[str, float]]:
+    """top k (emotion, score) of the session, highest first."""
+    return _STORE.get(session_id).top_emotions(k)
 
 
 def is_confident_enough(session_id: str) -> bool:
-    return get_session(session_id)["confidence"] >= CONFIDENCE_THRESHOLD
+    return _STORE.get(session_id).confidence >= CONFIDENCE_THRESHOLD
 
 def get_turns(session_id: str) -> int:
-    return int(get_session(session_id).get("turns", 0))
+    return int(_STORE.get(session_id).turns)
 
 # --- Recommendation history helpers ---
 
 def get_seen_titles(session_id: str) -> List[str]:
-    return list(get_session(session_id).get("seen_titles", []))
-
-
-def add_seen_titles(session_id: str, titles: List[str], max_keep: int = 50) -> None:
-    session = get_session(session_id)
-    seen = session.get("seen_titles", [])
-    # Append while avoiding duplicates, keep only last max_keep
-    for t in titles:
-        if t and t not in seen:
-            seen.append(t)
-    if len(seen) > max_keep:
-        seen = seen[-max_keep:]
-    session["seen_titles"] = seen
-
-
-class ConversationContext:
-    def __init__(self):
-        self.emotion_scores: Dict[str, float] = defaultdict(float)
-        self.turns: int = 0
-
-    def update(self, new_scores: Dict[str, float]):
-        for emo, score in new_scores.items():
-            self.emotion_scores[emo] += score
-        self.turns += 1
-
-    def dominant(self, top_k=3):
-        return sorted(
-            self.emotion_scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:top_k]
-
-    def confidence(self):
-        if not self.emotion_scores:
-            return 0.0
-        return max(self.emotion_scores.values())
-
-_CONTEXTS = {}
-
-
-def get_context(session_id: str) -> ConversationContext:
-    if session_id not in _CONTEXTS:
-        _CONTEXTS[session_id] = ConversationContext()
-    return _CONTEXTS[session_id]
+    """titles of the movies already recommended in this session, oldest first."""
+    s = _STORE.get(session_id)
+    with s.lock:
+        if s.seen is None or not len(s.seen):
+            return []
+        ids = s.seen.ordered().tolist()
+        names = dict(s.seen.names or {})
+    index = _movie_index() if any(mid > 0 for mid in ids) else None
+    out = []
+    for mid in ids:
+        if mid < 0:
+            title = names.get(mid)
+        else:
+            row = index.row_of(mid) if index is not None else None
+            title = index.titles[row] if row is not None else None
+        if title:
+            out.append(title)
+    return out
+
+
+def add_seen_titles(session_id: str, titles: List[str], max_keep: int = SEEN_MAX, years: Optional[List] = None) -> None:
+    """remember recommended movies; `years` (parallel to titles) picks the right one among same-titled movies."""
+    resolved = []
+    for i, t in enumerate(titles):
+        if t:
+            mid, known = movie_id_of(t, years[i] if years and i < len(years) else None)
+            resolved.append((mid, None if known else t))
+    with _STORE.edit(session_id) as s:
+        if s.seen is None:
+            s.seen = SeenRing(max_keep)
+        for mid, name in resolved:
+            s.seen.add(mid, name)
+
+
+if __name__ == "__main__":
+    # per-turn cost of the vector aggregate vs re-averaging every stored score, the bounded store under
+    # churn, and memory per session: dict-of-lists + title list (before) vs vectors + id ring (now)
+    import random
+    import tracemalloc
+
+    from api.movie_index import get_movie_index
+
+    labels = list(EMOTION_ORDER)
+    rng = random.Random(0)
+    store = SessionStore(max_sessions=1000, ttl=None)
+    for turns in (10, 100, 1000):
+        lists = {e: [] for e in labels}
+        s = store.get(f"bench-{turns}")
+        t_lists = t_running = 0.0
+        for _ in range(turns):
+            scores = {e: rng.random() for e in labels}
+            t0 = time.perf_counter()
+            for e, v in scores.items():
+                lists[e].append(v)
+            {e: sum(v) / len(v) for e, v in lists.items()}
+            t_lists += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            s.add_emotions(scores)
+            s.aggregated()
+            t_running += time.perf_counter() - t0
+        print(f"{turns:5d} turns: lists {1e6 * t_lists / turns:7.1f} us/turn, {AGGREGATOR.key} {1e6 * t_running / turns:5.1f} us/turn")
+    for i in range(20000):
+        store.get(f"churn-{i}").add_emotions({e: 0.1 for e in labels})
+    print(store.stats())
+
+    index = get_movie_index()
+    n_sessions, turns = 2000, 10
+    picks = [[index.titles[rng.randrange(len(index))] for _ in range(SEEN_MAX)] for _ in range(n_sessions)]
+    turn_scores = [{e: rng.random() for e in labels} for _ in range(turns)]
+
+    def legacy(i):
+        # the original per-session dict: a list of floats per label per turn, seen titles as a list
+        sess = {"emotions": {}, "turns": 0, "confidence": 0.0, "slots": {}, "seen_titles": []}
+        for scores in turn_scores:
+            for e, v in scores.items():
+                sess["emotions"].setdefault(e, []).append(v * (1 + i * 1e-9))
+            sess["turns"] += 1
+        sess["seen_titles"].extend(picks[i])
+        return sess
+
+    def current(i):
+        sess = Session()
+        for scores in turn_scores:
+            sess.add_emotions(scores)
+        sess.seen = SeenRing()
+        for t in picks[i]:
+            sess.seen.add(movie_id_of(t)[0])
+        return sess
+
+    for name, build in [("before (dicts/lists)", legacy), ("now (vectors + id ring)", current)]:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        kept = [build(i) for i in range(n_sessions)]
+        used = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        print(f"{name:24}: {used / n_sessions:8.0f} bytes/session ({turns} turns, {SEEN_MAX} seen titles)")
+        del kept
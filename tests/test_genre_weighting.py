@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+import nlp.genre_weighting as gw
+from nlp.genre_lexicon import GenreLexicon
+from nlp.genre_weighting import GENRE_RULES, GenreWeighter, extract_genre_hint
+
+GENRES = ["emo:Action", "emo:Comedy", "emo:Crime", "emo:Drama", "emo:Family", "emo:Horror", "emo:Mystery",
+          "emo:Romance", "emo:Thriller", "emo:War", "emo:Western"]
+
+
+@pytest.fixture
+def weighter():
+    return GenreWeighter(GENRES)
+
+
+def test_rules_add_to_the_base_weight(weighter):
+    p = weighter.profile({"pace_preference": "slow", "music_tone": "somber"})
+    assert p.weights["emo:Drama"] == pytest.approx(1.0 + 0.6 + 0.6)
+    assert p.weights["emo:Western"] == pytest.approx(1.6)
+    assert p.weights["emo:Comedy"] == pytest.approx(1.0)
+    assert p.ranked[0] == "emo:Drama"
+
+
+def test_rules_for_unknown_genres_are_skipped():
+    p = GenreWeighter(["emo:Comedy", "emo:Drama"]).profile({"pace_preference": "slow"})
+    assert set(p.weights) == {"emo:Comedy", "emo:Drama"}
+
+
+def test_block_wins_over_boosts(weighter):
+    # intensity_style=dark boosts Horror and Crime, the comfort direction blocks them
+    slots = {"intensity_style": "dark", "emotion_direction": "comforting"}
+    p = weighter.profile(slots, hint="emo:Horror")
+    assert p.weights["emo:Horror"] == 0.0
+    assert p.weights["emo:Crime"] == 0.0
+    assert "emo:Horror" not in p.ranked and "emo:Crime" not in p.ranked
+    assert set(p.blocked) == {"emo:Horror", "emo:War", "emo:Crime"}
+
+
+def test_content_sensitivity_blocks(weighter):
+    p = weighter.profile({"content_sensitivity": "avoid_violence", "usual_preference": "action_packed"})
+    assert {"emo:Action", "emo:Crime", "emo:War"} <= set(p.blocked)
+    assert "emo:Action" not in p.ranked
+    assert p.ranked[0] == "emo:Thriller"
+
+
+def test_hint_is_boosted_and_ranked_first(weighter):
+    p = weighter.profile({"pace_preference": "slow"}, hint="emo:Comedy")
+    assert p.weights["emo:Comedy"] == pytest.approx(1.0 + gw.HINT_BOOST)
+    assert p.ranked[0] == "emo:Comedy"
+
+
+def test_unknown_hint_is_ignored(weighter):
+    assert weighter.profile({}, hint="emo:Nope") is weighter.profile({})
+
+
+@pytest.mark.parametrize("text, hint", [
+    ("something with horror", "emo:Horror"),
+    ("some mystery please", "emo:Mystery"),
+    ("avoid horror", None),
+    ("no horror", None),
+    ("nothing dark", None),
+    ("I don't want anything scary", None),
+    ("i don’t want horror", None),
+    ("no horror, maybe a comedy", "emo:Comedy"),
+    ("not horror but comedy", "emo:Comedy"),
+    ("a comedy without horror", "emo:Comedy"),
+])
+def test_genre_hint_skips_negated_mentions(text, hint):
+    assert extract_genre_hint(text) == hint
+
+
+def test_negated_hint_never_tops_the_ranking():
+    w = gw.get_genre_weighter()
+    for text in ("avoid horror", "no horror", "nothing dark"):
+        p = w.profile({"content_sensitivity": "avoid_horror"}, hint=extract_genre_hint(text))
+        assert p.ranked[0] != "emo:Horror"
+        assert "emo:Horror" in p.blocked
+
+
+def test_profiles_are_memoized_per_slot_combination(weighter):
+    a = weighter.profile({"pace_preference": "fast", "era_preference": "modern"}, "emo:joy_1")
+    b = weighter.profile({"era_preference": "classic", "pace_preference": "fast"}, "emo:joy_1")
+    # era_preference has no genre rule, so both map to the same combination
+    assert a is b
+    assert weighter.profile({"pace_preference": "slow"}, "emo:joy_1") is not a
+    assert (weighter.hits, weighter.misses) == (1, 2)
+    with pytest.raises(TypeError):
+        a.weights["emo:Action"] = 5.0
+
+
+def test_memo_is_bounded():
+    w = GenreWeighter(GENRES, memo_size=2)
+    for v in GENRE_RULES["usual_preference"]:
+        w.profile({"usual_preference": v})
+    assert w.stats()["memoized"] == 2
+
+
+def test_weighter_recompiles_when_the_lexicon_reloads(tmp_path, monkeypatch):
+    labels = tmp_path / "genre_labels.ttl"
+    labels.write_text('emo:Comedy rdfs:label "Comedy" .\nemo:Drama rdfs:label "Drama" .\n', encoding="utf-8")
+    lexicon = GenreLexicon(str(labels), str(tmp_path / "missing.json"), check_interval=0.0)
+    monkeypatch.setattr(gw, "GENRE_LEXICON", lexicon)
+    monkeypatch.setattr(gw, "_WEIGHTER", None)
+    monkeypatch.setattr(gw, "_WEIGHTER_LABELS", None)
+
+    first = gw.get_genre_weighter()
+    assert first.genres == ["emo:Comedy", "emo:Drama"]
+    before = gw.genre_profile({"pace_preference": "slow"})
+    assert gw.get_genre_weighter() is first
+    assert gw.genre_profile({"pace_preference": "slow"}) is before
+
+    labels.write_text(labels.read_text(encoding="utf-8") + 'emo:Western rdfs:label "Western" .\n', encoding="utf-8")
+    st = os.stat(labels)
+    os.utime(labels, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    second = gw.get_genre_weighter()
+    assert second is not first
+    after = gw.genre_profile({"pace_preference": "slow"})
+    assert after is not before
+    assert after.weights["emo:Western"] == pytest.approx(1.6)
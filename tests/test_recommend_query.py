@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+import pytest
+
+from api.local_store import load_local_store
+from api.query_templates import ONTO_BASE
+from api.recommend_query import RecommendationPlanner, ranked_candidates, ranked_movies_query
+
+LABELS = os.path.join(os.path.dirname(__file__), os.pardir, "kg", "data", "genre_labels.ttl")
+WEIGHTS = {"emo:Comedy": 1.0, "emo:Drama": 1.0}
+LABEL_OF = {"emo:Comedy": "Comedy", "emo:Drama": "Drama"}
+
+# ranked: Alpha, Remake (1970), Remake (2010), Delta, Echo, Foxtrot
+MOVIES = [
+    ("movie_1", "Alpha", 2000, ["Comedy", "Drama"]),
+    ("movie_2", "Remake", 1970, ["Comedy", "Drama"]),
+    ("movie_3", "Remake", 2010, ["Comedy", "Drama"]),
+    ("movie_4", "Delta", 2001, ["Comedy"]),
+    ("movie_5", "Echo", 2002, ["Comedy"]),
+    ("movie_6", "Foxtrot", 2003, ["Drama"]),
+]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    pytest.importorskip("pyoxigraph")
+    ttl = tmp_path_factory.mktemp("kg") / "movies.ttl"
+    lines = [f"@prefix emo: <{ONTO_BASE}> .", "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> ."]
+    for local, title, year, genres in MOVIES:
+        lines.append(f'emo:{local} a emo:Movie ; emo:title "{title}" ; emo:releaseYear "{year}"^^xsd:gYear ; '
+                     + " ; ".join(f"emo:belongsToGenre emo:{g}" for g in genres) + " .")
+    ttl.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return load_local_store("oxigraph", paths=[str(ttl), LABELS])
+
+
+def iris(cands):
+    return [c["iri"].rsplit("#", 1)[-1] for c in cands]
+
+
+def test_rejected_movies_are_excluded_by_iri(store):
+    q = ranked_movies_query(WEIGHTS, exclude_movies=[ONTO_BASE + "movie_2"])
+    assert iris(ranked_candidates(store.select(q), WEIGHTS, LABEL_OF)) == [
+        "movie_1", "movie_3", "movie_4", "movie_5", "movie_6"]
+    # seen titles stay title-based: both versions were watched as far as the user can tell
+    q = ranked_movies_query(WEIGHTS, exclude_titles=["Remake"])
+    assert iris(ranked_candidates(store.select(q), WEIGHTS, LABEL_OF)) == ["movie_1", "movie_4", "movie_5", "movie_6"]
+    with pytest.raises(ValueError):
+        ranked_movies_query(WEIGHTS, exclude_movies=["http://x/a> } DROP ALL {"])
+
+
+def test_rejecting_one_remake_keeps_the_other(store):
+    async def select(q):
+        return store.select(q)
+
+    async def run():
+        planner = RecommendationPlanner(select, WEIGHTS, LABEL_OF, page_size=2, max_pages=10)
+        handed = []
+        while True:
+            page = await planner.candidates()
+            if not page:
+                return handed, planner
+            handed += iris(page)
+            planner.offered(page)
+            # the rating filter drops every movie from before 2001, including the 1970 "Remake"
+            planner.reject(c for c in page if int(c["year"]) < 2001)
+
+    handed, planner = asyncio.run(run())
+    assert handed == ["movie_1", "movie_2", "movie_3", "movie_4", "movie_5", "movie_6"]
+    assert planner.rejected == {ONTO_BASE + "movie_1", ONTO_BASE + "movie_2"}
+    # the last, empty page is what tells the planner the store ran dry
+    assert planner.queries == 4
+
+
+def test_reject_ignores_movies_that_were_not_offered(store):
+    async def select(q):
+        return store.select(q)
+
+    async def run():
+        planner = RecommendationPlanner(select, WEIGHTS, LABEL_OF, page_size=3)
+        page = await planner.candidates()
+        planner.offered(page[:1])
+        planner.reject([{"title": "Remake", "year": "2010"}, {"title": "Index Only", "year": "1999"}])
+        assert planner.rejected == set()
+        assert iris(await planner.candidates()) == ["movie_2", "movie_3"]
+
+    asyncio.run(run())
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from session_backends import RedisSessionBackend, SqliteSessionBackend, StandInRespServer
+from session_state import SessionStore
+
+
+@pytest.fixture
+def resp_server():
+    srv = StandInRespServer().start()
+    yield srv
+    srv.stop()
+
+
+@pytest.fixture(params=["redis", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "redis":
+        srv = StandInRespServer().start()
+        b = RedisSessionBackend(srv.url)
+        yield b
+        b.close()
+        srv.stop()
+    else:
+        b = SqliteSessionBackend(str(tmp_path / "sessions.sqlite"))
+        yield b
+        b.close()
+
+
+class SlowBackend:
+    """wraps a backend and sleeps in every call, like a Redis with a slow network."""
+
+    def __init__(self, inner, delay: float):
+        self.inner, self.delay = inner, delay
+
+    def load(self, session_id):
+        time.sleep(self.delay)
+        return self.inner.load(session_id)
+
+    def save(self, session_id, data, ttl):
+        time.sleep(self.delay)
+        self.inner.save(session_id, data, ttl)
+
+
+def test_workers_share_a_conversation(backend):
+    a = SessionStore(ttl=60, backend=backend)
+    b = SessionStore(ttl=60, backend=backend)
+    with a.scope("s1") as s:
+        s.add_emotions({"joy": 0.9})
+        s.slots["pace_preference"] = "fast"
+    with b.scope("s1") as s:
+        assert s.turns == 1
+        assert s.slots == {"pace_preference": "fast"}
+        assert s.aggregated()["joy"] == pytest.approx(0.9)
+    assert (a.loads, a.saves) == (1, 1)
+
+
+def test_nested_scopes_load_and_save_once(backend):
+    store = SessionStore(ttl=60, backend=backend)
+    with store.scope("s2") as outer:
+        with store.edit("s2") as inner:
+            assert inner is outer
+            inner.slots["era_preference"] = "modern"
+    assert (store.loads, store.saves) == (1, 1)
+    assert SessionStore(ttl=60, backend=backend).get("s2").slots == {"era_preference": "modern"}
+
+
+def test_resp_backend_expiry(resp_server):
+    backend = RedisSessionBackend(resp_server.url)
+    backend.save("gone", b"x", ttl=0.05)
+    backend.save("kept", b"y", ttl=None)
+    time.sleep(0.1)
+    assert backend.load("gone") is None
+    assert backend.load("kept") == b"y"
+    backend.delete("kept")
+    assert backend.load("kept") is None
+
+
+def test_resp_client_reconnects(resp_server):
+    backend = RedisSessionBackend(resp_server.url)
+    backend.save("s", b"1", ttl=None)
+    backend.client._sock.close()
+    assert backend.load("s") == b"1"
+
+
+def test_async_scope_keeps_backend_io_off_the_loop(resp_server):
+    store = SessionStore(ttl=60, backend=SlowBackend(RedisSessionBackend(resp_server.url), delay=0.2))
+
+    async def turn(i):
+        async with store.ascope(f"c{i}") as s:
+            s.add_emotions({"joy": 0.5})
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.ensure_future(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(turn(i) for i in range(4)))
+        elapsed = time.perf_counter() - start
+        t.cancel()
+        return ticks, elapsed
+
+    ticks, elapsed = asyncio.run(main())
+    # 4 conversations x (load + save) at 0.2 s each would take 1.6 s if the loop were blocked
+    assert elapsed < 1.0
+    assert ticks >= 20
+    assert (store.loads, store.saves) == (4, 4)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import api.sparql_client as sc
+from api.circuit_breaker import CircuitBreaker
+from api.sparql_client import SparqlResultCache
+
+
+def count_result(n):
+    return {"results": {"bindings": [{"n": {"value": str(n)}}]}}
+
+
+class FakeClient:
+    """answers every SELECT with the current triple count; updates add a triple."""
+
+    def __init__(self):
+        self.triples = 10
+        self.selects = []
+        self.updates = 0
+
+    def select(self, query, timeout=None):
+        self.selects.append(query)
+        return count_result(self.triples)
+
+    def update(self, update_query, timeout=None):
+        self.updates += 1
+        self.triples += 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = FakeClient()
+    monkeypatch.setattr(sc, "_CLIENT", c)
+    monkeypatch.setattr(sc, "_RESULT_CACHE", SparqlResultCache(maxsize=16, ttl=60, probe_interval=0))
+    monkeypatch.setattr(sc, "_BREAKER", CircuitBreaker(enabled=False))
+    return c
+
+
+def test_whitespace_comments_and_prefix_order_do_not_change_the_key(client):
+    a = "PREFIX emo: <http://x/#>\nPREFIX rdfs: <http://r/#>\nSELECT ?t WHERE { ?m emo:hasTitle ?t }"
+    b = "# titles\nPREFIX rdfs: <http://r/#> PREFIX emo: <http://x/#>   SELECT ?t\n\tWHERE {\n  ?m emo:hasTitle ?t # any\n}"
+    assert sc.run_select(a) == sc.run_select(b)
+    assert len(client.selects) == 1
+    sc.run_select('SELECT ?t WHERE { ?m emo:hasTitle "a  b" }')
+    sc.run_select('SELECT ?t WHERE { ?m emo:hasTitle "a b" }')
+    # whitespace inside literals is significant
+    assert len(client.selects) == 3
+    assert sc.get_result_cache().stats()["kg_version"] == 0
+
+
+def test_run_update_bumps_and_clears(client):
+    q = "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }"
+    assert sc.run_select(q) == count_result(10)
+    assert sc.run_select(q) == count_result(10)
+    sc.run_update("INSERT DATA { <a> <b> <c> }")
+    assert sc.get_result_cache().version == 1
+    assert len(sc.get_result_cache().memory) == 0
+    assert sc.run_select(q) == count_result(11)
+    assert len(client.selects) == 2
+
+
+def test_changed_triple_count_bumps():
+    cache = SparqlResultCache(probe_interval=0)
+    cache.set("k", {"x": 1})
+    cache.observe_stamp(count_result(10))
+    cache.observe_stamp(count_result(10))
+    assert cache.version == 0 and cache.memory.get("k") == {"x": 1}
+    cache.observe_stamp(count_result(11))
+    assert cache.version == 1 and cache.memory.get("k") is None
+
+
+def test_probe_notices_an_out_of_band_update(client):
+    cache = sc.get_result_cache()
+    cache.probe_interval = 60
+    q = "SELECT ?t WHERE { ?m ?p ?t }"
+    sc.run_select(q)
+    client.triples += 1
+    cache._next_probe = 0.0
+    sc.run_select(q)
+    assert cache.version == 1
+    # the second probe sees the extra triple, so the repeated query misses
+    assert client.selects.count(q) == 2
+
+
+def test_result_fetched_across_a_bump_is_not_cached(client, monkeypatch):
+    calls = []
+
+    async def slow_select(query, timeout):
+        calls.append(query)
+        seen = client.triples
+        await asyncio.sleep(0.2)
+        return count_result(seen)
+
+    monkeypatch.setattr(sc, "_hedged_select", slow_select)
+    q = "SELECT ?t WHERE { ?m ?p ?t }"
+
+    async def main():
+        first = asyncio.ensure_future(sc.run_select_async(q))
+        await asyncio.sleep(0.05)
+        client.triples += 1
+        sc.get_result_cache().bump("update")
+        stale = await first
+        return stale, await sc.run_select_async(q)
+
+    stale, fresh = asyncio.run(main())
+    assert stale == count_result(10)
+    assert fresh == count_result(11)
+    assert len(calls) == 2
+    assert sc.get_result_cache().version == 1
@@ -0,0 +1,160 @@
+"""
+small caching building blocks shared by the API and the model layer.
+
+- TTLCache   : thread-safe in-process LRU cache with per-entry expiry and hit/miss stats
+- SqliteStore: json key/value store on SQLite (WAL) with expiry, usable as a
+               persistent tier that several processes on one node can share
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 3600.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires is not None and expires <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = _MISSING) -> None:
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = (time.monotonic() + ttl) if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            return item is not _MISSING and (item[1] is None or item[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SqliteStore:
+    """
+    persistent key -> json value table with wall-clock expiry.
+
+    one connection per thread; WAL mode lets several worker processes read
+    while one writes.
+    """
+
+    def __init__(self, path: str, table: str = "cache"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'")
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default=None):
+        row = self._conn().execute(
+            f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            return default
+        return json.loads(value)
+
+    def get_with_expiry(self, key: str):
+        """-> (value, expires_at) or None when missing/expired."""
+        row = self._conn().execute(
+            f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, ttl: Optional[float] = None) -> None:
+        expires = (time.time() + ttl) if ttl is not None else None
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires),
+            )
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                f"DELETE FROM {self.table} WHERE expires IS NOT NULL AND expires <= ?", (time.time(),)
+            )
+        return cur.rowcount
+
+    def count(self) -> int:
+        return int(self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
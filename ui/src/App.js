@@ -12,6 +12,7 @@ import Footer from './components/Footer';
 
 const API_URL = 'http://localhost:8000/chat';
 const DETAILS_API_URL = 'http://localhost:8000/movie/details';
+const DETAILS_BATCH_API_URL = 'http://localhost:8000/movie/details/batch';
 
 function App() {
   const [messages, setMessages] = useState([
@@ -75,26 +76,28 @@ function App() {
     }
   };
 
+  const cacheDetails = (key, det) => {
+    detailsCacheRef.current.set(key, det);
+    if (det.poster_url) {
+      const img = new Image();
+      img.src = det.poster_url;
+    }
+  };
+
   const prefetchDetailsForMovies = async (movies) => {
     try {
-      const tasks = (movies || []).slice(0, 5).map(m => {
+      // details attached by /chat go straight into the cache; the rest come back in one batch call
+      const missing = [];
+      (movies || []).slice(0, 5).forEach(m => {
         const key = `${m?.title}|${m?.year || ''}`;
-        if (detailsCacheRef.current.has(key)) return Promise.resolve(detailsCacheRef.current.get(key));
-        return axios.post(DETAILS_API_URL, { title: m?.title, year: m?.year }, { timeout: 12000 })
-          .then(res => {
-            const det = res?.data?.details || null;
-            if (det) {
-              detailsCacheRef.current.set(key, det);
-              if (det.poster_url) {
-                const img = new Image();
-                img.src = det.poster_url;
-              }
-            }
-            return det;
-          })
-          .catch(() => null);
+        if (m?.details) cacheDetails(key, m.details);
+        else if (!detailsCacheRef.current.has(key)) missing.push({ title: m?.title, year: m?.year });
+      });
+      if (!missing.length) return;
+      const res = await axios.post(DETAILS_BATCH_API_URL, { items: missing }, { timeout: 12000 });
+      (res?.data?.results || []).forEach(r => {
+        if (r?.found && r.details) cacheDetails(`${r.title}|${r.year || ''}`, r.details);
       });
-      await Promise.all(tasks);
     } catch (e) {
       // ignore prefetch errors
     }
@@ -151,7 +154,8 @@ function App() {
         text: userMessage,
         session_id: sessionId,
         rating_threshold: 7.0,
-        top_k: 5
+        top_k: 5,
+        attach_details: true
       }, {
         timeout: 30000,
         headers: {
@@ -177,8 +181,7 @@ function App() {
         setHighlightIndex(0);
         const first = botMessage.movies[0];
         setPosterReady(false);
-        fetchHighlightDetails(first?.title, first?.year);
-        prefetchDetailsForMovies(botMessage.movies);
+        prefetchDetailsForMovies(botMessage.movies).then(() => fetchHighlightDetails(first?.title, first?.year));
       }
 
     } catch (err) {